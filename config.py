@@ -28,11 +28,74 @@ RSS_FEEDS = [
 # 記事取得の制限時間（現在時刻からX時間前）
 HOURS_LIMIT = 24
 
+# RSSフィード取得の並列数とフィードごとのタイムアウト（秒）
+RSS_MAX_WORKERS = int(os.getenv("RSS_MAX_WORKERS", "8"))
+RSS_FETCH_TIMEOUT = float(os.getenv("RSS_FETCH_TIMEOUT", "15"))
+
+# 記事処理パイプラインの設定（スクレイピング・翻訳の並列数とステージ間キューの上限）
+# 投稿は下書きの作成をPIPELINE_POST_WORKERS並列で行い、公開は公開順を保つため1件ずつ行う
+PIPELINE_SCRAPE_WORKERS = int(os.getenv("PIPELINE_SCRAPE_WORKERS", "4"))
+PIPELINE_TRANSLATE_WORKERS = int(os.getenv("PIPELINE_TRANSLATE_WORKERS", "2"))
+PIPELINE_POST_WORKERS = int(os.getenv("PIPELINE_POST_WORKERS", "4"))
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "10"))
+# 記事ごとの処理の状態をデータベースに記録し、中断した実行を最後に終わった段階から再開する
+# 失敗がこの回数に達した記事は以後の実行で再開しない
+ARTICLE_JOB_MAX_ATTEMPTS = int(os.getenv("ARTICLE_JOB_MAX_ATTEMPTS", "3"))
+
+# スクレイピングの前に重複記事を除外する（正規化したURLの一致と、フィードの本文のSimHashの近さで判定）
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "3"))  # 重複とみなすハミング距離（64ビット中、最大3）
+DEDUP_MIN_WORDS = 40  # これより単語数が少ない本文は指紋で判定しない
+DEDUP_RETENTION_DAYS = int(os.getenv("DEDUP_RETENTION_DAYS", "30"))
+# URLの正規化で除去するクエリパラメータ（末尾の*は前方一致）
+DEDUP_TRACKING_PARAMS = ["utm_*", "fbclid", "gclid", "mc_cid", "mc_eid", "ref", "ref_src", "cmpid"]
+
+# 共有HTTPクライアントの設定（接続プールと429/5xx時の再試行）
+HTTP_POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "20"))  # 保持するホスト数
+HTTP_POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "10"))  # 1ホストあたりの接続数
+HTTP_MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+HTTP_BACKOFF_FACTOR = float(os.getenv("HTTP_BACKOFF_FACTOR", "1.0"))
+HTTP_BACKOFF_JITTER = float(os.getenv("HTTP_BACKOFF_JITTER", "0.5"))
+HTTP_MAX_RETRY_AFTER_SECONDS = float(os.getenv("HTTP_MAX_RETRY_AFTER_SECONDS", "60"))  # Retry-Afterに従う待機の上限
+
+# スクレイピング時のドメインごとのリクエスト間隔（秒）
+SCRAPE_DEFAULT_INTERVAL = float(os.getenv("SCRAPE_DEFAULT_INTERVAL", "2"))
+# ドメインごとの個別設定（例: {"www.psypost.org": {"interval": 5.0, "burst": 1}}）
+SCRAPE_DOMAIN_LIMITS = {}
+# robots.txtのCrawl-delayを尊重するかどうか
+SCRAPE_RESPECT_CRAWL_DELAY = True
+
+# 本文抽出方式（fast: lxmlと1回の走査による高速抽出、legacy: html.parserとCSSセレクタ）
+SCRAPE_EXTRACTION_MODE = os.getenv("SCRAPE_EXTRACTION_MODE", "fast")
+
+# ページ取得時の上限（読み込むバイト数と読み込み時間）
+SCRAPE_MAX_BYTES = int(os.getenv("SCRAPE_MAX_BYTES", str(2 * 1024 * 1024)))
+SCRAPE_READ_DEADLINE = float(os.getenv("SCRAPE_READ_DEADLINE", "30"))
+# この終了タグを読み込んだ時点でページの読み込みを打ち切る（カンマ区切り、既定は空で最後まで読む）
+# 本文より前の要約や関連記事のカードも同じタグで閉じるサイトでは本文の途中で打ち切られ、
+# ページキャッシュにもそのまま保存されるため、本文の後にしか現れないタグだけを指定する
+SCRAPE_STOP_MARKERS = [marker.strip() for marker in os.getenv("SCRAPE_STOP_MARKERS", "").split(",") if marker.strip()]
+
+# ドメインごとの抽出ルールの学習（この文字数以上の本文が得られたセレクタを記録し、
+# 記録したセレクタが連続してこの回数失敗したら破棄する）
+EXTRACTION_RULE_MIN_CHARS = 300
+EXTRACTION_RULE_MAX_FAILURES = 3
+
+# スクレイピングしたページのディスクキャッシュ（再実行時の再取得・再解析を省略）
+PAGE_CACHE_ENABLED = os.getenv("PAGE_CACHE_ENABLED", "true").lower() == "true"
+PAGE_CACHE_DIR = os.getenv("PAGE_CACHE_DIR", "page_cache")
+PAGE_CACHE_TTL_HOURS = float(os.getenv("PAGE_CACHE_TTL_HOURS", "72"))
+PAGE_CACHE_MAX_BYTES = int(os.getenv("PAGE_CACHE_MAX_MB", "200")) * 1024 * 1024
+
 # WordPress.com OAuth2設定
 WP_SITE_URL = os.getenv("WP_SITE_URL")  # サイトURL（例：your-site.wordpress.com）または数値ID
 WP_CLIENT_ID = os.getenv("WP_CLIENT_ID")
 WP_CLIENT_SECRET = os.getenv("WP_CLIENT_SECRET")
 WP_REDIRECT_URI = os.getenv("WP_REDIRECT_URI", "http://localhost:8000/")
+# 翻訳記事の投稿をRESTのバッチエンドポイント（/batch/v1）でまとめて送信する（1回に最大25件）
+# バッチエンドポイントが使えない場合は1件ずつ投稿する
+WP_BATCH_ENABLED = os.getenv("WP_BATCH_ENABLED", "false").lower() == "true"
+WP_BATCH_SIZE = int(os.getenv("WP_BATCH_SIZE", "25"))
 
 # API鍵
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
@@ -42,4 +105,100 @@ ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 # 翻訳APIのモデル設定
 GEMINI_MODEL = "gemini-2.0-flash-exp"
 OPENAI_MODEL = "gpt-4o"
-ANTHROPIC_MODEL = "claude-3-sonnet-20240229"
\ No newline at end of file
+ANTHROPIC_MODEL = "claude-3-sonnet-20240229"
+
+# タイトル・要約などの短い出力に使う高速なモデル
+GEMINI_FAST_MODEL = os.getenv("GEMINI_FAST_MODEL", "gemini-2.0-flash-lite")
+OPENAI_FAST_MODEL = os.getenv("OPENAI_FAST_MODEL", "gpt-4o-mini")
+ANTHROPIC_FAST_MODEL = os.getenv("ANTHROPIC_FAST_MODEL", "claude-3-haiku-20240307")
+
+# プロバイダーごとのモデルの階層（main: 本文の翻訳、fast: 高速・低コスト）
+TRANSLATION_MODEL_TIERS = {
+    TranslationAPI.GEMINI.value: {"main": GEMINI_MODEL, "fast": GEMINI_FAST_MODEL},
+    TranslationAPI.OPENAI.value: {"main": OPENAI_MODEL, "fast": OPENAI_FAST_MODEL},
+    TranslationAPI.ANTHROPIC.value: {"main": ANTHROPIC_MODEL, "fast": ANTHROPIC_FAST_MODEL},
+}
+# 翻訳の処理をモデルの階層に振り分ける（無効の場合は全てmainで翻訳する）
+TRANSLATION_TIER_ROUTING_ENABLED = os.getenv("TRANSLATION_TIER_ROUTING_ENABLED", "false").lower() == "true"
+# 処理ごとの階層（タイトル・要約と本文を別々の呼び出しで翻訳する）
+TRANSLATION_TASK_TIERS = {"title_summary": "fast", "body": "main"}
+# フィードごとに記事全体を翻訳する階層（例: {"Psypost": "fast"}）
+TRANSLATION_FEED_TIERS = {}
+# 本文がこの文字数以下の記事は全体をfastで翻訳する（0で無効）
+TRANSLATION_FAST_TIER_MAX_CHARS = int(os.getenv("TRANSLATION_FAST_TIER_MAX_CHARS", "0"))
+
+# 予備の翻訳API（カンマ区切り、優先順）。TRANSLATION_APIが失敗・遅延した場合に切り替える
+TRANSLATION_FALLBACK_APIS = [TranslationAPI(name.strip()) for name in os.getenv("TRANSLATION_FALLBACK_APIS", "").split(",") if name.strip()]
+# 応答が直近の応答時間のこのパーセンタイルを超えたら、予備のプロバイダーにも同じ記事を送る（ヘッジ）
+TRANSLATION_HEDGE_ENABLED = os.getenv("TRANSLATION_HEDGE_ENABLED", "true").lower() == "true"
+TRANSLATION_HEDGE_PERCENTILE = 95
+TRANSLATION_HEDGE_MIN_SAMPLES = 5  # 応答時間の記録がこれ未満の場合は既定の待ち時間を使う
+TRANSLATION_HEDGE_DEFAULT_DELAY = float(os.getenv("TRANSLATION_HEDGE_DEFAULT_DELAY", "120"))  # 秒
+TRANSLATION_HEDGE_MIN_DELAY = 10  # 秒（キャッシュヒットなどで短くなりすぎないようにする）
+# プロバイダーごとのサーキットブレーカー（連続失敗回数と停止する秒数）
+CIRCUIT_BREAKER_FAILURES = 3
+CIRCUIT_BREAKER_COOLDOWN = 300
+
+# 複数記事を同時に翻訳する場合のプロバイダーごとの同時実行数
+TRANSLATION_CONCURRENCY = {
+    TranslationAPI.GEMINI.value: int(os.getenv("GEMINI_CONCURRENCY", "4")),
+    TranslationAPI.OPENAI.value: int(os.getenv("OPENAI_CONCURRENCY", "4")),
+    TranslationAPI.ANTHROPIC.value: int(os.getenv("ANTHROPIC_CONCURRENCY", "2")),
+}
+
+# 翻訳APIの同時実行数の自動調整（成功で加算的に増やし、429・過負荷応答で乗算的に減らす）
+# 初期値はTRANSLATION_CONCURRENCYで、調整した値は次回の実行に引き継ぐ
+TRANSLATION_AIMD_MAX_LIMIT = int(os.getenv("TRANSLATION_AIMD_MAX_LIMIT", "16"))
+TRANSLATION_AIMD_DECREASE_FACTOR = 0.5
+# 過負荷応答の再試行回数と、Retry-Afterがない場合の待機秒数の基準（試行ごとに2倍）
+TRANSLATION_OVERLOAD_RETRIES = int(os.getenv("TRANSLATION_OVERLOAD_RETRIES", "3"))
+TRANSLATION_OVERLOAD_BACKOFF = float(os.getenv("TRANSLATION_OVERLOAD_BACKOFF", "5"))
+
+# 共通の翻訳指示をプロバイダーのキャッシュ機能で再利用する（Anthropicのcache_control、
+# Geminiのキャッシュコンテキスト。OpenAIは自動のプレフィックスキャッシュ）
+PROMPT_CACHE_ENABLED = os.getenv("PROMPT_CACHE_ENABLED", "true").lower() == "true"
+PROMPT_CACHE_TTL_SECONDS = int(os.getenv("PROMPT_CACHE_TTL_SECONDS", "3600"))  # Geminiのキャッシュの保持時間
+
+# 翻訳の応答をストリーミングで受け取り、見出しごとに逐次解析する
+# 形式から外れた応答は生成の途中で打ち切り、TRANSLATION_FORMAT_RETRIES回まで再試行する
+TRANSLATION_STREAMING_ENABLED = os.getenv("TRANSLATION_STREAMING_ENABLED", "true").lower() == "true"
+TRANSLATION_FORMAT_RETRIES = int(os.getenv("TRANSLATION_FORMAT_RETRIES", "1"))
+
+# 翻訳前にフィードのHTMLを段落単位のテキストに変換する（プロンプトのトークン数を削減）
+CONTENT_CLEANING_ENABLED = os.getenv("CONTENT_CLEANING_ENABLED", "true").lower() == "true"
+
+# 長い記事を段落単位のチャンクに分割して並列に翻訳する（出力上限による切り捨てを防ぐ）
+TRANSLATION_CHUNKING_ENABLED = os.getenv("TRANSLATION_CHUNKING_ENABLED", "true").lower() == "true"
+# 1チャンクあたりの最大文字数（モデルの出力上限に収まる長さ）
+TRANSLATION_CHUNK_CHARS = {
+    TranslationAPI.GEMINI.value: 12000,
+    TranslationAPI.OPENAI.value: 16000,
+    TranslationAPI.ANTHROPIC.value: 6000,
+}
+# 長い記事のタイトル・要約生成に渡す本文の最大文字数
+SUMMARY_INPUT_CHARS = 20000
+
+# 翻訳結果のキャッシュ（投稿失敗などで再実行した場合に再翻訳しない）
+TRANSLATION_CACHE_ENABLED = os.getenv("TRANSLATION_CACHE_ENABLED", "true").lower() == "true"
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "1000"))
+TRANSLATION_CACHE_MAX_AGE_DAYS = int(os.getenv("TRANSLATION_CACHE_MAX_AGE_DAYS", "30"))
+
+# 段落単位の翻訳メモリ（著者紹介や出典など、記事をまたいで繰り返される段落の翻訳を再利用）
+# 有効な場合、本文は番号付きの目印を付けた段落単位で翻訳し、目印で対応を確認できた段落だけを記憶する
+TRANSLATION_MEMORY_ENABLED = os.getenv("TRANSLATION_MEMORY_ENABLED", "true").lower() == "true"
+TRANSLATION_MEMORY_MIN_CHARS = 40  # これより短い段落は対象外
+TRANSLATION_MEMORY_MAX_ENTRIES = int(os.getenv("TRANSLATION_MEMORY_MAX_ENTRIES", "20000"))
+
+# プロバイダーのバッチAPIで翻訳する（記事をまとめて1つのジョブとして送信し、結果は次回の実行で回収する）
+# 結果は翻訳キャッシュに保存するため、翻訳キャッシュの有効化が必要
+TRANSLATION_BATCH_ENABLED = os.getenv("TRANSLATION_BATCH_ENABLED", "false").lower() == "true"
+# 送信後にこの秒数まで結果を待つ（0の場合は待たずに次回の実行で回収）
+TRANSLATION_BATCH_WAIT_SECONDS = float(os.getenv("TRANSLATION_BATCH_WAIT_SECONDS", "0"))
+TRANSLATION_BATCH_POLL_INTERVAL = float(os.getenv("TRANSLATION_BATCH_POLL_INTERVAL", "60"))
+# この時間を過ぎても完了しないジョブは諦め、記事を通常の翻訳で処理する
+TRANSLATION_BATCH_MAX_AGE_HOURS = float(os.getenv("TRANSLATION_BATCH_MAX_AGE_HOURS", "26"))
+
+# 翻訳APIのエンドポイント（バッチAPIで使用）
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+ANTHROPIC_BASE_URL = os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com/v1")
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL", "https://generativelanguage.googleapis.com/v1beta")
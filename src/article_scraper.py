@@ -1,23 +1,102 @@
-import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+import codecs
 import logging
+import re
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from urllib.parse import urlparse
+import config
+from src.db import ArticleDatabase
+from src.http_client import HttpClient, get_http_client
+from src.page_cache import PageCache
+from src.rate_limiter import DomainRateLimiter, parse_retry_after
 
 logger = logging.getLogger(__name__)
 
+# 高速なlxmlのパーサーを使う（インストールされていない環境ではhtml.parserで動かす）
+try:
+    import lxml  # noqa: F401
+    FAST_PARSER = 'lxml'
+except ImportError:
+    FAST_PARSER = 'html.parser'
+
+# ストリーミング取得で受け付けるContent-Type
+HTML_CONTENT_TYPES = ('text/html', 'application/xhtml+xml')
+# 記事コンテナの終了タグ（読み込みを打ち切る目印）
+STOP_MARKERS = tuple(marker.lower().encode('ascii') for marker in config.SCRAPE_STOP_MARKERS)
+CHARSET_PATTERN = re.compile(rb'charset=["\']?([A-Za-z0-9_\-]+)', re.IGNORECASE)
+
+# 本文の候補はすべて<body>内にあるため、<head>（スクリプト・スタイル等）は木を構築しない
+BODY_STRAINER = SoupStrainer('body')
+
+
+def _has_class(tag: Tag, *names: str) -> bool:
+    classes = tag.get('class') or []
+    return any(name in classes for name in names)
+
+
+# 従来のCSSセレクタと同じ条件を、1回の木の走査で判定するための述語
+def _is_medium_container(tag: Tag) -> bool:
+    # 'article'
+    return tag.name == 'article'
+
+
+def _is_wordpress_container(tag: Tag) -> bool:
+    # '.entry-content, .post-content, .content, article'
+    return tag.name == 'article' or _has_class(tag, 'entry-content', 'post-content', 'content')
+
+
+def _is_generic_container(tag: Tag) -> bool:
+    # 'article, .article, .post, .entry, .content, [itemprop="articleBody"]'
+    return (tag.name == 'article'
+            or _has_class(tag, 'article', 'post', 'entry', 'content')
+            or tag.get('itemprop') == 'articleBody')
+
+
+def _is_main_container(tag: Tag) -> bool:
+    # 'main, #main, .main, #content, .content'
+    return tag.name == 'main' or tag.get('id') in ('main', 'content') or _has_class(tag, 'main', 'content')
+
+
+# 本文コンテナのセレクタ（名前 → (CSSセレクタ, 同じ条件の述語)）
+# 学習済みの抽出ルールはこの名前でデータベースに保存される
+EXTRACTION_SELECTORS = {
+    'medium': ('article', _is_medium_container),
+    'wordpress': ('.entry-content, .post-content, .content, article', _is_wordpress_container),
+    'generic': ('article, .article, .post, .entry, .content, [itemprop="articleBody"]', _is_generic_container),
+    'main': ('main, #main, .main, #content, .content', _is_main_container),
+}
+
+
+def _join_paragraphs(container) -> str:
+    return '\n\n'.join([p.get_text() for p in container.find_all('p')])
+
+
 class ArticleScraper:
-    def __init__(self, headers=None):
+    def __init__(self, headers=None, rate_limiter: Optional[DomainRateLimiter] = None,
+                 http_client: Optional[HttpClient] = None, page_cache: Optional[PageCache] = None,
+                 extraction_mode: Optional[str] = None, db: Optional[ArticleDatabase] = None):
         """
         記事スクレイピング用のクラス
         
         Args:
             headers: リクエストヘッダー（任意）
+            rate_limiter: ドメインごとのレートリミッター（任意）
+            http_client: HTTPクライアント（任意、省略時は共有クライアント）
+            page_cache: 取得したページのキャッシュ（任意、省略時はconfig.PAGE_CACHE_ENABLEDに従う）
+            extraction_mode: 本文抽出方式（'fast' または 'legacy'、省略時はconfig.SCRAPE_EXTRACTION_MODE）
+            db: ドメインごとの抽出ルールを学習・保存するデータベース（任意）
         """
         self.headers = headers or {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
         }
+        self.http_client = http_client or get_http_client()
+        self.rate_limiter = rate_limiter or DomainRateLimiter(http_client=self.http_client)
+        self.page_cache = page_cache if page_cache is not None else (PageCache() if config.PAGE_CACHE_ENABLED else None)
+        self.extraction_mode = extraction_mode or config.SCRAPE_EXTRACTION_MODE
+        self.db = db
+        if self.extraction_mode == 'fast' and FAST_PARSER != 'lxml':
+            logger.warning("lxml is not installed, fast extraction mode falls back to the slower html.parser")
     
     def get_full_content(self, article: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -69,49 +148,287 @@ class ArticleScraper:
         Returns:
             記事の本文テキスト、取得できない場合はNone
         """
-        # サイトに負荷をかけないよう少し待機
-        time.sleep(2)
+        # 前回取得したページがキャッシュにあれば、取得と解析を省略する
+        if self.page_cache:
+            cached = self.page_cache.get(url)
+            if cached:
+                if cached.get('text'):
+                    logger.info(f"ページキャッシュから本文を取得: {url}")
+                    return cached['text']
+                logger.info(f"ページキャッシュのHTMLから本文を再抽出: {url}")
+                content = self._extract_content(cached['html'], domain)
+                if content:
+                    self.page_cache.put(url, cached['html'], content)
+                return content
+        
+        # サイトに負荷をかけないよう、ドメインごとの間隔を空けてリクエスト
+        self.rate_limiter.acquire(url)
+        
+        html = self._download(url)
+        if html is None:
+            return None
+        
+        content = self._extract_content(html, domain)
+        
+        if self.page_cache:
+            self.page_cache.put(url, html, content)
+        
+        return content
+    
+    def _download(self, url: str) -> Optional[str]:
+        """
+        ページをストリーミングで取得
         
-        response = requests.get(url, headers=self.headers, timeout=10)
-        response.raise_for_status()
+        HTML以外のContent-Typeは読み込まずに中断し、本文はconfig.SCRAPE_MAX_BYTESまでしか
+        読み込まない。記事コンテナの終了タグ（config.SCRAPE_STOP_MARKERS）を読み込んだ時点、
+        または読み込み時間がconfig.SCRAPE_READ_DEADLINEを超えた時点でも読み込みを打ち切る。
         
-        soup = BeautifulSoup(response.text, 'html.parser')
+        Args:
+            url: 記事のURL
+            
+        Returns:
+            ページのHTML、HTMLでない場合はNone
+        """
+        response = self.http_client.scrape_get(url, headers=self.headers, timeout=10, stream=True)
+        try:
+            if response.status_code in (429, 503):
+                self.rate_limiter.penalize(url, parse_retry_after(response.headers.get('Retry-After')))
+            response.raise_for_status()
+            
+            content_type = response.headers.get('Content-Type', '')
+            if content_type and not any(t in content_type.lower() for t in HTML_CONTENT_TYPES):
+                logger.warning(f"HTMLではないため取得を中止: {url} ({content_type})")
+                return None
+            
+            body = bytearray()
+            deadline = time.monotonic() + config.SCRAPE_READ_DEADLINE
+            overlap = max((len(marker) for marker in STOP_MARKERS), default=0)
+            
+            for chunk in response.iter_content(chunk_size=16 * 1024):
+                # 終了タグがチャンクの境界をまたぐ場合に備えて、直前の末尾も含めて検索する
+                search_from = max(0, len(body) - overlap)
+                body.extend(chunk)
+                
+                if len(body) >= config.SCRAPE_MAX_BYTES:
+                    logger.warning(f"サイズ上限に達したため読み込みを打ち切りました: {url} ({len(body)} bytes)")
+                    del body[config.SCRAPE_MAX_BYTES:]
+                    break
+                
+                window = bytes(body[search_from:]).lower()
+                if any(marker in window for marker in STOP_MARKERS):
+                    logger.debug(f"記事コンテナの終了を検出したため読み込みを終了: {url}")
+                    break
+                
+                if time.monotonic() > deadline:
+                    logger.warning(f"読み込み時間の上限に達したため打ち切りました: {url}")
+                    break
+            
+            return bytes(body).decode(self._detect_encoding(response, body), errors='replace')
+        finally:
+            response.close()
+    
+    def _detect_encoding(self, response, body: bytes) -> str:
+        """Content-Typeのcharset、<meta charset>の順に文字コードを判定（既定はUTF-8）"""
+        content_type = response.headers.get('Content-Type', '')
+        match = CHARSET_PATTERN.search(content_type.encode('ascii', errors='ignore'))
+        if not match:
+            match = CHARSET_PATTERN.search(bytes(body[:4096]))
+        
+        if match:
+            encoding = match.group(1).decode('ascii', errors='ignore')
+            try:
+                codecs.lookup(encoding)
+                return encoding
+            except LookupError:
+                pass
+        return 'utf-8'
+    
+    def _extract_content(self, html: str, domain: str) -> Optional[str]:
+        """
+        HTMLから記事本文を抽出
+        
+        ドメインに対して学習済みのセレクタがあれば最初に試す。学習済みセレクタで十分な本文が
+        得られない場合はセレクタを順に探索する。学習済みセレクタが連続して失敗した場合は破棄し、
+        探索で十分な本文が得られたセレクタを新たに記録する。
+        高速モードで抽出できなかった場合は、従来の抽出方式で再試行する。
+        
+        Args:
+            html: ページのHTML
+            domain: URLのドメイン
+            
+        Returns:
+            記事の本文テキスト、抽出できない場合はNone
+        """
+        rule = self.db.get_extraction_rule(domain) if self.db else None
+        if rule:
+            try:
+                content = self._extract_with_rule(html, rule['selector'])
+            except Exception as e:
+                logger.warning(f"学習済みセレクタでの抽出に失敗しました: {domain} - {e}")
+                content = None
+            
+            if self._is_acceptable(content):
+                self.db.record_extraction_rule_success(domain, rule['selector'])
+                return content
+            
+            if self.db.record_extraction_rule_failure(domain, config.EXTRACTION_RULE_MAX_FAILURES):
+                logger.info(f"学習済みセレクタを破棄しました: {domain} ({rule['selector']})")
+                rule = None
+        
+        content, selector = None, None
+        if self.extraction_mode == 'fast':
+            try:
+                content, selector = self._extract_content_fast(html, domain)
+            except Exception as e:
+                logger.warning(f"高速抽出に失敗したため従来方式で再試行します: {e}")
+        
+        if not content:
+            content, selector = self._extract_content_legacy(html, domain)
+        
+        # 学習済みセレクタが残っている間は、一時的な失敗で置き換えない
+        if self.db and rule is None and selector and self._is_acceptable(content):
+            self.db.record_extraction_rule_success(domain, selector)
+        
+        return content
+    
+    def _is_acceptable(self, content: Optional[str]) -> bool:
+        """抽出した本文がセレクタを学習するのに十分な長さかどうか"""
+        return bool(content) and len(content) >= config.EXTRACTION_RULE_MIN_CHARS
+    
+    def _extract_with_rule(self, html: str, selector: str) -> Optional[str]:
+        """
+        学習済みのセレクタで本文を抽出
+        
+        Args:
+            html: ページのHTML
+            selector: EXTRACTION_SELECTORSのキー
+            
+        Returns:
+            記事の本文テキスト、抽出できない場合はNone
+        """
+        if selector not in EXTRACTION_SELECTORS:
+            return None
+        
+        if self.extraction_mode == 'fast':
+            soup = BeautifulSoup(html, FAST_PARSER, parse_only=BODY_STRAINER)
+        else:
+            soup = BeautifulSoup(html, 'html.parser')
+        
+        _, matcher = EXTRACTION_SELECTORS[selector]
+        container = soup.find(matcher)
+        if container is None:
+            # ページ全体で代用すると、レイアウトが変わっても失敗として記録されず破棄されない
+            return None
+        
+        return _join_paragraphs(container) or None
+    
+    def _extract_content_fast(self, html: str, domain: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        <body>のみを高速パーサーで構築し、1回の走査で本文コンテナを特定して抽出
+        
+        判定順序と結果は _extract_content_legacy と同じになるようにしている。
+        
+        Args:
+            html: ページのHTML
+            domain: URLのドメイン
+            
+        Returns:
+            (記事の本文テキスト, 使用したセレクタ名)のタプル。抽出できない場合は(None, None)
+        """
+        soup = BeautifulSoup(html, FAST_PARSER, parse_only=BODY_STRAINER)
+        
+        is_medium = 'medium.com' in domain
+        is_wordpress = not is_medium and any(wp_term in domain for wp_term in ['wordpress', 'wp.com'])
+        
+        # 各セレクタに最初に一致する要素（文書順）を1回の走査で記録する
+        names = ['generic', 'main']
+        if is_medium:
+            names.append('medium')
+        elif is_wordpress:
+            names.append('wordpress')
+        matchers = {name: EXTRACTION_SELECTORS[name][1] for name in names}
+        
+        first = {}
+        for tag in soup.descendants:
+            if not isinstance(tag, Tag):
+                continue
+            for name, matcher in matchers.items():
+                if name not in first and matcher(tag):
+                    first[name] = tag
+            if len(first) == len(matchers):
+                break
+        
+        # サイトタイプ別のコンテナ → 一般的な記事コンテナの順に試す
+        for name in ('medium', 'wordpress', 'generic'):
+            if name in first:
+                content = _join_paragraphs(first[name])
+                if content:
+                    return content, name
+        
+        # ページ内のすべての段落（ヘッダーとフッターを避ける）
+        # mainの要素がなくページ全体から取得した場合はセレクタを学習しない（セレクタ名はNone）
+        content = _join_paragraphs(first.get('main', soup))
+        if content:
+            return content, 'main' if 'main' in first else None
+        
+        return None, None
+    
+    def _extract_content_legacy(self, html: str, domain: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        html.parserでページ全体を構築し、CSSセレクタで本文を抽出（従来方式）
+        
+        Args:
+            html: ページのHTML
+            domain: URLのドメイン
+            
+        Returns:
+            (記事の本文テキスト, 使用したセレクタ名)のタプル。抽出できない場合は(None, None)
+        """
+        soup = BeautifulSoup(html, 'html.parser')
         
         # サイトタイプに応じた本文抽出ロジック
         content = None
+        selector = None
         
         # Medium系のブログ
         if 'medium.com' in domain:
-            article_tags = soup.select('article')
+            article_tags = soup.select(EXTRACTION_SELECTORS['medium'][0])
             if article_tags:
                 # セクション内のテキストを抽出
                 paragraphs = article_tags[0].select('p')
                 content = '\n\n'.join([p.get_text() for p in paragraphs])
+                selector = 'medium'
         
         # WordPress系のブログ
         elif any(wp_term in domain for wp_term in ['wordpress', 'wp.com']):
-            content_div = soup.select('.entry-content, .post-content, .content, article')
+            content_div = soup.select(EXTRACTION_SELECTORS['wordpress'][0])
             if content_div:
                 paragraphs = content_div[0].select('p')
                 content = '\n\n'.join([p.get_text() for p in paragraphs])
+                selector = 'wordpress'
         
         # 一般的な記事ページの検出方法
         if not content:
             # 一般的な記事コンテナの検出
-            article_containers = soup.select('article, .article, .post, .entry, .content, [itemprop="articleBody"]')
+            article_containers = soup.select(EXTRACTION_SELECTORS['generic'][0])
             if article_containers:
                 paragraphs = article_containers[0].select('p')
                 content = '\n\n'.join([p.get_text() for p in paragraphs])
+                selector = 'generic'
             
             # 一般的な方法でも取得できない場合、ページ内のすべての段落を取得
             if not content:
                 # ヘッダーとフッターを避ける
-                main_content = soup.select('main, #main, .main, #content, .content')
+                main_content = soup.select(EXTRACTION_SELECTORS['main'][0])
                 target = main_content[0] if main_content else soup
                 
                 # すべての段落を取得
                 paragraphs = target.select('p')
                 if paragraphs:
                     content = '\n\n'.join([p.get_text() for p in paragraphs])
+                    # ページ全体から取得した場合はセレクタを学習しない
+                    selector = 'main' if main_content else None
         
-        return content
\ No newline at end of file
+        if not content:
+            return None, None
+        return content, selector
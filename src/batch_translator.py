@@ -0,0 +1,408 @@
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Tuple, Optional
+import config
+from src.http_client import get_http_client
+from src.translator import (TranslationCache, ARTICLE_INSTRUCTIONS, ARTICLE_INPUT, SYSTEM_PROMPT,
+                            needs_chunking, parse_article_response)
+
+logger = logging.getLogger(__name__)
+
+# バッチジョブの状態（batch_jobsテーブルのstatus）
+JOB_SUBMITTED = "submitted"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+
+class BatchClient:
+    def __init__(self, model: str, api_key: str, base_url: str, http_client=None, timeout: float = 60):
+        """
+        プロバイダーのバッチAPIクライアントの基底クラス
+
+        Args:
+            model: 使用するモデル名
+            api_key: APIキー
+            base_url: APIのベースURL（テストではローカルの代替サーバーを指定する）
+            http_client: HTTPクライアント（省略時は共有クライアント）
+            timeout: リクエストのタイムアウト（秒）
+        """
+        self.model = model
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.http_client = http_client or get_http_client()
+        self.timeout = timeout
+
+    def submit(self, requests: List[Tuple[str, str]], instructions: str) -> str:
+        """
+        プロンプトをまとめて1つのバッチジョブとして送信（サブクラスで実装）
+
+        Args:
+            requests: (リクエストID, 記事ごとのプロンプト)のリスト
+            instructions: 全リクエストに共通の指示（同期呼び出しと同様にプロンプトの先頭に置く）
+
+        Returns:
+            ジョブID
+        """
+        raise NotImplementedError("Subclasses must implement submit")
+
+    def retrieve(self, job_id: str) -> Tuple[str, Dict[str, str]]:
+        """
+        ジョブの状態と結果を取得（サブクラスで実装）
+
+        Args:
+            job_id: ジョブID
+
+        Returns:
+            (状態, リクエストID → 応答テキストの辞書)のタプル。完了していない場合の結果は空の辞書で、
+            失敗したリクエストは辞書に含まれない
+        """
+        raise NotImplementedError("Subclasses must implement retrieve")
+
+    def _request(self, method: str, path: str, **kwargs):
+        """APIにリクエストを送信し、エラー応答の場合は例外を送出"""
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        response = self.http_client.session.request(method, url, headers=self._headers(),
+                                                    timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def _headers(self) -> Dict[str, str]:
+        return {}
+
+
+class OpenAIBatchClient(BatchClient):
+    """OpenAIのBatch API（JSONLファイルをアップロードしてジョブを作成）"""
+
+    ENDPOINT = "/v1/chat/completions"
+
+    def _headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    def submit(self, requests: List[Tuple[str, str]], instructions: str) -> str:
+        lines = []
+        for custom_id, prompt in requests:
+            lines.append(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": self.ENDPOINT,
+                "body": {
+                    "model": self.model,
+                    "messages": [
+                        {"role": "system", "content": f"{SYSTEM_PROMPT}\n\n{instructions}"},
+                        {"role": "user", "content": prompt}
+                    ],
+                    "temperature": 0.3,
+                },
+            }, ensure_ascii=False))
+        payload = ("\n".join(lines) + "\n").encode("utf-8")
+
+        uploaded = self._request("POST", "/files", data={"purpose": "batch"},
+                                 files={"file": ("batch.jsonl", payload, "application/jsonl")}).json()
+        batch = self._request("POST", "/batches", json={
+            "input_file_id": uploaded["id"],
+            "endpoint": self.ENDPOINT,
+            "completion_window": "24h",
+        }).json()
+        return batch["id"]
+
+    def retrieve(self, job_id: str) -> Tuple[str, Dict[str, str]]:
+        batch = self._request("GET", f"/batches/{job_id}").json()
+        status = batch.get("status")
+        if status not in ("completed", "failed", "expired", "cancelled"):
+            return JOB_SUBMITTED, {}
+
+        # 期限切れ・キャンセルでも完了したリクエストの結果は出力ファイルに含まれる
+        output_file_id = batch.get("output_file_id")
+        if not output_file_id:
+            return JOB_FAILED, {}
+
+        results = {}
+        content = self._request("GET", f"/files/{output_file_id}/content").text
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            response = item.get("response") or {}
+            if response.get("status_code") == 200:
+                try:
+                    results[item["custom_id"]] = response["body"]["choices"][0]["message"]["content"]
+                except (KeyError, IndexError, TypeError):
+                    continue
+        return JOB_COMPLETED, results
+
+
+class AnthropicBatchClient(BatchClient):
+    """AnthropicのMessage Batches API"""
+
+    API_VERSION = "2023-06-01"
+
+    def _headers(self) -> Dict[str, str]:
+        return {"x-api-key": self.api_key, "anthropic-version": self.API_VERSION}
+
+    def submit(self, requests: List[Tuple[str, str]], instructions: str) -> str:
+        system = [
+            {"type": "text", "text": SYSTEM_PROMPT},
+            {"type": "text", "text": instructions, "cache_control": {"type": "ephemeral"}},
+        ]
+        batch = self._request("POST", "/messages/batches", json={
+            "requests": [
+                {
+                    "custom_id": custom_id,
+                    "params": {
+                        "model": self.model,
+                        "max_tokens": 4000,
+                        "temperature": 0.3,
+                        "system": system,
+                        "messages": [{"role": "user", "content": prompt}],
+                    },
+                }
+                for custom_id, prompt in requests
+            ]
+        }).json()
+        return batch["id"]
+
+    def retrieve(self, job_id: str) -> Tuple[str, Dict[str, str]]:
+        batch = self._request("GET", f"/messages/batches/{job_id}").json()
+        if batch.get("processing_status") != "ended":
+            return JOB_SUBMITTED, {}
+        if not batch.get("results_url"):
+            return JOB_FAILED, {}
+
+        results = {}
+        content = self._request("GET", batch["results_url"]).text
+        for line in content.splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            result = item.get("result") or {}
+            if result.get("type") == "succeeded":
+                text = "".join(block.get("text", "") for block in result["message"].get("content", [])
+                               if block.get("type") == "text")
+                results[item["custom_id"]] = text
+        return JOB_COMPLETED, results
+
+
+class GeminiBatchClient(BatchClient):
+    """GeminiのBatch Mode（リクエストをインラインで送信）"""
+
+    def _headers(self) -> Dict[str, str]:
+        return {"x-goog-api-key": self.api_key}
+
+    def submit(self, requests: List[Tuple[str, str]], instructions: str) -> str:
+        operation = self._request("POST", f"/models/{self.model}:batchGenerateContent", json={
+            "batch": {
+                "display_name": "blog-translator",
+                "input_config": {
+                    "requests": {
+                        "requests": [
+                            {
+                                "request": {
+                                    "system_instruction": {"parts": [{"text": instructions}]},
+                                    "contents": [{"role": "user", "parts": [{"text": prompt}]}],
+                                },
+                                "metadata": {"key": custom_id},
+                            }
+                            for custom_id, prompt in requests
+                        ]
+                    }
+                },
+            }
+        }).json()
+        return operation["name"]
+
+    def retrieve(self, job_id: str) -> Tuple[str, Dict[str, str]]:
+        operation = self._request("GET", f"/{job_id}").json()
+        metadata = operation.get("metadata") or {}
+        state = metadata.get("state") or operation.get("state") or ""
+        if not operation.get("done") and not state.endswith(("SUCCEEDED", "FAILED", "CANCELLED", "EXPIRED")):
+            return JOB_SUBMITTED, {}
+
+        output = operation.get("response") or metadata.get("output") or {}
+        responses = (output.get("inlinedResponses") or {}).get("inlinedResponses") or []
+        if not responses:
+            return JOB_FAILED, {}
+
+        results = {}
+        for item in responses:
+            key = (item.get("metadata") or {}).get("key")
+            candidates = (item.get("response") or {}).get("candidates") or []
+            if not key or not candidates:
+                continue
+            parts = (candidates[0].get("content") or {}).get("parts") or []
+            results[key] = "".join(part.get("text", "") for part in parts)
+        return JOB_COMPLETED, results
+
+
+def create_batch_client(provider: str, model: str) -> BatchClient:
+    """
+    プロバイダーに対応するバッチAPIクライアントを返す
+
+    Args:
+        provider: 翻訳APIのプロバイダー名
+        model: 使用するモデル名
+    """
+    if provider == config.TranslationAPI.OPENAI.value:
+        return OpenAIBatchClient(model, config.OPENAI_API_KEY, config.OPENAI_BASE_URL)
+    elif provider == config.TranslationAPI.ANTHROPIC.value:
+        return AnthropicBatchClient(model, config.ANTHROPIC_API_KEY, config.ANTHROPIC_BASE_URL)
+    elif provider == config.TranslationAPI.GEMINI.value:
+        return GeminiBatchClient(model, config.GEMINI_API_KEY, config.GEMINI_BASE_URL)
+    else:
+        raise ValueError(f"Unsupported translation API: {provider}")
+
+
+def _dump_article(article: Dict[str, Any]) -> str:
+    """記事情報をJSON文字列に変換（公開日時はISO形式）"""
+    data = dict(article)
+    if isinstance(data.get("published"), datetime):
+        data["published"] = data["published"].isoformat()
+    return json.dumps(data, ensure_ascii=False)
+
+
+def _load_article(text: str) -> Dict[str, Any]:
+    """_dump_articleで保存した記事情報を復元"""
+    article = json.loads(text)
+    if isinstance(article.get("published"), str):
+        article["published"] = datetime.fromisoformat(article["published"])
+    return article
+
+
+class BatchTranslator:
+    def __init__(self, db, cache: TranslationCache, provider: str, model: str,
+                 client: Optional[BatchClient] = None,
+                 max_age_hours: float = config.TRANSLATION_BATCH_MAX_AGE_HOURS):
+        """
+        プロバイダーのバッチAPIで記事をまとめて翻訳する
+
+        スクレイピング済みの記事を1つのバッチジョブとして送信し、ジョブIDと記事をデータベースに保存する。
+        完了したジョブの結果は翻訳キャッシュに保存するので、回収した記事を通常のパイプラインに
+        渡せばAPIを呼び出さずに投稿できる。結果を取得できなかった記事は通常の翻訳で処理される。
+
+        Args:
+            db: ジョブを保存するArticleDatabase
+            cache: 結果を保存するTranslationCache
+            provider: 翻訳APIのプロバイダー名
+            model: 使用するモデル名
+            client: バッチAPIクライアント（省略時はプロバイダーに応じて作成）
+            max_age_hours: 完了を待つ最長時間（超えたジョブは失敗として扱う）
+        """
+        self.db = db
+        self.cache = cache
+        self.provider = provider
+        self.model = model
+        self.client = client or create_batch_client(provider, model)
+        self.max_age_hours = max_age_hours
+
+    def submit(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        記事をバッチジョブとして送信
+
+        長すぎてチャンク分割が必要な記事、翻訳キャッシュにある記事、送信に失敗した記事は
+        送信せずに返す。既に送信済みのジョブに含まれる記事は送信も返却もしない（collectで回収される）。
+
+        Args:
+            articles: スクレイピング済みの記事のリスト
+
+        Returns:
+            この実行で通常の翻訳を行う記事のリスト
+        """
+        batched_keys = self.db.get_batch_keys()
+        direct = []
+        items = []
+        for article in articles:
+            key = TranslationCache.make_key(article, self.provider, self.model)
+            if key in batched_keys:
+                logger.info(f"Article is already in a batch job: {article['link']}")
+                continue
+            if needs_chunking(article, self.provider) or self.db.get_cached_translation(key):
+                direct.append(article)
+                continue
+            items.append((key, article))
+
+        if not items:
+            return direct
+
+        prompts = [(key, ARTICLE_INPUT.format(title=article['title'], content=article['content']))
+                   for key, article in items]
+        try:
+            job_id = self.client.submit(prompts, ARTICLE_INSTRUCTIONS)
+        except Exception as e:
+            logger.error(f"Failed to submit {self.provider} batch job, translating directly: {e}")
+            return direct + [article for _, article in items]
+
+        self.db.save_batch_job(job_id, self.provider, self.model,
+                               [(key, article['link'], _dump_article(article)) for key, article in items])
+        logger.info(f"Submitted {self.provider} batch job {job_id} with {len(items)} articles")
+        return direct
+
+    def collect(self, wait_seconds: float = 0,
+                poll_interval: float = config.TRANSLATION_BATCH_POLL_INTERVAL) -> List[Dict[str, Any]]:
+        """
+        送信済みのジョブの結果を回収し、投稿できる記事を返す
+
+        Args:
+            wait_seconds: 未完了のジョブがある場合に完了を待つ最長秒数（0の場合は待たない）
+            poll_interval: ジョブの状態を確認する間隔（秒）
+
+        Returns:
+            結果を回収したジョブ（失敗したジョブを含む）の未処理の記事のリスト
+        """
+        deadline = time.monotonic() + wait_seconds
+        while True:
+            running = [job for job in self.db.get_batch_jobs(self.provider, [JOB_SUBMITTED])
+                       if not self._check_job(job)]
+            if not running or time.monotonic() + poll_interval > deadline:
+                break
+            logger.info(f"Waiting for {len(running)} {self.provider} batch jobs...")
+            time.sleep(poll_interval)
+
+        ready = []
+        for job in self.db.get_batch_jobs(self.provider, [JOB_COMPLETED, JOB_FAILED]):
+            items = self.db.get_batch_items(job["job_id"])
+            unprocessed = set(self.db.filter_unprocessed([item["article_url"] for item in items]))
+            articles = [_load_article(item["article"]) for item in items if item["article_url"] in unprocessed]
+            if not articles:
+                # 全記事の処理が終わったジョブは削除
+                self.db.delete_batch_job(job["job_id"])
+                continue
+            ready.extend(articles)
+        return ready
+
+    def _check_job(self, job: Dict[str, Any]) -> bool:
+        """
+        ジョブの状態を確認し、完了していれば結果を翻訳キャッシュに保存
+
+        Returns:
+            ジョブが終了した（完了・失敗・期限切れ）場合はTrue
+        """
+        job_id = job["job_id"]
+        try:
+            status, results = self.client.retrieve(job_id)
+        except Exception as e:
+            logger.warning(f"Could not check {self.provider} batch job {job_id}: {e}")
+            return False
+
+        if status == JOB_SUBMITTED:
+            submitted = datetime.fromisoformat(job["submitted_date"])
+            if datetime.now() - submitted < timedelta(hours=self.max_age_hours):
+                return False
+            logger.warning(f"Batch job {job_id} did not finish in {self.max_age_hours} hours, translating directly")
+            status = JOB_FAILED
+
+        if status == JOB_COMPLETED:
+            items = self.db.get_batch_items(job_id)
+            saved = 0
+            for item in items:
+                text = results.get(item["cache_key"])
+                result = parse_article_response(text) if text else None
+                if result:
+                    self.cache.put(item["cache_key"], self.provider, job["model"], result)
+                    saved += 1
+            logger.info(f"Collected {self.provider} batch job {job_id}: {saved}/{len(items)} articles translated")
+        else:
+            logger.warning(f"Batch job {job_id} failed, translating its articles directly")
+
+        self.db.update_batch_job_status(job_id, status)
+        return True
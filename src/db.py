@@ -1,11 +1,53 @@
 import sqlite3
-from datetime import datetime
-from typing import List, Dict, Any, Optional
+import json
+import zlib
+from datetime import datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 import os
+import threading
 
 logger = logging.getLogger(__name__)
 
+# 接続ごとにキャッシュする準備済みSQL文の数
+STATEMENT_CACHE_SIZE = 256
+# 一括照会のIN句に含める値の数の上限（SQLiteの変数の数の上限より小さくする）
+BULK_QUERY_CHUNK = 500
+
+# article_jobsの記事の状態（discovered → scraped → translated → posting → posted の順に進む）
+ARTICLE_DISCOVERED = "discovered"
+ARTICLE_SCRAPED = "scraped"
+ARTICLE_TRANSLATED = "translated"
+ARTICLE_POSTING = "posting"  # WordPressへの投稿を開始した（投稿されたかどうかは未確認）
+ARTICLE_DRAFTED = "drafted"  # WordPressに下書きを作成した（wp_post_idを公開する）
+ARTICLE_POSTED = "posted"
+ARTICLE_FAILED = "failed"  # 失敗が続いたため再開しない
+ARTICLE_DUPLICATE = "duplicate"  # 別の記事の重複として除外した（元の記事がfailedになった場合は再開する）
+
+# article_fingerprintsのSimHashの帯の数
+FINGERPRINT_BANDS = 4
+
+
+def _to_signed64(value: int) -> int:
+    """64ビットの符号なし整数をSQLiteのINTEGERに保存できる符号付き整数に変換"""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _pack_article(article: Dict[str, Any]) -> bytes:
+    """記事情報を圧縮したJSONに変換（公開日時はISO形式）"""
+    data = dict(article)
+    if isinstance(data.get("published"), datetime):
+        data["published"] = data["published"].isoformat()
+    return zlib.compress(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+
+def _unpack_article(blob: bytes) -> Dict[str, Any]:
+    """_pack_articleで保存した記事情報を復元"""
+    article = json.loads(zlib.decompress(blob).decode("utf-8"))
+    if isinstance(article.get("published"), str):
+        article["published"] = datetime.fromisoformat(article["published"])
+    return article
+
 class ArticleDatabase:
     def __init__(self, db_path="processed_articles.db"):
         """
@@ -15,12 +57,47 @@ class ArticleDatabase:
             db_path: SQLiteデータベースファイルのパス
         """
         self.db_path = db_path
+        # スレッドごとに1つの接続を保持して使い回す
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
         self._initialize_db()
         logger.info(f"Initialized article database: {db_path}")
     
+    def _connect(self) -> sqlite3.Connection:
+        """
+        呼び出し元のスレッドの接続を返す（初回は接続を作成して保持する）
+        
+        sqlite3の接続はSQL文の準備結果をキャッシュするため、同じ接続を使い続けることで
+        メソッドごとの接続の確立とSQL文の解析を省ける。
+        
+        Returns:
+            このスレッド専用の接続
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # closeは別のスレッドから呼ばれるため、スレッドの確認は無効にする（使用は作成したスレッドのみ）
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False,
+                                   cached_statements=STATEMENT_CACHE_SIZE)  # タイムアウトを30秒に設定
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+    
+    def close(self) -> None:
+        """全スレッドの接続を閉じる（以後の呼び出しでは新しい接続を作成する）"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"SQLite error when closing connection: {e}")
+        self._local = threading.local()
+    
     def _initialize_db(self):
         """データベースとテーブルの初期化"""
-        conn = sqlite3.connect(self.db_path, timeout=30)  # タイムアウトを30秒に設定
+        conn = self._connect()
         c = conn.cursor()
         
         try:
@@ -46,12 +123,121 @@ class ArticleDatabase:
             )
             ''')
             
+            # feed_cacheテーブルを作成（条件付きGET用のバリデータとフィード本文のハッシュ）
+            c.execute('''
+            CREATE TABLE IF NOT EXISTS feed_cache (
+                feed_url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                updated_date TEXT
+            )
+            ''')
+            
+            # extraction_rulesテーブルを作成（ドメインごとに本文抽出に成功したセレクタ）
+            c.execute('''
+            CREATE TABLE IF NOT EXISTS extraction_rules (
+                domain TEXT PRIMARY KEY,
+                selector TEXT,
+                success_count INTEGER DEFAULT 0,
+                failure_count INTEGER DEFAULT 0,
+                updated_date TEXT
+            )
+            ''')
+            
+            # translation_cacheテーブルを作成（記事内容・プロバイダー・モデル・プロンプト版ごとの翻訳結果）
+            c.execute('''
+            CREATE TABLE IF NOT EXISTS translation_cache (
+                cache_key TEXT PRIMARY KEY,
+                provider TEXT,
+                model TEXT,
+                prompt_version TEXT,
+                translated_title TEXT,
+                summary TEXT,
+                translation TEXT,
+                created_date TEXT,
+                last_access_date TEXT,
+                hit_count INTEGER DEFAULT 0
+            )
+            ''')
+            
+            # translation_memoryテーブルを作成（段落単位の翻訳メモリ）
+            c.execute('''
+            CREATE TABLE IF NOT EXISTS translation_memory (
+                source_hash TEXT PRIMARY KEY,
+                source_text TEXT,
+                translation TEXT,
+                provider TEXT,
+                model TEXT,
+                hit_count INTEGER DEFAULT 0,
+                created_date TEXT,
+                last_used_date TEXT
+            )
+            ''')
+            
+            # batch_jobsテーブルを作成（プロバイダーのバッチAPIに送信した翻訳ジョブ）
+            c.execute('''
+            CREATE TABLE IF NOT EXISTS batch_jobs (
+                job_id TEXT PRIMARY KEY,
+                provider TEXT,
+                model TEXT,
+                status TEXT,
+                submitted_date TEXT,
+                updated_date TEXT
+            )
+            ''')
+            
+            # batch_itemsテーブルを作成（ジョブに含まれる記事と翻訳キャッシュのキー）
+            c.execute('''
+            CREATE TABLE IF NOT EXISTS batch_items (
+                job_id TEXT,
+                cache_key TEXT,
+                article_url TEXT,
+                article TEXT,
+                PRIMARY KEY (job_id, cache_key)
+            )
+            ''')
+            
+            # article_jobsテーブルを作成（記事ごとの処理の状態と途中の結果。中断した実行の再開用）
+            c.execute('''
+            CREATE TABLE IF NOT EXISTS article_jobs (
+                article_url TEXT PRIMARY KEY,
+                blog_name TEXT,
+                state TEXT,
+                article BLOB,
+                result BLOB,
+                wp_post_id INTEGER,
+                attempts INTEGER DEFAULT 0,
+                created_date TEXT,
+                updated_date TEXT
+            )
+            ''')
+            c.execute("CREATE INDEX IF NOT EXISTS idx_article_jobs_state ON article_jobs (state)")
+            
+            # article_fingerprintsテーブルを作成（重複検出用の正規化したURLと本文のSimHash）
+            # SimHashは帯（band0〜band3）ごとに索引を張り、近い指紋の候補を索引検索で取り出す
+            c.execute('''
+            CREATE TABLE IF NOT EXISTS article_fingerprints (
+                article_url TEXT PRIMARY KEY,
+                canonical_url TEXT,
+                simhash INTEGER,
+                band0 INTEGER,
+                band1 INTEGER,
+                band2 INTEGER,
+                band3 INTEGER,
+                blog_name TEXT,
+                duplicate_of TEXT,
+                created_date TEXT
+            )
+            ''')
+            c.execute("CREATE INDEX IF NOT EXISTS idx_fingerprints_canonical_url ON article_fingerprints (canonical_url)")
+            for band in range(FINGERPRINT_BANDS):
+                c.execute(f"CREATE INDEX IF NOT EXISTS idx_fingerprints_band{band} ON article_fingerprints (band{band})")
+            
             conn.commit()
         except sqlite3.Error as e:
             logger.error(f"Error initializing database: {e}")
             conn.rollback()
-        finally:
-            conn.close()
     
     def is_article_processed(self, article_url: str) -> bool:
         """
@@ -63,7 +249,7 @@ class ArticleDatabase:
         Returns:
             処理済みならTrue、そうでなければFalse
         """
-        conn = sqlite3.connect(self.db_path, timeout=30)  # タイムアウトを30秒に設定
+        conn = self._connect()
         c = conn.cursor()
         
         try:
@@ -73,8 +259,35 @@ class ArticleDatabase:
         except sqlite3.Error as e:
             logger.error(f"SQLite error when checking article status: {e}")
             return False  # エラーの場合は未処理と見なして再処理
-        finally:
-            conn.close()
+    
+    def filter_unprocessed(self, article_urls: List[str]) -> List[str]:
+        """
+        未処理の記事のURLだけを返す（1回のトランザクションでまとめて照会）
+        
+        Args:
+            article_urls: 記事のURLのリスト
+        
+        Returns:
+            未処理の記事のURLのリスト（入力と同じ順序）
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        processed = set()
+        try:
+            c.execute("BEGIN")
+            unique_urls = list(dict.fromkeys(article_urls))
+            for i in range(0, len(unique_urls), BULK_QUERY_CHUNK):
+                chunk = unique_urls[i:i + BULK_QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                c.execute(f"SELECT article_url FROM processed_articles WHERE article_url IN ({placeholders})", chunk)
+                processed.update(row[0] for row in c.fetchall())
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when checking article status: {e}")
+            conn.rollback()
+            return list(article_urls)  # エラーの場合は未処理と見なして再処理
+        return [url for url in article_urls if url not in processed]
     
     def mark_article_processed(self, article_url: str, blog_name: str, wp_post_id: int) -> None:
         """
@@ -85,22 +298,33 @@ class ArticleDatabase:
             blog_name: ブログ名
             wp_post_id: WordPress投稿ID
         """
-        conn = sqlite3.connect(self.db_path, timeout=30)  # タイムアウトを30秒に設定
+        self.mark_many_processed([(article_url, blog_name, wp_post_id)])
+        logger.info(f"Marked article as processed: {article_url}, wp_post_id: {wp_post_id}")
+    
+    def mark_many_processed(self, rows: List[Tuple[str, str, int]]) -> None:
+        """
+        複数の記事を1回のトランザクションで処理済みとしてマーク
+        
+        Args:
+            rows: (記事のURL, ブログ名, WordPress投稿ID)のリスト
+        """
+        if not rows:
+            return
+        conn = self._connect()
         c = conn.cursor()
         
         now = datetime.now().isoformat()
         
-        c.execute(
-            "INSERT OR REPLACE INTO processed_articles (article_url, blog_name, processed_date, wp_post_id) VALUES (?, ?, ?, ?)",
-            (article_url, blog_name, now, wp_post_id)
-        )
-        
         # 最終実行時刻の更新はメイン処理の最後にのみ行う
-        # self.update_last_run_time() は削除
-        
-        conn.commit()
-        conn.close()
-        logger.info(f"Marked article as processed: {article_url}, wp_post_id: {wp_post_id}")
+        try:
+            c.executemany(
+                "INSERT OR REPLACE INTO processed_articles (article_url, blog_name, processed_date, wp_post_id) VALUES (?, ?, ?, ?)",
+                [(article_url, blog_name, now, wp_post_id) for article_url, blog_name, wp_post_id in rows]
+            )
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
     
     def get_processed_articles(self, limit: int = None) -> List[Dict[str, Any]]:
         """
@@ -112,9 +336,9 @@ class ArticleDatabase:
         Returns:
             処理済み記事のリスト
         """
-        conn = sqlite3.connect(self.db_path, timeout=30)  # タイムアウトを30秒に設定
-        conn.row_factory = sqlite3.Row
+        conn = self._connect()
         c = conn.cursor()
+        c.row_factory = sqlite3.Row
         
         try:
             if limit:
@@ -127,8 +351,6 @@ class ArticleDatabase:
         except sqlite3.Error as e:
             logger.error(f"SQLite error when getting processed articles: {e}")
             return []  # エラーの場合は空リストを返す
-        finally:
-            conn.close()
     
     def update_last_run_time(self, custom_time: str = None) -> None:
         """
@@ -137,7 +359,7 @@ class ArticleDatabase:
         Args:
             custom_time: カスタム時刻（Noneの場合は現在時刻）
         """
-        conn = sqlite3.connect(self.db_path, timeout=30)  # タイムアウトを30秒に設定
+        conn = self._connect()
         c = conn.cursor()
         
         now = custom_time or datetime.now().isoformat()
@@ -153,8 +375,6 @@ class ArticleDatabase:
         except sqlite3.Error as e:
             logger.error(f"SQLite error when updating last run time: {e}")
             conn.rollback()
-        finally:
-            conn.close()
     
     def get_last_run_time(self) -> Optional[datetime]:
         """
@@ -163,7 +383,7 @@ class ArticleDatabase:
         Returns:
             最終実行時刻（datetime）、存在しない場合はNone
         """
-        conn = sqlite3.connect(self.db_path, timeout=30)  # タイムアウトを30秒に設定
+        conn = self._connect()
         c = conn.cursor()
         
         try:
@@ -180,8 +400,45 @@ class ArticleDatabase:
         except sqlite3.Error as e:
             logger.error(f"SQLite error when getting last run time: {e}")
             return None
-        finally:
-            conn.close()
+    
+    def get_system_value(self, key: str) -> Optional[str]:
+        """
+        system_infoテーブルの値を取得
+        
+        Args:
+            key: キー
+            
+        Returns:
+            値、存在しない場合はNone
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        try:
+            c.execute("SELECT value FROM system_info WHERE key = ?", (key,))
+            result = c.fetchone()
+            return result[0] if result else None
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when getting system value {key}: {e}")
+            return None
+    
+    def set_system_value(self, key: str, value: str) -> None:
+        """
+        system_infoテーブルに値を保存
+        
+        Args:
+            key: キー
+            value: 値
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        try:
+            c.execute("INSERT OR REPLACE INTO system_info (key, value) VALUES (?, ?)", (key, value))
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when setting system value {key}: {e}")
+            conn.rollback()
     
     def get_last_processed_date(self) -> Optional[datetime]:
         """
@@ -190,7 +447,7 @@ class ArticleDatabase:
         Returns:
             最終処理日時（datetime）、記事がない場合はNone
         """
-        conn = sqlite3.connect(self.db_path, timeout=30)  # タイムアウトを30秒に設定
+        conn = self._connect()
         c = conn.cursor()
         
         try:
@@ -207,5 +464,876 @@ class ArticleDatabase:
         except sqlite3.Error as e:
             logger.error(f"SQLite error when getting last processed date: {e}")
             return None
-        finally:
-            conn.close()
\ No newline at end of file
+    
+    def get_feed_cache(self, feed_url: str) -> Optional[Dict[str, Any]]:
+        """
+        フィードのキャッシュ情報（ETag, Last-Modified, 本文ハッシュ）を取得
+        
+        Args:
+            feed_url: フィードのURL
+            
+        Returns:
+            キャッシュ情報の辞書（etag, last_modified, content_hash, updated_date）、存在しない場合はNone
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        c.row_factory = sqlite3.Row
+        
+        try:
+            c.execute(
+                "SELECT etag, last_modified, content_hash, updated_date FROM feed_cache WHERE feed_url = ?",
+                (feed_url,)
+            )
+            row = c.fetchone()
+            return dict(row) if row else None
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when getting feed cache: {e}")
+            return None  # エラーの場合はキャッシュなしとして全件取得
+    
+    def update_feed_cache(self, feed_url: str, etag: Optional[str], last_modified: Optional[str], content_hash: Optional[str]) -> None:
+        """
+        フィードのキャッシュ情報を更新
+        
+        Args:
+            feed_url: フィードのURL
+            etag: レスポンスのETagヘッダー
+            last_modified: レスポンスのLast-Modifiedヘッダー
+            content_hash: フィード本文のハッシュ
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        
+        try:
+            c.execute(
+                "INSERT OR REPLACE INTO feed_cache (feed_url, etag, last_modified, content_hash, updated_date) VALUES (?, ?, ?, ?, ?)",
+                (feed_url, etag, last_modified, content_hash, now)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when updating feed cache: {e}")
+            conn.rollback()
+    
+    def get_extraction_rule(self, domain: str) -> Optional[Dict[str, Any]]:
+        """
+        ドメインの学習済み抽出ルールを取得
+        
+        Args:
+            domain: 記事URLのドメイン
+            
+        Returns:
+            抽出ルールの辞書（selector, success_count, failure_count）、存在しない場合はNone
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        c.row_factory = sqlite3.Row
+        
+        try:
+            c.execute(
+                "SELECT selector, success_count, failure_count FROM extraction_rules WHERE domain = ?",
+                (domain,)
+            )
+            row = c.fetchone()
+            return dict(row) if row else None
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when getting extraction rule: {e}")
+            return None
+    
+    def record_extraction_rule_success(self, domain: str, selector: str) -> None:
+        """
+        セレクタで本文を抽出できたことを記録（失敗回数はリセット）
+        
+        Args:
+            domain: 記事URLのドメイン
+            selector: 本文の抽出に成功したセレクタ名
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        
+        try:
+            c.execute(
+                """
+                INSERT INTO extraction_rules (domain, selector, success_count, failure_count, updated_date)
+                VALUES (?, ?, 1, 0, ?)
+                ON CONFLICT(domain) DO UPDATE SET
+                    success_count = CASE WHEN selector = excluded.selector THEN success_count + 1 ELSE 1 END,
+                    selector = excluded.selector,
+                    failure_count = 0,
+                    updated_date = excluded.updated_date
+                """,
+                (domain, selector, now)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when recording extraction rule: {e}")
+            conn.rollback()
+    
+    def record_extraction_rule_failure(self, domain: str, max_failures: int) -> bool:
+        """
+        学習済みセレクタで本文を抽出できなかったことを記録
+        
+        連続失敗回数がmax_failuresに達した場合はルールを削除する。
+        
+        Args:
+            domain: 記事URLのドメイン
+            max_failures: ルールを削除する連続失敗回数
+            
+        Returns:
+            ルールを削除した場合はTrue
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        
+        try:
+            c.execute(
+                "UPDATE extraction_rules SET failure_count = failure_count + 1, updated_date = ? WHERE domain = ?",
+                (now, domain)
+            )
+            c.execute(
+                "DELETE FROM extraction_rules WHERE domain = ? AND failure_count >= ?",
+                (domain, max_failures)
+            )
+            dropped = c.rowcount > 0
+            conn.commit()
+            return dropped
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when recording extraction rule failure: {e}")
+            conn.rollback()
+            return False
+    
+    def get_cached_translation(self, cache_key: str) -> Optional[Tuple[str, str, str]]:
+        """
+        キャッシュされた翻訳結果を取得（最終アクセス日時とヒット数を更新）
+        
+        Args:
+            cache_key: 翻訳キャッシュのキー
+            
+        Returns:
+            (翻訳タイトル, 要約, 翻訳本文)のタプル、存在しない場合はNone
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        
+        try:
+            c.execute(
+                "SELECT translated_title, summary, translation FROM translation_cache WHERE cache_key = ?",
+                (cache_key,)
+            )
+            row = c.fetchone()
+            if not row:
+                return None
+            
+            c.execute(
+                "UPDATE translation_cache SET last_access_date = ?, hit_count = hit_count + 1 WHERE cache_key = ?",
+                (now, cache_key)
+            )
+            conn.commit()
+            return tuple(row)
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when getting cached translation: {e}")
+            return None  # エラーの場合はキャッシュなしとして翻訳する
+    
+    def save_cached_translation(self, cache_key: str, provider: str, model: str, prompt_version: str,
+                                result: Tuple[str, str, str]) -> None:
+        """
+        翻訳結果をキャッシュに保存
+        
+        Args:
+            cache_key: 翻訳キャッシュのキー
+            provider: 翻訳APIのプロバイダー名
+            model: 使用したモデル名
+            prompt_version: プロンプトのバージョン
+            result: (翻訳タイトル, 要約, 翻訳本文)のタプル
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        translated_title, summary, translation = result
+        
+        try:
+            c.execute(
+                """
+                INSERT OR REPLACE INTO translation_cache
+                    (cache_key, provider, model, prompt_version, translated_title, summary, translation,
+                     created_date, last_access_date, hit_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)
+                """,
+                (cache_key, provider, model, prompt_version, translated_title, summary, translation, now, now)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when saving cached translation: {e}")
+            conn.rollback()
+    
+    def evict_translation_cache(self, max_entries: int, max_age_days: Optional[int] = None) -> int:
+        """
+        翻訳キャッシュを整理
+        
+        最終アクセスがmax_age_days日より古いエントリを削除し、残りがmax_entriesを超える場合は
+        最終アクセスの古い順に削除する。
+        
+        Args:
+            max_entries: 保持するエントリ数の上限
+            max_age_days: エントリの保持日数（Noneの場合は日数で削除しない）
+            
+        Returns:
+            削除したエントリ数
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        removed = 0
+        
+        try:
+            if max_age_days is not None:
+                cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+                c.execute("DELETE FROM translation_cache WHERE last_access_date < ?", (cutoff,))
+                removed += c.rowcount
+            
+            c.execute(
+                """
+                DELETE FROM translation_cache WHERE cache_key IN (
+                    SELECT cache_key FROM translation_cache
+                    ORDER BY last_access_date DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (max_entries,)
+            )
+            removed += c.rowcount
+            
+            conn.commit()
+            return removed
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when evicting translation cache: {e}")
+            conn.rollback()
+            return 0
+    
+    def get_memory_translations(self, source_hashes: List[str]) -> Dict[str, str]:
+        """
+        翻訳メモリから段落の翻訳をまとめて取得（見つかった段落の使用日時とヒット数を更新）
+        
+        Args:
+            source_hashes: 正規化した段落のハッシュのリスト
+            
+        Returns:
+            ハッシュ → 翻訳 の辞書
+        """
+        if not source_hashes:
+            return {}
+        
+        conn = self._connect()
+        c = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        unique_hashes = list(dict.fromkeys(source_hashes))
+        found = {}
+        
+        try:
+            # SQLiteのパラメータ数の上限を超えないよう分割して問い合わせる
+            for start in range(0, len(unique_hashes), BULK_QUERY_CHUNK):
+                batch = unique_hashes[start:start + BULK_QUERY_CHUNK]
+                placeholders = ",".join("?" * len(batch))
+                c.execute(
+                    f"SELECT source_hash, translation FROM translation_memory WHERE source_hash IN ({placeholders})",
+                    batch
+                )
+                found.update(dict(c.fetchall()))
+            
+            if found:
+                c.executemany(
+                    "UPDATE translation_memory SET hit_count = hit_count + 1, last_used_date = ? WHERE source_hash = ?",
+                    [(now, source_hash) for source_hash in found]
+                )
+                conn.commit()
+            return found
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when getting translation memory: {e}")
+            return {}
+    
+    def save_memory_translations(self, rows: List[Tuple[str, str, str]], provider: str, model: str) -> None:
+        """
+        段落の翻訳を翻訳メモリに保存
+        
+        Args:
+            rows: (正規化した段落のハッシュ, 原文, 翻訳)のリスト
+            provider: 翻訳APIのプロバイダー名
+            model: 使用したモデル名
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        
+        try:
+            c.executemany(
+                """
+                INSERT OR IGNORE INTO translation_memory
+                    (source_hash, source_text, translation, provider, model, hit_count, created_date, last_used_date)
+                VALUES (?, ?, ?, ?, ?, 0, ?, ?)
+                """,
+                [(source_hash, source, translation, provider, model, now, now) for source_hash, source, translation in rows]
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when saving translation memory: {e}")
+            conn.rollback()
+    
+    def evict_translation_memory(self, max_entries: int) -> int:
+        """
+        翻訳メモリの段落数がmax_entriesを超える場合、最終使用の古い順に削除
+        
+        Args:
+            max_entries: 保持する段落数の上限
+            
+        Returns:
+            削除した段落数
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        try:
+            c.execute(
+                """
+                DELETE FROM translation_memory WHERE source_hash IN (
+                    SELECT source_hash FROM translation_memory
+                    ORDER BY last_used_date DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (max_entries,)
+            )
+            removed = c.rowcount
+            conn.commit()
+            return removed
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when evicting translation memory: {e}")
+            conn.rollback()
+            return 0
+    
+    def save_batch_job(self, job_id: str, provider: str, model: str, items: List[Tuple[str, str, str]]) -> None:
+        """
+        送信したバッチジョブとその記事を保存
+        
+        Args:
+            job_id: プロバイダーが発行したジョブID
+            provider: 翻訳APIのプロバイダー名
+            model: 使用したモデル名
+            items: (翻訳キャッシュのキー, 記事のURL, 記事情報のJSON)のリスト
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        
+        try:
+            c.execute(
+                "INSERT OR REPLACE INTO batch_jobs (job_id, provider, model, status, submitted_date, updated_date) VALUES (?, ?, ?, 'submitted', ?, ?)",
+                (job_id, provider, model, now, now)
+            )
+            c.executemany(
+                "INSERT OR REPLACE INTO batch_items (job_id, cache_key, article_url, article) VALUES (?, ?, ?, ?)",
+                [(job_id, cache_key, article_url, article) for cache_key, article_url, article in items]
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when saving batch job: {e}")
+            conn.rollback()
+    
+    def get_batch_jobs(self, provider: str, statuses: List[str]) -> List[Dict[str, Any]]:
+        """
+        指定した状態のバッチジョブを送信順に取得
+        
+        Args:
+            provider: 翻訳APIのプロバイダー名
+            statuses: 取得するジョブの状態のリスト
+            
+        Returns:
+            job_id, model, status, submitted_date を含む辞書のリスト
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        try:
+            placeholders = ",".join("?" * len(statuses))
+            c.execute(
+                f"SELECT job_id, model, status, submitted_date FROM batch_jobs WHERE provider = ? AND status IN ({placeholders}) ORDER BY submitted_date",
+                [provider] + list(statuses)
+            )
+            return [
+                {"job_id": row[0], "model": row[1], "status": row[2], "submitted_date": row[3]}
+                for row in c.fetchall()
+            ]
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when getting batch jobs: {e}")
+            return []
+    
+    def update_batch_job_status(self, job_id: str, status: str) -> None:
+        """
+        バッチジョブの状態を更新
+        
+        Args:
+            job_id: ジョブID
+            status: 新しい状態
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        
+        try:
+            c.execute("UPDATE batch_jobs SET status = ?, updated_date = ? WHERE job_id = ?", (status, now, job_id))
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when updating batch job: {e}")
+            conn.rollback()
+    
+    def get_batch_items(self, job_id: str) -> List[Dict[str, Any]]:
+        """
+        バッチジョブに含まれる記事を送信順に取得
+        
+        Args:
+            job_id: ジョブID
+            
+        Returns:
+            cache_key, article_url, article（JSON文字列）を含む辞書のリスト
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        try:
+            c.execute("SELECT cache_key, article_url, article FROM batch_items WHERE job_id = ? ORDER BY rowid", (job_id,))
+            return [{"cache_key": row[0], "article_url": row[1], "article": row[2]} for row in c.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when getting batch items: {e}")
+            return []
+    
+    def get_batch_keys(self) -> set:
+        """
+        保存されているバッチジョブ（記事の処理が終わっていないもの）に含まれる翻訳キャッシュのキーを取得
+        
+        Returns:
+            翻訳キャッシュのキーの集合
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        try:
+            c.execute("SELECT cache_key FROM batch_items")
+            return {row[0] for row in c.fetchall()}
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when getting batch keys: {e}")
+            return set()
+    
+    def delete_batch_job(self, job_id: str) -> None:
+        """
+        バッチジョブとその記事を削除
+        
+        Args:
+            job_id: ジョブID
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        try:
+            c.execute("DELETE FROM batch_items WHERE job_id = ?", (job_id,))
+            c.execute("DELETE FROM batch_jobs WHERE job_id = ?", (job_id,))
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when deleting batch job: {e}")
+            conn.rollback()
+    
+    def add_article_jobs(self, articles: List[Dict[str, Any]]) -> None:
+        """
+        記事をdiscoveredの状態で登録（登録済みの記事はそのまま）
+        
+        Args:
+            articles: 記事のリスト
+        """
+        if not articles:
+            return
+        conn = self._connect()
+        c = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        
+        try:
+            c.executemany(
+                """
+                INSERT OR IGNORE INTO article_jobs (article_url, blog_name, state, article, created_date, updated_date)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [(article["link"], article["blog_name"], ARTICLE_DISCOVERED, _pack_article(article), now, now)
+                 for article in articles]
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when adding article jobs: {e}")
+            conn.rollback()
+    
+    def add_duplicate_article_jobs(self, articles: List[Dict[str, Any]]) -> None:
+        """
+        重複として除外した記事をduplicateの状態で登録（登録済みの記事はそのまま）
+        
+        元の記事がfailedになった場合に、代わりに処理するために記事情報を残しておく。
+        
+        Args:
+            articles: 記事のリスト
+        """
+        if not articles:
+            return
+        conn = self._connect()
+        c = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        
+        try:
+            c.executemany(
+                """
+                INSERT OR IGNORE INTO article_jobs (article_url, blog_name, state, article, created_date, updated_date)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                [(article["link"], article["blog_name"], ARTICLE_DUPLICATE, _pack_article(article), now, now)
+                 for article in articles]
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when adding duplicate article jobs: {e}")
+            conn.rollback()
+    
+    def get_article_jobs(self, article_urls: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        記事の処理の状態と途中の結果を取得
+        
+        Args:
+            article_urls: 記事のURLのリスト
+            
+        Returns:
+            記事のURL → 状態の辞書（state, article, result, wp_post_id, attempts）。登録されていない記事は含まない
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        jobs = {}
+        try:
+            unique_urls = list(dict.fromkeys(article_urls))
+            for i in range(0, len(unique_urls), BULK_QUERY_CHUNK):
+                chunk = unique_urls[i:i + BULK_QUERY_CHUNK]
+                placeholders = ",".join("?" * len(chunk))
+                c.execute(
+                    f"SELECT article_url, state, article, result, wp_post_id, attempts FROM article_jobs "
+                    f"WHERE article_url IN ({placeholders})",
+                    chunk
+                )
+                for url, state, article, result, wp_post_id, attempts in c.fetchall():
+                    jobs[url] = {
+                        "state": state,
+                        "article": _unpack_article(article) if article else None,
+                        "result": tuple(json.loads(zlib.decompress(result).decode("utf-8"))) if result else None,
+                        "wp_post_id": wp_post_id,
+                        "attempts": attempts,
+                    }
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            logger.error(f"SQLite error when getting article jobs: {e}")
+            return {}  # エラーの場合は最初から処理する
+        return jobs
+    
+    def get_unfinished_articles(self) -> List[Dict[str, Any]]:
+        """
+        投稿まで終わっていない（中断した実行で残った）記事を取得
+        
+        Returns:
+            記事のリスト（スクレイピング済みの記事は取得した本文を含む）
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        try:
+            c.execute(
+                "SELECT article FROM article_jobs WHERE state NOT IN (?, ?, ?) AND article IS NOT NULL ORDER BY created_date",
+                (ARTICLE_POSTED, ARTICLE_FAILED, ARTICLE_DUPLICATE)
+            )
+            return [_unpack_article(row[0]) for row in c.fetchall()]
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            logger.error(f"SQLite error when getting unfinished articles: {e}")
+            return []
+    
+    def update_article_job(self, article_url: str, state: str, article: Optional[Dict[str, Any]] = None,
+                           result: Optional[Tuple[str, str, str]] = None, wp_post_id: Optional[int] = None) -> None:
+        """
+        記事の処理の状態を更新し、途中の結果を圧縮して保存
+        
+        Args:
+            article_url: 記事のURL
+            state: 新しい状態
+            article: スクレイピング後の記事情報（Noneの場合は保存済みの値を残す）
+            result: (翻訳タイトル, 要約, 翻訳本文)のタプル（Noneの場合は保存済みの値を残す）
+            wp_post_id: 作成したWordPress記事のID（Noneの場合は保存済みの値を残す）
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        article_blob = _pack_article(article) if article is not None else None
+        result_blob = zlib.compress(json.dumps(list(result), ensure_ascii=False).encode("utf-8")) if result is not None else None
+        
+        try:
+            c.execute(
+                """
+                UPDATE article_jobs SET state = ?, article = COALESCE(?, article), result = COALESCE(?, result),
+                    wp_post_id = COALESCE(?, wp_post_id), updated_date = ?
+                WHERE article_url = ?
+                """,
+                (state, article_blob, result_blob, wp_post_id, now, article_url)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when updating article job: {e}")
+            conn.rollback()
+    
+    def record_article_job_failure(self, article_url: str, max_attempts: int) -> bool:
+        """
+        記事の処理に失敗したことを記録
+        
+        失敗がmax_attempts回に達した記事はfailedにし、以後の実行では再開しない。
+        その記事の重複として除外した記事があれば、最も早く見つかった記事を元の記事に
+        置き換えて次回の実行で処理する。
+        
+        Args:
+            article_url: 記事のURL
+            max_attempts: 再開をやめる失敗回数
+            
+        Returns:
+            failedにした場合はTrue
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        
+        try:
+            c.execute(
+                "UPDATE article_jobs SET attempts = attempts + 1, updated_date = ? WHERE article_url = ?",
+                (now, article_url)
+            )
+            c.execute(
+                "UPDATE article_jobs SET state = ?, article = NULL, result = NULL WHERE article_url = ? AND attempts >= ?",
+                (ARTICLE_FAILED, article_url, max_attempts)
+            )
+            failed = c.rowcount > 0
+            promoted = self._release_duplicates(c, article_url) if failed else None
+            conn.commit()
+            if promoted:
+                logger.info(f"Original article failed, resuming its duplicate instead: {promoted}")
+            return failed
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when recording article job failure: {e}")
+            conn.rollback()
+            return False
+    
+    def _release_duplicates(self, c: sqlite3.Cursor, article_url: str) -> Optional[str]:
+        """
+        failedになった記事の重複のうち最も早く見つかった記事を元の記事に置き換える
+        
+        Args:
+            c: トランザクション中のカーソル
+            article_url: failedになった記事のURL
+            
+        Returns:
+            元の記事にした記事のURL、重複がない場合はNone
+        """
+        c.execute(
+            "SELECT article_url FROM article_fingerprints WHERE duplicate_of = ? ORDER BY created_date, article_url LIMIT 1",
+            (article_url,)
+        )
+        row = c.fetchone()
+        if row is None:
+            # 以後に見つかった同じ記事を重複として除外しないよう、指紋を削除する
+            c.execute("DELETE FROM article_fingerprints WHERE article_url = ?", (article_url,))
+            return None
+        
+        promoted = row[0]
+        c.execute(
+            """
+            UPDATE article_fingerprints SET duplicate_of = CASE WHEN article_url = ? THEN NULL ELSE ? END
+            WHERE duplicate_of = ? OR article_url = ?
+            """,
+            (promoted, promoted, article_url, article_url)
+        )
+        c.execute(
+            "UPDATE article_jobs SET state = ?, attempts = 0, updated_date = ? WHERE article_url = ? AND state = ?",
+            (ARTICLE_DISCOVERED, datetime.now().isoformat(), promoted, ARTICLE_DUPLICATE)
+        )
+        return promoted
+    
+    def complete_article_job(self, article_url: str, blog_name: str, wp_post_id: int) -> None:
+        """
+        投稿した記事を処理済みとしてマークし、postedにする（1回のトランザクション）
+        
+        途中の結果は不要になるため削除する。
+        
+        Args:
+            article_url: 記事のURL
+            blog_name: ブログ名
+            wp_post_id: WordPress投稿ID
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        
+        try:
+            c.execute(
+                "INSERT OR REPLACE INTO processed_articles (article_url, blog_name, processed_date, wp_post_id) VALUES (?, ?, ?, ?)",
+                (article_url, blog_name, now, wp_post_id)
+            )
+            c.execute(
+                """
+                UPDATE article_jobs SET state = ?, wp_post_id = ?, article = NULL, result = NULL, updated_date = ?
+                WHERE article_url = ?
+                """,
+                (ARTICLE_POSTED, wp_post_id, now, article_url)
+            )
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        logger.info(f"Marked article as processed: {article_url}, wp_post_id: {wp_post_id}")
+    
+    def get_fingerprint(self, article_url: str) -> Optional[Dict[str, Any]]:
+        """
+        記事の重複検出の記録を取得
+        
+        Args:
+            article_url: 記事のURL
+            
+        Returns:
+            記録の辞書（canonical_url, duplicate_of）、存在しない場合はNone
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        c.row_factory = sqlite3.Row
+        
+        try:
+            c.execute("SELECT canonical_url, duplicate_of FROM article_fingerprints WHERE article_url = ?", (article_url,))
+            row = c.fetchone()
+            return dict(row) if row else None
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when getting article fingerprint: {e}")
+            return None
+    
+    def find_article_by_canonical_url(self, canonical_url: str) -> Optional[str]:
+        """
+        正規化したURLが一致する記録済みの記事（重複の場合はその元の記事）のURLを取得
+        
+        Args:
+            canonical_url: 正規化したURL
+            
+        Returns:
+            元の記事のURL、存在しない場合はNone
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        try:
+            c.execute(
+                "SELECT COALESCE(duplicate_of, article_url) FROM article_fingerprints WHERE canonical_url = ? LIMIT 1",
+                (canonical_url,)
+            )
+            row = c.fetchone()
+            return row[0] if row else None
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when finding article by canonical URL: {e}")
+            return None
+    
+    def find_fingerprint_candidates(self, bands: List[int]) -> List[Tuple[str, int]]:
+        """
+        SimHashの帯のいずれかが一致する記録済みの記事を取得
+        
+        Args:
+            bands: 指紋の帯の値のリスト（FINGERPRINT_BANDS個）
+            
+        Returns:
+            (元の記事のURL, SimHash)のリスト
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        try:
+            conditions = " OR ".join(f"band{band} = ?" for band in range(FINGERPRINT_BANDS))
+            c.execute(
+                f"SELECT COALESCE(duplicate_of, article_url), simhash FROM article_fingerprints WHERE {conditions}",
+                list(bands)
+            )
+            return [(url, value & ((1 << 64) - 1)) for url, value in c.fetchall()]
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when finding fingerprint candidates: {e}")
+            return []
+    
+    def save_fingerprint(self, article_url: str, canonical_url: str, simhash: Optional[int],
+                         bands: Optional[List[int]], blog_name: Optional[str], duplicate_of: Optional[str]) -> None:
+        """
+        記事の正規化したURLとSimHashを保存
+        
+        Args:
+            article_url: 記事のURL
+            canonical_url: 正規化したURL
+            simhash: 本文のSimHash（本文が短く作成できない場合はNone）
+            bands: SimHashの帯の値のリスト（simhashがNoneの場合はNone）
+            blog_name: ブログ名
+            duplicate_of: 重複の場合は元の記事のURL
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        now = datetime.now().isoformat()
+        bands = list(bands) if bands else [None] * FINGERPRINT_BANDS
+        
+        try:
+            c.execute(
+                """
+                INSERT OR REPLACE INTO article_fingerprints
+                    (article_url, canonical_url, simhash, band0, band1, band2, band3, blog_name, duplicate_of, created_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (article_url, canonical_url, _to_signed64(simhash) if simhash is not None else None,
+                 *bands, blog_name, duplicate_of, now)
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when saving article fingerprint: {e}")
+            conn.rollback()
+    
+    def evict_fingerprints(self, max_age_days: int) -> int:
+        """
+        保持期間を過ぎた重複検出の記録を削除
+        
+        Args:
+            max_age_days: 保持日数
+            
+        Returns:
+            削除した記録の数
+        """
+        conn = self._connect()
+        c = conn.cursor()
+        
+        cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+        
+        try:
+            c.execute("DELETE FROM article_fingerprints WHERE created_date < ?", (cutoff,))
+            removed = c.rowcount
+            c.execute("DELETE FROM article_jobs WHERE state = ? AND created_date < ?", (ARTICLE_DUPLICATE, cutoff))
+            conn.commit()
+            return removed
+        except sqlite3.Error as e:
+            logger.error(f"SQLite error when evicting article fingerprints: {e}")
+            conn.rollback()
+            return 0
@@ -0,0 +1,212 @@
+import hashlib
+import logging
+import re
+import threading
+from typing import List, Dict, Any, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import config
+from src.text_cleaner import html_to_text
+
+logger = logging.getLogger(__name__)
+
+# SimHashのビット数と、索引に使う帯の数（帯ごとに16ビット）
+# 距離がSIMHASH_BANDS未満の指紋は、鳩の巣原理により少なくとも1つの帯が完全に一致する
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+
+# 指紋を作るシングル（連続する単語列）の長さ
+SHINGLE_WORDS = 3
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    記事のURLを正規化（同じ記事の異なるURLを同じ文字列にする）
+
+    スキームとホストの小文字化、www.と既定のポートとフラグメントの除去、
+    トラッキング用のクエリパラメータ（config.DEDUP_TRACKING_PARAMS）の除去、
+    残りのパラメータの並べ替え、末尾のスラッシュと/amp/の除去を行う。
+
+    Args:
+        url: 記事のURL
+
+    Returns:
+        正規化したURL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and not (scheme == "http" and parts.port == 80) and not (scheme == "https" and parts.port == 443):
+        host = f"{host}:{parts.port}"
+
+    path = re.sub(r"/amp/?$", "/", parts.path) or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+             if not _is_tracking_param(key)]
+    # http/httpsの違いは同じ記事として扱う
+    return urlunsplit(("https" if scheme in ("http", "https") else scheme, host, path, urlencode(sorted(query)), ""))
+
+
+def _is_tracking_param(key: str) -> bool:
+    key = key.lower()
+    return any(key.startswith(param[:-1]) if param.endswith("*") else key == param
+               for param in config.DEDUP_TRACKING_PARAMS)
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    テキストの単語シングルからSimHashの指紋を作成
+
+    内容が近いテキストほど指紋のハミング距離が小さくなる。
+
+    Args:
+        text: プレーンテキスト
+
+    Returns:
+        SIMHASH_BITSビットの指紋、単語がconfig.DEDUP_MIN_WORDS未満の場合はNone（判定に使えない）
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < max(config.DEDUP_MIN_WORDS, SHINGLE_WORDS):
+        return None
+
+    weights = [0] * SIMHASH_BITS
+    for i in range(len(words) - SHINGLE_WORDS + 1):
+        shingle = " ".join(words[i:i + SHINGLE_WORDS])
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=SIMHASH_BITS // 8).digest(), "big")
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if value >> bit & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def simhash_bands(fingerprint: int) -> List[int]:
+    """指紋をSIMHASH_BANDS個の帯に分割（索引のキー）"""
+    mask = (1 << BAND_BITS) - 1
+    return [fingerprint >> (i * BAND_BITS) & mask for i in range(SIMHASH_BANDS)]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class DuplicateDetector:
+    def __init__(self, db, max_distance: int = config.DEDUP_MAX_DISTANCE,
+                 retention_days: int = config.DEDUP_RETENTION_DAYS):
+        """
+        スクレイピングと翻訳の前に、既に扱った記事の重複を検出する
+
+        正規化したURLが一致する記事と、フィードの本文のSimHashが近い記事（同じプレスリリースの
+        転載など）を重複とみなす。指紋は帯ごとに索引を張ってデータベースに保存し、
+        1記事あたり帯の数だけの索引検索で候補を取り出す。
+
+        Args:
+            db: 指紋を保存するArticleDatabase
+            max_distance: 重複とみなすハミング距離の上限（SIMHASH_BANDS未満）
+            retention_days: 指紋を保持する日数
+            
+        Raises:
+            ValueError: max_distanceが帯の索引で検出できる範囲を超えている場合
+        """
+        if not 0 <= max_distance < SIMHASH_BANDS:
+            raise ValueError(f"DEDUP_MAX_DISTANCE must be between 0 and {SIMHASH_BANDS - 1}, got {max_distance}")
+        self.db = db
+        self.max_distance = max_distance
+        self.retention_days = retention_days
+        self.checked = 0
+        self.url_duplicates = 0
+        self.near_duplicates = 0
+        self._lock = threading.Lock()
+
+    def filter(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        重複する記事を除外
+
+        先に現れた記事（公開日時の昇順に並べた場合は最初に公開された記事）を元の記事とし、
+        重複した記事は元の記事のURLとともに記録する。重複した記事はarticle_jobsにも
+        duplicateの状態で残し、元の記事がfailedになった場合は代わりに処理する。
+
+        Args:
+            articles: 記事のリスト
+
+        Returns:
+            重複していない記事のリスト（入力と同じ順序）
+        """
+        unique, duplicates = [], []
+        for article in articles:
+            original = self.check(article)
+            if original:
+                logger.info(f"Skipping duplicate article: {article['link']} (original: {original})")
+                duplicates.append(article)
+                continue
+            unique.append(article)
+        self.db.add_duplicate_article_jobs(duplicates)
+        return unique
+
+    def check(self, article: Dict[str, Any]) -> Optional[str]:
+        """
+        記事が既に扱った記事の重複かどうかを判定し、記事の指紋を記録
+
+        Args:
+            article: 記事情報
+
+        Returns:
+            重複の場合は元の記事のURL、そうでなければNone
+        """
+        url = article["link"]
+        with self._lock:
+            self.checked += 1
+
+        existing = self.db.get_fingerprint(url)
+        if existing:
+            # 前回までの実行で登録済み（中断した記事の再開など）
+            return existing["duplicate_of"]
+
+        canonical_url = canonicalize_url(url)
+        fingerprint = simhash(html_to_text(article.get("content", "")))
+
+        original = self.db.find_article_by_canonical_url(canonical_url)
+        if original:
+            with self._lock:
+                self.url_duplicates += 1
+        elif fingerprint is not None:
+            for candidate_url, candidate in self.db.find_fingerprint_candidates(simhash_bands(fingerprint)):
+                if hamming_distance(fingerprint, candidate) <= self.max_distance:
+                    original = candidate_url
+                    with self._lock:
+                        self.near_duplicates += 1
+                    break
+
+        bands = simhash_bands(fingerprint) if fingerprint is not None else None
+        self.db.save_fingerprint(url, canonical_url, fingerprint, bands, article.get("blog_name"), original)
+        return original
+
+    def evict(self) -> int:
+        """保持期間を過ぎた指紋を削除"""
+        removed = self.db.evict_fingerprints(self.retention_days)
+        if removed:
+            logger.info(f"Evicted {removed} article fingerprints")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        重複検出の統計を取得
+
+        Returns:
+            checked, url_duplicates, near_duplicates を含む辞書
+        """
+        with self._lock:
+            return {
+                "checked": self.checked,
+                "url_duplicates": self.url_duplicates,
+                "near_duplicates": self.near_duplicates,
+            }
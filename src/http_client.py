@@ -0,0 +1,191 @@
+import logging
+import threading
+from typing import Dict, Any, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+import config
+
+logger = logging.getLogger(__name__)
+
+# 429と5xx応答は指数バックオフで再試行する
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+# スクレイピングでは429と503を再試行しない（DomainRateLimiterがドメイン全体のリクエストを止める）
+SCRAPE_RETRY_STATUS_CODES = (500, 502, 504)
+
+
+class _ConnectionStats:
+    """接続の新規作成と再利用の回数を数える"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            reused = max(0, self.requests - self.new_connections)
+            return {
+                "requests": self.requests,
+                "new_connections": self.new_connections,
+                "reused_connections": reused,
+                "reuse_ratio": reused / self.requests if self.requests else 0.0,
+            }
+
+
+def _counting_pool_class(base, stats: _ConnectionStats):
+    """接続の取得・作成を数えるコネクションプールのクラスを生成"""
+
+    class CountingPool(base):
+        def _get_conn(self, timeout=None):
+            with stats.lock:
+                stats.requests += 1
+            return super()._get_conn(timeout=timeout)
+
+        def _new_conn(self):
+            with stats.lock:
+                stats.new_connections += 1
+            return super()._new_conn()
+
+    return CountingPool
+
+
+class _CappedRetry(Retry):
+    """Retry-Afterの待機秒数に上限を設けたRetry"""
+
+    max_retry_after = config.HTTP_MAX_RETRY_AFTER_SECONDS
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.max_retry_after)
+
+
+def _make_retry(**kwargs) -> Retry:
+    try:
+        return _CappedRetry(**kwargs)
+    except TypeError:
+        # urllib3 1.x にはbackoff_jitterがない
+        kwargs.pop("backoff_jitter", None)
+        return _CappedRetry(**kwargs)
+
+
+class _PooledAdapter(HTTPAdapter):
+    """ホストごとのkeep-aliveプールで接続の再利用を計測するアダプター"""
+
+    def __init__(self, stats: _ConnectionStats, **kwargs):
+        self._stats = stats
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _counting_pool_class(HTTPConnectionPool, self._stats),
+            "https": _counting_pool_class(HTTPSConnectionPool, self._stats),
+        }
+
+
+class HttpClient:
+    def __init__(self, pool_connections: int = config.HTTP_POOL_CONNECTIONS,
+                 pool_maxsize: int = config.HTTP_POOL_MAXSIZE,
+                 max_retries: int = config.HTTP_MAX_RETRIES,
+                 backoff_factor: float = config.HTTP_BACKOFF_FACTOR,
+                 backoff_jitter: float = config.HTTP_BACKOFF_JITTER):
+        """
+        スクレイパーとWordPressクライアントで共有するHTTPクライアント
+
+        requests.Sessionでホストごとのkeep-alive接続プールを保持し、冪等なメソッドの429と5xx応答は
+        ジッター付きの指数バックオフで再試行する（Retry-Afterヘッダーがあれば上限まで従う）。
+        POSTはサーバーが処理済みの場合に二重に投稿しないよう、接続の確立に失敗した場合
+        （リクエストを送信していない場合）だけ再試行する。
+        記事ページの取得では429と503を再試行せず、呼び出し元のDomainRateLimiterに待機を任せる。
+
+        Args:
+            pool_connections: 保持するホストごとのプール数
+            pool_maxsize: 1ホストあたりの最大接続数
+            max_retries: 再試行の最大回数
+            backoff_factor: 指数バックオフの基準秒数
+            backoff_jitter: バックオフに加えるランダムな揺らぎの最大秒数
+        """
+        self._stats = _ConnectionStats()
+        self.session = requests.Session()
+
+        retry = _make_retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            status_forcelist=RETRY_STATUS_CODES,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self._mount(self.session, retry, pool_connections, pool_maxsize)
+
+        # 冪等でないPOST（WordPressの投稿やOAuthの認証コードの交換）用のセッション
+        # 読み込みのタイムアウトや5xxではサーバーが処理済みの可能性があるため再試行しない
+        self.post_session = requests.Session()
+        post_retry = _make_retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,
+            status=0,
+            other=0,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            raise_on_status=False,
+        )
+        self._mount(self.post_session, post_retry, pool_connections, pool_maxsize)
+
+        # 記事ページの取得用のセッション
+        # 429/503の間に同じドメインへ再試行を重ねないよう、待機はDomainRateLimiter.penalizeに任せる
+        self.scrape_session = requests.Session()
+        scrape_retry = _make_retry(
+            total=max_retries,
+            backoff_factor=backoff_factor,
+            backoff_jitter=backoff_jitter,
+            status_forcelist=SCRAPE_RETRY_STATUS_CODES,
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+        self._mount(self.scrape_session, scrape_retry, pool_connections, pool_maxsize)
+
+    def _mount(self, session: requests.Session, retry: Retry, pool_connections: int, pool_maxsize: int) -> None:
+        adapter = _PooledAdapter(self._stats, pool_connections=pool_connections,
+                                 pool_maxsize=pool_maxsize, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """GETリクエストを送信"""
+        return self.session.get(url, **kwargs)
+
+    def scrape_get(self, url: str, **kwargs) -> requests.Response:
+        """記事ページのGETリクエストを送信（429と503は再試行せずにそのまま返す）"""
+        return self.scrape_session.get(url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """POSTリクエストを送信（接続の確立に失敗した場合だけ再試行する）"""
+        return self.post_session.post(url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        接続の利用状況を取得
+
+        Returns:
+            requests（接続取得回数）, new_connections, reused_connections, reuse_ratio を含む辞書
+        """
+        return self._stats.snapshot()
+
+
+_shared_client: Optional[HttpClient] = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """プロセス内で共有するHttpClientを返す"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient()
+        return _shared_client
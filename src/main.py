@@ -7,10 +7,16 @@ import os
 # 自作モジュールのインポート
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.rss_fetcher import get_new_articles
-from src.translator import TranslatorFactory
+from src.translator import TranslatorFactory, TranslationCache, FailoverTranslator
+from src.batch_translator import BatchTranslator
+from src.translation_memory import TranslationMemory
 from src.wordpress import WordPressPoster
 from src.db import ArticleDatabase
 from src.article_scraper import ArticleScraper
+from src.pipeline import ArticlePipeline
+from src.dedup import DuplicateDetector
+from src.http_client import get_http_client
+from src.provider_health import load_limiter_state, save_limiter_state, limiter_stats, usage_stats, tier_stats
 import config
 
 # ロギングの設定
@@ -36,76 +42,81 @@ def main():
     if last_run_time:
         logger.info(f"Last execution time: {last_run_time.isoformat()}")
         # 前回の実行時刻から現在までの記事を取得
-        new_articles = get_new_articles(since_date=last_run_time)
+        new_articles = get_new_articles(since_date=last_run_time, db=db)
     else:
         # 初回実行または情報がない場合はデフォルトの時間範囲で実行
         logger.info(f"No previous execution records. Using default time limit: {config.HOURS_LIMIT} hours")
-        new_articles = get_new_articles(hours_limit=config.HOURS_LIMIT)
+        new_articles = get_new_articles(hours_limit=config.HOURS_LIMIT, db=db)
         # 初回実行時は最終実行時刻を記録
         db.update_last_run_time()
     
     logger.info(f"Found {len(new_articles)} new articles")
     
-    if not new_articles:
+    # 前回までの実行が中断した記事を、最後に終わった段階から再開する
+    known_links = {article['link'] for article in new_articles}
+    resumed_articles = [article for article in db.get_unfinished_articles() if article['link'] not in known_links]
+    if resumed_articles:
+        logger.info(f"Resuming {len(resumed_articles)} unfinished articles from previous runs")
+        new_articles.extend(resumed_articles)
+    
+    # バッチ翻訳では新しい記事がなくても前回までのジョブの結果を回収する
+    if not new_articles and not config.TRANSLATION_BATCH_ENABLED:
         logger.info("No new articles found, exiting")
+        db.close()
         return
     
     # 記事を古い順に並び替え（投稿日時の昇順）
     new_articles.sort(key=lambda x: x['published'])
     logger.info("Articles sorted by publication date (oldest first)")
     
+    # 別のURLで公開された同じ記事や、同じプレスリリースの転載をスクレイピングの前に除外
+    detector = None
+    if config.DEDUP_ENABLED:
+        detector = DuplicateDetector(db)
+        detector.evict()
+        new_articles = detector.filter(new_articles)
+    
     # スクレイパーの初期化
-    scraper = ArticleScraper()
+    scraper = ArticleScraper(db=db)
+    
+    # 翻訳キャッシュを初期化し、古いエントリを整理
+    translation_cache = None
+    if config.TRANSLATION_CACHE_ENABLED:
+        translation_cache = TranslationCache(db)
+        translation_cache.evict()
+    
+    # 段落単位の翻訳メモリを初期化
+    translation_memory = None
+    if config.TRANSLATION_MEMORY_ENABLED:
+        translation_memory = TranslationMemory(db)
+        translation_memory.evict()
+    
+    # 前回の実行で調整した翻訳APIの同時実行数を引き継ぐ
+    load_limiter_state(db)
     
     # 翻訳インスタンスを取得
-    translator = TranslatorFactory.get_translator()
+    translator = TranslatorFactory.get_translator(translation_cache, translation_memory)
     
     # WordPressポスターを初期化
     wp_poster = WordPressPoster()
     
-    # 各記事を処理
-    translated_articles = []
-    
-    for article in new_articles:
-        article_url = article["link"]
-        
-        # 既に処理済みの記事はスキップ
-        if db.is_article_processed(article_url):
-            logger.info(f"Article already processed: {article_url}")
-            continue
-        
-        logger.info(f"Processing article: {article['title']} from {article['blog_name']}")
-        
-        try:
-            # RSSの内容が不十分な場合、記事の全文を取得
-            logger.info("Checking if article content is sufficient...")
-            if len(article['content']) < 500:  # 内容が少ない場合
-                logger.info(f"Article content is too short ({len(article['content'])} chars). Fetching full content...")
-                article = scraper.get_full_content(article)
-            
-            # 記事を翻訳
-            logger.info("Translating article...")
-            translated_title, summary, translation = translator.translate_article(article)
-            
-            # WordPressに投稿
-            logger.info("Posting translated article to WordPress...")
-            wp_response = wp_poster.post_translated_article(article, translated_title, summary, translation)
-            
-            # 処理済みとしてマーク
-            wp_post_id = wp_response.get("id", 0)
-            db.mark_article_processed(article_url, article["blog_name"], wp_post_id)
-            
-            # まとめ記事用に保存
-            translated_articles.append({
-                "wp_id": wp_post_id,
-                "title": f"{translated_title} ({article['blog_name']})",
-                "summary": summary
-            })
-            
-            logger.info(f"Article successfully translated and posted: ID={wp_post_id}")
-            
-        except Exception as e:
-            logger.error(f"Error processing article {article_url}: {e}")
+    # スクレイピング→翻訳→投稿のパイプラインで各記事を処理
+    pipeline = ArticlePipeline(db, scraper, translator, wp_poster)
+    if config.TRANSLATION_BATCH_ENABLED and translation_cache:
+        # 新しい記事はスクレイピングしてバッチジョブとして送信し、完了したジョブの記事と
+        # バッチに含められなかった記事だけをこの実行で投稿する
+        batch_translator = BatchTranslator(db, translation_cache, translator.provider, translator.model)
+        ready_articles = batch_translator.submit(pipeline.prepare(new_articles))
+        ready_articles.extend(batch_translator.collect(wait_seconds=config.TRANSLATION_BATCH_WAIT_SECONDS))
+        ready_articles.sort(key=lambda x: x['published'])
+        translated_articles = pipeline.run(ready_articles, scrape=False)
+    else:
+        if config.TRANSLATION_BATCH_ENABLED:
+            logger.warning("Batch translation requires the translation cache, translating directly")
+        translated_articles = pipeline.run(new_articles)
+    if pipeline.cleaner:
+        for blog_name, stats in pipeline.cleaner.stats().items():
+            logger.info(f"Content cleaning stats for {blog_name}: {stats}")
     
     # 翻訳した記事がある場合、まとめ記事を投稿
     if translated_articles:
@@ -118,8 +129,24 @@ def main():
     else:
         logger.info("No new articles were translated, skipping summary article")
     
+    # HTTP接続の再利用状況と翻訳キャッシュのヒット率を記録
+    logger.info(f"HTTP connection stats: {get_http_client().stats()}")
+    if detector:
+        logger.info(f"Duplicate detection stats: {detector.stats()}")
+    if translation_cache:
+        logger.info(f"Translation cache stats: {translation_cache.stats()}")
+    if translation_memory:
+        logger.info(f"Translation memory stats: {translation_memory.stats()}")
+    if isinstance(translator, FailoverTranslator):
+        logger.info(f"Translation provider stats: {translator.stats()}")
+    logger.info(f"Translation rate limiter stats: {limiter_stats()}")
+    logger.info(f"Translation token usage stats: {usage_stats()}")
+    logger.info(f"Translation model tier stats: {tier_stats()}")
+    save_limiter_state(db)
+    
     # 最終実行時刻を更新
     db.update_last_run_time()
+    db.close()
     logger.info("Blog translation process completed")
 
 if __name__ == "__main__":
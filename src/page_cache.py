@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import zlib
+from typing import Dict, Any, Optional
+import config
+from src.url_utils import normalize_url
+
+logger = logging.getLogger(__name__)
+
+
+class PageCache:
+    def __init__(self, cache_dir: str = config.PAGE_CACHE_DIR,
+                 ttl_hours: float = config.PAGE_CACHE_TTL_HOURS,
+                 max_bytes: int = config.PAGE_CACHE_MAX_BYTES):
+        """
+        スクレイピングしたページのディスクキャッシュ
+
+        正規化したURLのハッシュをファイル名とし、生のHTMLと抽出済みテキストを
+        zlib圧縮したJSONとして保存する。有効期限（TTL）を過ぎたエントリは使用せず、
+        合計サイズが上限を超えた場合は最終アクセスが古い順（LRU）に削除する。
+
+        Args:
+            cache_dir: キャッシュを保存するディレクトリ
+            ttl_hours: エントリの有効期限（時間）
+            max_bytes: キャッシュ全体のサイズ上限（バイト）
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._total_bytes = sum(size for _, _, size in self._list_entries())
+        logger.info(f"Initialized page cache: {cache_dir} ({self._total_bytes} bytes)")
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        キャッシュからページを取得
+
+        Args:
+            url: ページのURL
+
+        Returns:
+            url, fetched_at, html, text を含む辞書。存在しないか期限切れの場合はNone
+        """
+        path = self._path_for(url)
+        try:
+            with open(path, "rb") as f:
+                entry = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, zlib.error) as e:
+            logger.warning(f"Discarding unreadable page cache entry for {url}: {e}")
+            self._remove(path)
+            return None
+
+        if time.time() - entry.get("fetched_at", 0) > self.ttl_seconds:
+            logger.info(f"Page cache entry expired: {url}")
+            self._remove(path)
+            return None
+
+        # LRU判定のためにアクセス時刻を更新
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        return entry
+
+    def put(self, url: str, html: str, text: Optional[str]) -> None:
+        """
+        ページをキャッシュに保存
+
+        Args:
+            url: ページのURL
+            html: 取得したHTML
+            text: HTMLから抽出した本文テキスト（抽出できなかった場合はNone）
+        """
+        entry = {
+            "url": url,
+            "fetched_at": time.time(),
+            "html": html,
+            "text": text,
+        }
+        data = zlib.compress(json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+        path = self._path_for(url)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+
+        try:
+            with self._lock:
+                old_size = os.path.getsize(path) if os.path.exists(path) else 0
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                self._total_bytes += len(data) - old_size
+                if self._total_bytes > self.max_bytes:
+                    self._evict()
+        except OSError as e:
+            logger.warning(f"Could not write page cache entry for {url}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _path_for(self, url: str) -> str:
+        key = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json.z")
+
+    def _list_entries(self):
+        """(パス, 最終アクセス時刻, サイズ) のリストを返す"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json.z"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_mtime, stat.st_size))
+        return entries
+
+    def _evict(self) -> None:
+        """合計サイズが上限を下回るまで最終アクセスの古いエントリを削除（lock保持中に呼ぶこと）"""
+        entries = sorted(self._list_entries(), key=lambda e: e[1])
+        self._total_bytes = sum(size for _, _, size in entries)
+
+        removed = 0
+        for path, _, size in entries:
+            if self._total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._total_bytes -= size
+            removed += 1
+
+        if removed:
+            logger.info(f"Evicted {removed} entries from page cache")
+
+    def _remove(self, path: str) -> None:
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                self._total_bytes -= size
+            except OSError:
+                pass
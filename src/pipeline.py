@@ -0,0 +1,397 @@
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+import config
+from src.text_cleaner import ContentCleaner
+from src.db import ARTICLE_DISCOVERED, ARTICLE_SCRAPED, ARTICLE_TRANSLATED, ARTICLE_POSTING, ARTICLE_DRAFTED
+from src.translator import TRANSLATION_ERROR_SUMMARY, FORMAT_ERROR_SUMMARY
+
+logger = logging.getLogger(__name__)
+
+# ワーカーに終了を伝えるための番兵
+_STOP = object()
+# 下書きの作成が終わったことを投稿ステージに伝えるための番兵
+_WAKE = object()
+
+
+class ArticlePipeline:
+    def __init__(self, db, scraper, translator, wp_poster,
+                 scrape_workers: int = config.PIPELINE_SCRAPE_WORKERS,
+                 translate_workers: int = config.PIPELINE_TRANSLATE_WORKERS,
+                 post_workers: int = config.PIPELINE_POST_WORKERS,
+                 queue_size: int = config.PIPELINE_QUEUE_SIZE,
+                 cleaner: Optional[ContentCleaner] = None):
+        """
+        スクレイピング→翻訳→投稿を段階的に並行処理するパイプライン
+
+        各ステージは上限付きキューで接続され、ステージごとにワーカー数を設定できる。
+        投稿ステージは翻訳が終わった記事の下書きを並列に作成し、記事を投入順（公開日時の昇順）に
+        1件ずつ公開する。
+        記事ごとの処理の状態と途中の結果はデータベースのarticle_jobsに記録し、中断した実行の
+        記事は最後に終わった段階から再開する（スクレイピングや翻訳をやり直さない）。
+
+        Args:
+            db: 処理済み記事のデータベース
+            scraper: 記事本文を取得するArticleScraper
+            translator: 翻訳インスタンス
+            wp_poster: WordPressPoster
+            scrape_workers: スクレイピングステージのワーカー数
+            translate_workers: 翻訳ステージのワーカー数
+            post_workers: 下書きを作成する投稿ステージのワーカー数
+            queue_size: ステージ間キューの上限
+            cleaner: 翻訳前に記事のHTMLをテキストに変換するContentCleaner（省略時はconfigに従う）
+        """
+        self.db = db
+        self.scraper = scraper
+        self.translator = translator
+        self.wp_poster = wp_poster
+        self.scrape_workers = max(1, scrape_workers)
+        self.translate_workers = max(1, translate_workers)
+        self.post_workers = max(1, post_workers)
+        self.queue_size = max(1, queue_size)
+        self.cleaner = cleaner if cleaner is not None else (ContentCleaner() if config.CONTENT_CLEANING_ENABLED else None)
+        # 記事のURL → article_jobsの状態（run・prepareの開始時に読み込む）
+        self._jobs = {}
+
+    def run(self, articles: List[Dict[str, Any]], scrape: bool = True) -> List[Dict[str, Any]]:
+        """
+        記事を処理し、投稿に成功した記事の情報を返す
+
+        Args:
+            articles: 公開日時の昇順に並んだ記事のリスト
+            scrape: Falseの場合はスクレイピングを省略する（prepareで取得済みの記事）
+
+        Returns:
+            まとめ記事用の情報のリスト（投稿順）。各要素は以下のキーを含む:
+            - wp_id: WordPress記事ID
+            - title: 記事タイトル
+            - summary: 要約文
+        """
+        pending = self._filter_unprocessed(articles)
+        if not pending:
+            return []
+        self._load_jobs(pending)
+
+        scrape_queue = queue.Queue(maxsize=self.queue_size)
+        translate_queue = queue.Queue(maxsize=self.queue_size)
+        post_queue = queue.Queue(maxsize=self.queue_size)
+
+        threads = []
+        threads.append(threading.Thread(target=self._feed, args=(pending, scrape_queue), name="pipeline-feed", daemon=True))
+        for i in range(self.scrape_workers):
+            threads.append(threading.Thread(target=self._stage_worker,
+                                            args=(self._scrape if scrape else self._skip, scrape_queue, translate_queue),
+                                            name=f"pipeline-scrape-{i}", daemon=True))
+        for i in range(self.translate_workers):
+            threads.append(threading.Thread(target=self._stage_worker, args=(self._translate, translate_queue, post_queue),
+                                            name=f"pipeline-translate-{i}", daemon=True))
+
+        for thread in threads:
+            thread.start()
+
+        # 投稿ステージ（呼び出し元スレッドで実行）
+        translated_articles = self._post_in_order(post_queue, len(pending))
+
+        # 全記事が投稿ステージまで到達しているので、残りのワーカーを停止する
+        for _ in range(self.scrape_workers):
+            scrape_queue.put(_STOP)
+        for _ in range(self.translate_workers):
+            translate_queue.put(_STOP)
+        for thread in threads:
+            thread.join()
+
+        return translated_articles
+
+    def prepare(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        スクレイピングのみを行い、翻訳できる状態の記事を返す（バッチ翻訳で送信する記事用）
+
+        Args:
+            articles: 記事のリスト
+
+        Returns:
+            本文を取得した未処理の記事のリスト（入力と同じ順序、失敗した記事は除く）
+        """
+        pending = self._filter_unprocessed(articles)
+        self._load_jobs(pending)
+        prepared = []
+        with ThreadPoolExecutor(max_workers=self.scrape_workers) as executor:
+            futures = [executor.submit(self._scrape, article, None) for article in pending]
+            for article, future in zip(pending, futures):
+                try:
+                    prepared.append(future.result()[0])
+                except Exception as e:
+                    logger.error(f"Error processing article {article['link']}: {e}")
+                    self._record_failure(article)
+        return prepared
+
+    def _filter_unprocessed(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """既に処理済みの記事を除外（データベースへの照会は1回にまとめる）"""
+        unprocessed = set(self.db.filter_unprocessed([article["link"] for article in articles]))
+        pending = []
+        for article in articles:
+            if article["link"] not in unprocessed:
+                logger.info(f"Article already processed: {article['link']}")
+                continue
+            pending.append(article)
+        return pending
+
+    def _load_jobs(self, articles: List[Dict[str, Any]]) -> None:
+        """記事をarticle_jobsに登録し、前回までの処理の状態を読み込む"""
+        self.db.add_article_jobs(articles)
+        self._jobs = self.db.get_article_jobs([article["link"] for article in articles])
+
+    def _resume(self, article: Dict[str, Any]):
+        """
+        前回までの実行でスクレイピング・翻訳が終わっている記事の途中の結果を返す
+
+        Returns:
+            (スクレイピング後の記事, 翻訳結果またはNone)のタプル、再開できない場合はNone
+        """
+        job = self._jobs.get(article["link"])
+        if not job or job["state"] == ARTICLE_DISCOVERED or job["article"] is None:
+            return None
+        logger.info(f"Resuming article from {job['state']} stage: {article['link']}")
+        return job["article"], job["result"]
+
+    def _record_failure(self, article: Dict[str, Any]) -> None:
+        """記事の処理の失敗を記録（失敗が続いた記事は以後の実行で再開しない）"""
+        if self.db.record_article_job_failure(article["link"], config.ARTICLE_JOB_MAX_ATTEMPTS):
+            logger.warning(f"Giving up on article after {config.ARTICLE_JOB_MAX_ATTEMPTS} failed attempts: {article['link']}")
+
+    def _feed(self, articles: List[Dict[str, Any]], out_queue: queue.Queue) -> None:
+        """記事に連番を付けて最初のステージに投入する"""
+        for seq, article in enumerate(articles):
+            out_queue.put((seq, article, None))
+
+    def _stage_worker(self, process, in_queue: queue.Queue, out_queue: queue.Queue) -> None:
+        """
+        入力キューから取り出した記事を処理して次のキューに渡すワーカー
+
+        処理に失敗した記事も順序を保つため、結果をNoneとして次のステージに渡す。
+        """
+        while True:
+            item = in_queue.get()
+            if item is _STOP:
+                return
+
+            seq, article, result = item
+            if article is not None:
+                try:
+                    article, result = process(article, result)
+                except Exception as e:
+                    logger.error(f"Error processing article {article['link']}: {e}")
+                    self._record_failure(article)
+                    article, result = None, None
+
+            out_queue.put((seq, article, result))
+
+    def _scrape(self, article: Dict[str, Any], result: Any):
+        """フィードのHTMLをテキストに変換し、内容が不十分な場合は記事の全文を取得"""
+        resumed = self._resume(article)
+        if resumed:
+            return resumed
+
+        logger.info(f"Processing article: {article['title']} from {article['blog_name']}")
+        
+        # 内容の長さはタグなどを除いたテキストで判定する
+        if self.cleaner:
+            article = self.cleaner.clean_article(article)
+        
+        logger.info("Checking if article content is sufficient...")
+        if len(article['content']) < 500:  # 内容が少ない場合
+            logger.info(f"Article content is too short ({len(article['content'])} chars). Fetching full content...")
+            article = self.scraper.get_full_content(article)
+        self.db.update_article_job(article["link"], ARTICLE_SCRAPED, article=article)
+        return article, result
+
+    def _skip(self, article: Dict[str, Any], result: Any):
+        """スクレイピング済みの記事をそのまま次のステージに渡す"""
+        return self._resume(article) or (article, result)
+
+    def _translate(self, article: Dict[str, Any], result: Any):
+        """記事を翻訳（前回までの実行で翻訳済みの記事はその結果を使う）"""
+        if result is not None:
+            return article, result
+
+        logger.info(f"Translating article: {article['title']}")
+        result = self.translator.translate_article(article)
+        if result[1] in (TRANSLATION_ERROR_SUMMARY, FORMAT_ERROR_SUMMARY):
+            # エラーの結果は投稿せず、失敗として記録して次回の実行で翻訳からやり直す
+            raise RuntimeError(f"Translation failed: {result[1]}")
+        self.db.update_article_job(article["link"], ARTICLE_TRANSLATED, result=result)
+        return article, result
+
+    def _post_in_order(self, in_queue: queue.Queue, total: int) -> List[Dict[str, Any]]:
+        """
+        翻訳済みの記事の下書きを並列に作成し、連番順に公開
+
+        本文を送る下書きの作成は翻訳が終わった順にpost_workers並列で行い、状態を変えるだけの
+        公開はブログの時系列を保つため連番順に1件ずつ行う。
+        WordPressのバッチエンドポイントが使える場合は、連番順にconfig.WP_BATCH_SIZE件ずつ
+        まとめて公開状態で作成する（バッチ内は順番に処理される）。
+
+        Args:
+            in_queue: 翻訳ステージの出力キュー
+            total: 処理する記事の総数
+
+        Returns:
+            まとめ記事用の情報のリスト（公開順）
+        """
+        translated_articles = []
+        buffer = {}
+        batch = []
+        next_seq = 0
+        received = 0
+
+        with ThreadPoolExecutor(max_workers=self.post_workers, thread_name_prefix="pipeline-post") as executor:
+            while next_seq < total:
+                if received < total:
+                    # 次の翻訳の到着と下書きの作成の完了のどちらか早い方で公開を進める
+                    item = in_queue.get()
+                    if item is not _WAKE:
+                        seq, article, result = item
+                        received += 1
+                        upload = None
+                        if article is not None and not self._batchable(article):
+                            upload = executor.submit(self._upload_draft, article, result)
+                            upload.add_done_callback(lambda _: self._wake(in_queue))
+                        buffer[seq] = (article, result, upload)
+
+                # 下書きの作成が終わった記事を連番順に公開する（全記事を受け取った後は作成の完了を待つ）
+                while next_seq in buffer:
+                    article, result, upload = buffer[next_seq]
+                    if upload is not None and not upload.done() and received < total:
+                        break
+                    del buffer[next_seq]
+                    next_seq += 1
+                    if article is None:
+                        continue
+
+                    if upload is None:
+                        # バッチでまとめて投稿する記事
+                        batch.append((article, result))
+                        if len(batch) >= config.WP_BATCH_SIZE:
+                            translated_articles.extend(self._post_batch(batch))
+                            batch = []
+                        continue
+
+                    # 先に公開するべき記事が残っていればバッチを先に送る
+                    if batch:
+                        translated_articles.extend(self._post_batch(batch))
+                        batch = []
+                    posted = self._publish(article, result, upload)
+                    if posted:
+                        translated_articles.append(posted)
+
+            if batch:
+                translated_articles.extend(self._post_batch(batch))
+
+        return translated_articles
+
+    @staticmethod
+    def _wake(in_queue: queue.Queue) -> None:
+        """投稿ステージを起こす（キューが満杯の場合は取り出す記事があるので不要）"""
+        try:
+            in_queue.put_nowait(_WAKE)
+        except queue.Full:
+            pass
+
+    def _batchable(self, article: Dict[str, Any]) -> bool:
+        """バッチでまとめて投稿できる記事かどうか（前回の実行で投稿を始めた記事は個別に確認する）"""
+        if not self.wp_poster.batch_supported:
+            return False
+        job = self._jobs.get(article["link"])
+        return not job or job["state"] not in (ARTICLE_POSTING, ARTICLE_DRAFTED)
+
+    def _post_batch(self, items: List[Tuple[Dict[str, Any], Tuple[str, str, str]]]) -> List[Dict[str, Any]]:
+        """
+        翻訳した記事をバッチでまとめてWordPressに投稿し、成功した記事を処理済みとしてマーク
+
+        Args:
+            items: (記事, 翻訳結果)のタプルのリスト（公開順）
+
+        Returns:
+            まとめ記事用の情報のリスト（投稿に失敗した記事は含まない）
+        """
+        for article, _ in items:
+            self.db.update_article_job(article["link"], ARTICLE_POSTING)
+
+        try:
+            responses = self.wp_poster.post_translated_articles([(article, *result) for article, result in items])
+        except Exception as e:
+            responses = [e] * len(items)
+
+        translated_articles = []
+        for (article, result), response in zip(items, responses):
+            if isinstance(response, Exception):
+                logger.error(f"Error processing article {article['link']}: {response}")
+                self._record_failure(article)
+                continue
+            translated_articles.append(self._complete(article, result, response.get("id", 0)))
+        return translated_articles
+
+    def _upload_draft(self, article: Dict[str, Any], result):
+        """
+        翻訳した記事をWordPressに下書きとして作成
+
+        Returns:
+            (WordPress記事ID, 公開済みかどうか)のタプル
+        """
+        article_url = article["link"]
+        translated_title, summary, translation = result
+
+        job = self._jobs.get(article_url)
+        if job and job["state"] == ARTICLE_DRAFTED:
+            # 前回の実行で下書きの作成まで終わっている
+            return job["wp_post_id"], False
+
+        wp_response = None
+        if job and job["state"] == ARTICLE_POSTING:
+            # 前回の実行が投稿の途中で中断した場合は、投稿が完了していないか確認する
+            wp_response = self.wp_poster.find_translated_article(article, translated_title)
+
+        if wp_response is None:
+            self.db.update_article_job(article_url, ARTICLE_POSTING)
+            logger.info(f"Uploading translated article to WordPress as draft: {article_url}")
+            wp_response = self.wp_poster.post_translated_article(article, translated_title, summary, translation,
+                                                                 status="draft")
+
+        wp_post_id = wp_response.get("id", 0)
+        published = wp_response.get("status") == "publish"
+        if not published:
+            self.db.update_article_job(article_url, ARTICLE_DRAFTED, wp_post_id=wp_post_id)
+        return wp_post_id, published
+
+    def _publish(self, article: Dict[str, Any], result, upload) -> Optional[Dict[str, Any]]:
+        """下書きを作成した記事を公開し、処理済みとしてマーク"""
+        article_url = article["link"]
+
+        try:
+            wp_post_id, published = upload.result()
+            if not published:
+                self.wp_poster.publish_post(wp_post_id)
+            return self._complete(article, result, wp_post_id)
+
+        except Exception as e:
+            logger.error(f"Error processing article {article_url}: {e}")
+            self._record_failure(article)
+            return None
+
+    def _complete(self, article: Dict[str, Any], result, wp_post_id: int) -> Dict[str, Any]:
+        """公開した記事を処理済みとしてマークし、まとめ記事用の情報を返す"""
+        translated_title, summary, _ = result
+
+        # 処理済みとしてマーク
+        self.db.complete_article_job(article["link"], article["blog_name"], wp_post_id)
+
+        logger.info(f"Article successfully translated and posted: ID={wp_post_id}")
+
+        # まとめ記事用に保存
+        return {
+            "wp_id": wp_post_id,
+            "title": f"{translated_title} ({article['blog_name']})",
+            "summary": summary
+        }
@@ -0,0 +1,428 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Tuple
+import config
+from src.rate_limiter import parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+# サーキットブレーカーの状態
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+# 過負荷として扱う応答（レート制限・一時的な利用不可・Anthropicの過負荷）
+OVERLOAD_STATUS_CODES = (429, 503, 529)
+
+
+def _percentile(values, percent: float) -> Optional[float]:
+    """値のパーセンタイルを返す（値がない場合はNone）"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, cooldown: float):
+        """
+        プロバイダーごとのサーキットブレーカー
+
+        連続してfailure_threshold回失敗するとオープンになり、cooldown秒の間は呼び出しを止める。
+        その後は1回だけ試行を許可し（ハーフオープン）、成功すれば元に戻り、失敗すれば再びオープンになる。
+
+        Args:
+            failure_threshold: オープンにする連続失敗回数
+            cooldown: オープンにしてから試行を再開するまでの秒数
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.state = CIRCUIT_CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """呼び出してよいかどうか（ハーフオープンでは試行中の呼び出しが終わるまで1回のみ許可）"""
+        with self._lock:
+            if self.state == CIRCUIT_OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = CIRCUIT_HALF_OPEN
+                self._trial_running = False
+            if self.state == CIRCUIT_CLOSED:
+                return True
+            if self.state == CIRCUIT_HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CIRCUIT_CLOSED
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == CIRCUIT_HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = CIRCUIT_OPEN
+                self.opened_at = time.monotonic()
+
+
+class ProviderStats:
+    def __init__(self, window: int = 100):
+        """
+        プロバイダーごとの応答時間とエラー率
+
+        Args:
+            window: 応答時間のパーセンタイルを計算する直近の件数
+        """
+        self.requests = 0
+        self.errors = 0
+        self.hedges = 0
+        self.wins = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, success: bool) -> None:
+        """呼び出しの結果を記録（応答時間は成功した呼び出しのみ）"""
+        with self._lock:
+            self.requests += 1
+            if success:
+                self._latencies.append(latency)
+            else:
+                self.errors += 1
+
+    def record_hedge(self) -> None:
+        """このプロバイダーへのヘッジ（遅い呼び出しの代わりの並行呼び出し）を記録"""
+        with self._lock:
+            self.hedges += 1
+
+    def record_win(self) -> None:
+        """このプロバイダーの結果が採用されたことを記録"""
+        with self._lock:
+            self.wins += 1
+
+    def percentile(self, percent: float, min_samples: int = 1) -> Optional[float]:
+        """
+        直近の応答時間のパーセンタイルを取得
+
+        Returns:
+            応答時間（秒）、記録がmin_samples件未満の場合はNone
+        """
+        with self._lock:
+            if len(self._latencies) < max(1, min_samples):
+                return None
+            return _percentile(self._latencies, percent)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        統計を取得
+
+        Returns:
+            requests, errors, error_rate, hedges, wins, p50, p95 を含む辞書
+        """
+        p50 = self.percentile(50)
+        p95 = self.percentile(95)
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "error_rate": self.errors / self.requests if self.requests else 0.0,
+                "hedges": self.hedges,
+                "wins": self.wins,
+                "p50": p50,
+                "p95": p95,
+            }
+
+
+class AdaptiveLimiter:
+    def __init__(self, initial: float, min_limit: float = 1, max_limit: float = 16,
+                 decrease_factor: float = 0.5):
+        """
+        AIMD（加算増加・乗算減少）で同時実行数を調整するリミッター
+
+        応答が成功するたびに同時実行数の上限を 1/上限 ずつ増やし（上限分の成功でおよそ1増える）、
+        429などの過負荷応答を受けると上限をdecrease_factor倍に減らす。同時に実行中だった呼び出しが
+        まとめて過負荷応答を受けても、減らすのは1回だけにする（前回減らす前に開始した呼び出しの
+        過負荷応答は無視する）。Retry-Afterが指定された場合は、その時間が過ぎるまで新しい呼び出しを
+        開始しない。
+
+        Args:
+            initial: 同時実行数の上限の初期値
+            min_limit: 上限の最小値
+            max_limit: 上限の最大値
+            decrease_factor: 過負荷応答を受けたときに上限に掛ける係数
+        """
+        self.min_limit = max(1.0, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.decrease_factor = decrease_factor
+        self.limit = min(self.max_limit, max(self.min_limit, initial))
+        self.in_flight = 0
+        self.successes = 0
+        self.overloads = 0
+        self.blocked_until = 0.0
+        # 上限を減らした回数（呼び出しを開始した時点の値と比べ、同じ輻輳での重複した減少を防ぐ）
+        self.epoch = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> int:
+        """
+        同時実行数が上限未満になり、Retry-Afterの待機が終わるまで待つ
+
+        Returns:
+            呼び出しを開始した時点の世代（releaseに渡す）
+        """
+        with self._cond:
+            while True:
+                wait = self.blocked_until - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return self.epoch
+                self._cond.wait(timeout=wait if wait > 0 else None)
+
+    def release(self, success: bool = False, overloaded: bool = False, retry_after: Optional[float] = None,
+                epoch: Optional[int] = None) -> None:
+        """
+        呼び出しの終了を記録して上限を調整
+
+        Args:
+            success: 応答が成功した場合はTrue（上限を加算で増やす）
+            overloaded: 過負荷応答の場合はTrue（上限を乗算で減らす）
+            retry_after: 次の呼び出しを開始するまでの待機秒数
+            epoch: acquireが返した世代（前回上限を減らす前に開始した呼び出しの過負荷応答では減らさない）
+        """
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            if overloaded:
+                self.overloads += 1
+                if epoch is None or epoch == self.epoch:
+                    self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+                    self.epoch += 1
+            elif success:
+                self.successes += 1
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            if retry_after:
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            self._cond.notify_all()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        リミッターの状態を取得
+
+        Returns:
+            limit, in_flight, successes, overloads を含む辞書
+        """
+        with self._cond:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "successes": self.successes,
+                "overloads": self.overloads,
+            }
+
+
+def overload_info(error: Exception) -> Tuple[bool, Optional[float]]:
+    """
+    翻訳APIのSDKの例外が過負荷応答かどうかを判定
+
+    各SDKの例外はstatus_code・code属性やresponse属性にHTTPステータスを持つ。
+
+    Returns:
+        (過負荷応答かどうか, Retry-Afterの秒数)のタプル
+    """
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(error, "code", None) or getattr(response, "status_code", None)
+    overloaded = status in OVERLOAD_STATUS_CODES or "RESOURCE_EXHAUSTED" in str(error)
+
+    retry_after = None
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        try:
+            retry_after = parse_retry_after(headers.get("retry-after"))
+        except Exception:
+            retry_after = None
+    return overloaded, retry_after
+
+
+_limiters: Dict[str, AdaptiveLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(provider: str) -> AdaptiveLimiter:
+    """プロバイダーごとに共有するAdaptiveLimiterを返す（初期値はconfig.TRANSLATION_CONCURRENCY）"""
+    with _limiters_lock:
+        if provider not in _limiters:
+            _limiters[provider] = AdaptiveLimiter(config.TRANSLATION_CONCURRENCY.get(provider, 1),
+                                                  max_limit=config.TRANSLATION_AIMD_MAX_LIMIT,
+                                                  decrease_factor=config.TRANSLATION_AIMD_DECREASE_FACTOR)
+        return _limiters[provider]
+
+
+def load_limiter_state(db) -> None:
+    """前回の実行で保存した同時実行数の上限を各プロバイダーのリミッターに復元"""
+    for api in config.TranslationAPI:
+        value = db.get_system_value(f"translation_limit:{api.value}")
+        if value is None:
+            continue
+        limiter = get_limiter(api.value)
+        try:
+            limiter.limit = min(limiter.max_limit, max(limiter.min_limit, float(value)))
+        except ValueError:
+            logger.warning(f"Invalid translation limit for {api.value}: {value}")
+
+
+def save_limiter_state(db) -> None:
+    """各プロバイダーのリミッターの同時実行数の上限を保存（次回の実行で復元する）"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    for provider, limiter in limiters.items():
+        db.set_system_value(f"translation_limit:{provider}", str(limiter.limit))
+
+
+def limiter_stats() -> Dict[str, Dict[str, Any]]:
+    """プロバイダーごとのリミッターの状態を取得"""
+    with _limiters_lock:
+        limiters = dict(_limiters)
+    return {provider: limiter.snapshot() for provider, limiter in limiters.items()}
+
+
+class UsageStats:
+    def __init__(self, window: int = 100):
+        """
+        プロバイダーごとの入力トークン（キャッシュ済み・未キャッシュ）と最初のトークンまでの時間
+
+        Args:
+            window: 最初のトークンまでの時間のパーセンタイルを計算する直近の件数
+        """
+        self.calls = 0
+        self.input_tokens = 0
+        self.cached_input_tokens = 0
+        self._first_token = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, input_tokens: int, cached_tokens: int, first_token: float) -> None:
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += input_tokens
+            self.cached_input_tokens += cached_tokens
+            self._first_token.append(first_token)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        統計を取得
+
+        Returns:
+            calls, input_tokens, cached_input_tokens, uncached_input_tokens, cached_ratio,
+            ttft_p50, ttft_p95 を含む辞書
+        """
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "input_tokens": self.input_tokens,
+                "cached_input_tokens": self.cached_input_tokens,
+                "uncached_input_tokens": self.input_tokens - self.cached_input_tokens,
+                "cached_ratio": self.cached_input_tokens / self.input_tokens if self.input_tokens else 0.0,
+                "ttft_p50": _percentile(self._first_token, 50),
+                "ttft_p95": _percentile(self._first_token, 95),
+            }
+
+
+_usage: Dict[str, UsageStats] = {}
+_usage_lock = threading.Lock()
+
+
+def record_usage(provider: str, input_tokens: int, cached_tokens: int, first_token: float) -> None:
+    """
+    翻訳APIの呼び出し1回分の入力トークンと最初のトークンまでの時間を記録
+
+    Args:
+        provider: 翻訳APIのプロバイダー名
+        input_tokens: 入力トークン数（キャッシュから読み込んだ分を含む）
+        cached_tokens: そのうちキャッシュから読み込んだトークン数
+        first_token: 呼び出しから最初のトークンを受け取るまでの秒数
+    """
+    with _usage_lock:
+        stats = _usage.setdefault(provider, UsageStats())
+    stats.record(input_tokens, cached_tokens, first_token)
+
+
+def usage_stats() -> Dict[str, Dict[str, Any]]:
+    """プロバイダーごとの入力トークンと最初のトークンまでの時間の統計を取得"""
+    with _usage_lock:
+        usage = dict(_usage)
+    return {provider: stats.snapshot() for provider, stats in usage.items()}
+
+
+class TierStats:
+    def __init__(self, model: str, window: int = 100):
+        """
+        プロバイダー・モデルの階層ごとの呼び出し回数、応答時間、入出力トークン数
+
+        Args:
+            model: 階層に割り当てたモデル名
+            window: 応答時間のパーセンタイルを計算する直近の件数
+        """
+        self.model = model
+        self.calls = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, input_tokens: int, output_tokens: int) -> None:
+        with self._lock:
+            self.calls += 1
+            self.input_tokens += input_tokens
+            self.output_tokens += output_tokens
+            self._latencies.append(latency)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        統計を取得
+
+        Returns:
+            model, calls, input_tokens, output_tokens, latency_p50, latency_p95 を含む辞書
+        """
+        with self._lock:
+            return {
+                "model": self.model,
+                "calls": self.calls,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "latency_p50": _percentile(self._latencies, 50),
+                "latency_p95": _percentile(self._latencies, 95),
+            }
+
+
+_tiers: Dict[Tuple[str, str], TierStats] = {}
+_tiers_lock = threading.Lock()
+
+
+def record_tier_usage(provider: str, tier: str, model: str, latency: float,
+                      input_tokens: int, output_tokens: int) -> None:
+    """
+    翻訳APIの呼び出し1回分の応答時間とトークン数をモデルの階層ごとに記録
+
+    Args:
+        provider: 翻訳APIのプロバイダー名
+        tier: モデルの階層（main、fastなど）
+        model: 呼び出したモデル名
+        latency: 呼び出しから応答の終わりまでの秒数
+        input_tokens: 入力トークン数
+        output_tokens: 出力トークン数
+    """
+    with _tiers_lock:
+        stats = _tiers.setdefault((provider, tier), TierStats(model))
+    stats.record(latency, input_tokens, output_tokens)
+
+
+def tier_stats() -> Dict[str, Dict[str, Any]]:
+    """プロバイダー・階層ごとの応答時間とトークン数の統計を取得（キーは「プロバイダー/階層」）"""
+    with _tiers_lock:
+        tiers = dict(_tiers)
+    return {f"{provider}/{tier}": stats.snapshot() for (provider, tier), stats in tiers.items()}
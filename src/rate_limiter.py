@@ -0,0 +1,180 @@
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+import config
+from src.http_client import HttpClient, get_http_client
+
+logger = logging.getLogger(__name__)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Retry-Afterヘッダーの値を待機秒数に変換
+
+    Args:
+        value: ヘッダーの値（秒数またはHTTP日付）
+
+    Returns:
+        待機秒数、解析できない場合はNone
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class _DomainBucket:
+    """1つのドメインに対するトークンバケット"""
+
+    def __init__(self, interval: float, burst: int):
+        self.interval = interval
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.robots_checked = False
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """トークンを1つ予約し、取得までに待機すべき秒数を返す（lock保持中に呼ぶこと）"""
+        now = time.monotonic()
+        # 待機を求められている間はトークンを補充せず、止められた時刻の後から補充を再開する
+        start = max(now, self.blocked_until)
+        if self.interval > 0:
+            elapsed = max(0.0, start - self.last_refill)
+            self.tokens = min(float(self.burst), self.tokens + elapsed / self.interval)
+        else:
+            self.tokens = float(self.burst)
+        self.last_refill = max(self.last_refill, start)
+
+        # トークンが不足している場合は負の残高として予約し、その分だけ待機させる
+        self.tokens -= 1
+        wait = -self.tokens * self.interval if self.tokens < 0 else 0.0
+
+        return start - now + wait
+
+    def block(self, until: float) -> None:
+        """untilまでリクエストを止める（lock保持中に呼ぶこと）"""
+        if until <= self.blocked_until:
+            return
+        self.blocked_until = until
+        # 再開した時点で溜まったトークンの分だけ同時に送らないよう、1件ずつ間隔を空けて再開する
+        self.tokens = min(self.tokens, 1.0)
+        self.last_refill = max(self.last_refill, until)
+
+
+class DomainRateLimiter:
+    def __init__(self, default_interval: float = config.SCRAPE_DEFAULT_INTERVAL,
+                 domain_limits: Optional[Dict[str, Dict[str, Any]]] = None,
+                 respect_crawl_delay: bool = config.SCRAPE_RESPECT_CRAWL_DELAY,
+                 user_agent: str = "*", http_client: Optional[HttpClient] = None):
+        """
+        ドメイン（netloc）ごとのリクエスト間隔を制御するレートリミッター
+
+        ドメインごとに独立したトークンバケットを持つため、異なるドメインへのリクエストは
+        互いに待たされない。robots.txtのCrawl-delayと429/503応答のRetry-Afterも考慮する。
+
+        Args:
+            default_interval: ドメイン設定がない場合のリクエスト間隔（秒）
+            domain_limits: ドメインごとの設定（{"example.com": {"interval": 5.0, "burst": 1}}）
+            respect_crawl_delay: robots.txtのCrawl-delayを間隔の下限として使うかどうか
+            user_agent: robots.txtの照合に使うユーザーエージェント
+            http_client: robots.txtの取得に使うHTTPクライアント（省略時は共有クライアント）
+        """
+        self.default_interval = default_interval
+        self.domain_limits = domain_limits if domain_limits is not None else config.SCRAPE_DOMAIN_LIMITS
+        self.respect_crawl_delay = respect_crawl_delay
+        self.user_agent = user_agent
+        self.http_client = http_client or get_http_client()
+        self._buckets: Dict[str, _DomainBucket] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, url: str) -> float:
+        """
+        URLのドメインに対するリクエスト許可を待つ
+
+        Args:
+            url: リクエスト先のURL
+
+        Returns:
+            実際に待機した秒数
+        """
+        parsed = urlparse(url)
+        bucket = self._get_bucket(parsed.netloc)
+
+        with bucket.lock:
+            check_robots = self.respect_crawl_delay and not bucket.robots_checked
+            bucket.robots_checked = True
+
+        if check_robots:
+            # robots.txtの取得はロックの外で行う（同じドメインへの他のリクエストを待たせない）
+            crawl_delay = self._fetch_crawl_delay(parsed.scheme or "https", parsed.netloc)
+            if crawl_delay:
+                with bucket.lock:
+                    if crawl_delay > bucket.interval:
+                        logger.info(f"Using Crawl-delay {crawl_delay}s for {parsed.netloc}")
+                        bucket.interval = crawl_delay
+
+        with bucket.lock:
+            wait = bucket.reserve()
+
+        if wait > 0:
+            logger.debug(f"Rate limiting {parsed.netloc}: waiting {wait:.2f}s")
+            time.sleep(wait)
+        return wait
+
+    def penalize(self, url: str, retry_after: Optional[float]) -> None:
+        """
+        サーバーから待機を求められたドメインへのリクエストを一定時間止める
+
+        Args:
+            url: 429/503を返したURL
+            retry_after: 待機秒数（Noneの場合は通常の間隔の2倍）
+        """
+        domain = urlparse(url).netloc
+        bucket = self._get_bucket(domain)
+        with bucket.lock:
+            delay = retry_after if retry_after is not None else bucket.interval * 2
+            bucket.block(time.monotonic() + delay)
+        logger.warning(f"Backing off {domain} for {delay:.1f}s")
+
+    def _get_bucket(self, domain: str) -> _DomainBucket:
+        with self._lock:
+            bucket = self._buckets.get(domain)
+            if bucket is None:
+                limits = self.domain_limits.get(domain, {})
+                bucket = _DomainBucket(limits.get("interval", self.default_interval), limits.get("burst", 1))
+                self._buckets[domain] = bucket
+            return bucket
+
+    def _fetch_crawl_delay(self, scheme: str, domain: str) -> Optional[float]:
+        """robots.txtからCrawl-delayを取得"""
+        robots_url = f"{scheme}://{domain}/robots.txt"
+        try:
+            response = self.http_client.get(robots_url, timeout=10)
+            if response.status_code != 200:
+                return None
+            parser = RobotFileParser(robots_url)
+            parser.parse(response.text.splitlines())
+            delay = parser.crawl_delay(self.user_agent)
+            return float(delay) if delay is not None else None
+        except Exception as e:
+            logger.debug(f"Could not read robots.txt for {domain}: {e}")
+            return None
@@ -1,18 +1,31 @@
 import feedparser
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import logging
 import config
+from src.db import ArticleDatabase
+from src.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
-def get_new_articles(hours_limit: int = config.HOURS_LIMIT, since_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+def get_new_articles(hours_limit: int = config.HOURS_LIMIT, since_date: Optional[datetime] = None,
+                     max_workers: int = config.RSS_MAX_WORKERS, timeout: float = config.RSS_FETCH_TIMEOUT,
+                     db: Optional[ArticleDatabase] = None) -> List[Dict[str, Any]]:
     """
     RSSフィードから指定時間以内または指定日時以降に投稿された新しい記事を取得する
 
+    フィードは並列に取得されるが、戻り値の順序は config.RSS_FEEDS の順序（フィード内はエントリ順）を保つ。
+    dbを指定した場合はETag/Last-Modifiedによる条件付きGETを行い、304応答または本文が前回と
+    同一のフィードは解析せずにスキップする。
+
     Args:
         hours_limit: 何時間前までの記事を取得するか（since_dateが指定されていない場合に使用）
         since_date: この日時以降の記事を取得（Noneの場合はhours_limitを使用）
+        max_workers: 同時に取得するフィード数の上限
+        timeout: フィード1件あたりのタイムアウト（秒）
+        db: フィードキャッシュを保存するデータベース（Noneの場合は毎回全件取得）
 
     Returns:
         新しい記事のリスト。各記事は辞書形式で、以下のキーを含む:
@@ -30,52 +43,146 @@ def get_new_articles(hours_limit: int = config.HOURS_LIMIT, since_date: Optional
         time_limit = datetime.now() - timedelta(hours=hours_limit)
         logger.info(f"Fetching articles from the last {hours_limit} hours (since {time_limit.isoformat()})")
 
+    feeds = []
+    for feed_info in config.RSS_FEEDS:
+        if not feed_info["url"]:
+            logger.warning(f"Feed URL for {feed_info['name']} is not set. Skipping.")
+            continue
+        feeds.append(feed_info)
+
     new_articles = []
 
-    for feed_info in config.RSS_FEEDS:
-        feed_url = feed_info["url"]
-        blog_name = feed_info["name"]
+    if feeds:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(feeds)))) as executor:
+            futures = [executor.submit(_fetch_feed, feed_info, time_limit, timeout, db, since_date) for feed_info in feeds]
 
-        if not feed_url:
-            logger.warning(f"Feed URL for {blog_name} is not set. Skipping.")
-            continue
+            # 投入順に結果を回収することで、逐次処理時と同じ並び順を保つ
+            for future in futures:
+                new_articles.extend(future.result())
+
+    logger.info(f"Total new articles found: {len(new_articles)}")
+    return new_articles
+
+
+def _fetch_feed(feed_info: Dict[str, Any], time_limit: datetime, timeout: float,
+                db: Optional[ArticleDatabase] = None, since_date: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """
+    1つのRSSフィードを取得し、time_limit以降の記事を返す
+
+    エラーはこの関数内で処理し、他のフィードに影響しないよう空リストを返す。
+
+    Args:
+        feed_info: フィード情報（'name', 'url'）
+        time_limit: この日時以降の記事を対象とする
+        timeout: HTTPリクエストのタイムアウト（秒）
+        db: フィードキャッシュを保存するデータベース
+        since_date: 前回の実行時刻（キャッシュの有効性判定に使用）
+
+    Returns:
+        記事のリスト
+    """
+    feed_url = feed_info["url"]
+    blog_name = feed_info["name"]
+    articles = []
+
+    try:
+        logger.info(f"Fetching RSS feed: {feed_url}")
+        headers = {"User-Agent": feedparser.USER_AGENT}
+        cache = _get_valid_feed_cache(db, feed_url, since_date)
+        if cache:
+            if cache.get("etag"):
+                headers["If-None-Match"] = cache["etag"]
+            if cache.get("last_modified"):
+                headers["If-Modified-Since"] = cache["last_modified"]
+
+        # feedparserは自前のタイムアウトを持たないため、requestsで取得してから解析する
+        response = get_http_client().get(feed_url, headers=headers, timeout=timeout)
+
+        if response.status_code == 304:
+            logger.info(f"Feed not modified (304), skipping: {feed_url}")
+            return articles
 
-        try:
-            logger.info(f"Fetching RSS feed: {feed_url}")
-            feed = feedparser.parse(feed_url)
+        response.raise_for_status()
 
-            for entry in feed.entries:
-                # 投稿日時を解析
-                if hasattr(entry, 'published_parsed'):
-                    pub_date = datetime(*entry.published_parsed[:6])
-                elif hasattr(entry, 'updated_parsed'):
-                    pub_date = datetime(*entry.updated_parsed[:6])
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        if db:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if cache and cache.get("content_hash") == content_hash:
+                # バリデータ非対応のサーバーでも本文が同一なら解析を省略する
+                logger.info(f"Feed content unchanged, skipping: {feed_url}")
+                db.update_feed_cache(feed_url, etag, last_modified, content_hash)
+                return articles
+
+        feed = feedparser.parse(response.content, response_headers=dict(response.headers))
+
+        for entry in feed.entries:
+            # 投稿日時を解析
+            if hasattr(entry, 'published_parsed'):
+                pub_date = datetime(*entry.published_parsed[:6])
+            elif hasattr(entry, 'updated_parsed'):
+                pub_date = datetime(*entry.updated_parsed[:6])
+            else:
+                # 日付が取得できない場合は現在時刻とする（テスト用）
+                logger.warning(f"No date found for entry: {entry.title}. Using current time.")
+                pub_date = datetime.now()
+
+            # 指定時間以内の記事のみ処理
+            if pub_date >= time_limit:
+                # 記事の内容を取得
+                if hasattr(entry, 'content'):
+                    content = entry.content[0].value
+                elif hasattr(entry, 'summary'):
+                    content = entry.summary
                 else:
-                    # 日付が取得できない場合は現在時刻とする（テスト用）
-                    logger.warning(f"No date found for entry: {entry.title}. Using current time.")
-                    pub_date = datetime.now()
-
-                # 指定時間以内の記事のみ処理
-                if pub_date >= time_limit:
-                    # 記事の内容を取得
-                    if hasattr(entry, 'content'):
-                        content = entry.content[0].value
-                    elif hasattr(entry, 'summary'):
-                        content = entry.summary
-                    else:
-                        content = ""
-
-                    new_articles.append({
-                        "title": entry.title,
-                        "link": entry.link,
-                        "published": pub_date,
-                        "content": content,
-                        "blog_name": blog_name
-                    })
-                    logger.info(f"Found new article: {entry.title} from {blog_name}")
-
-        except Exception as e:
-            logger.error(f"Error fetching RSS feed {feed_url}: {e}")
+                    content = ""
 
-    logger.info(f"Total new articles found: {len(new_articles)}")
-    return new_articles
\ No newline at end of file
+                articles.append({
+                    "title": entry.title,
+                    "link": entry.link,
+                    "published": pub_date,
+                    "content": content,
+                    "blog_name": blog_name
+                })
+                logger.info(f"Found new article: {entry.title} from {blog_name}")
+
+        # 解析に成功した場合のみキャッシュを更新する
+        if db:
+            db.update_feed_cache(feed_url, etag, last_modified, content_hash)
+
+    except Exception as e:
+        logger.error(f"Error fetching RSS feed {feed_url}: {e}")
+
+    return articles
+
+
+def _get_valid_feed_cache(db: Optional[ArticleDatabase], feed_url: str, since_date: Optional[datetime]) -> Optional[Dict[str, Any]]:
+    """
+    条件付きGETに使用できるフィードキャッシュを返す
+
+    キャッシュが前回の実行完了より後に保存されている場合、その実行は途中で終了しており
+    取得した記事が処理されていない可能性があるため、キャッシュは使用しない。
+
+    Args:
+        db: フィードキャッシュを保存するデータベース
+        feed_url: フィードのURL
+        since_date: 前回の実行時刻
+
+    Returns:
+        使用可能なキャッシュ情報、ない場合はNone
+    """
+    if not db or not since_date:
+        return None
+
+    cache = db.get_feed_cache(feed_url)
+    if not cache:
+        return None
+
+    try:
+        if datetime.fromisoformat(cache["updated_date"]) > since_date:
+            logger.info(f"Feed cache is newer than the last completed run, ignoring: {feed_url}")
+            return None
+    except (TypeError, ValueError):
+        return None
+
+    return cache
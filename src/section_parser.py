@@ -0,0 +1,122 @@
+from typing import List, Tuple, Optional, Sequence
+
+# 記事全体の翻訳の応答のセクション（名前, 見出し）
+ARTICLE_SECTIONS = (("title", "【翻訳タイトル】"), ("summary", "【要約】"), ("translation", "【翻訳】"))
+# タイトルと要約だけの応答のセクション
+HEADER_SECTIONS = ARTICLE_SECTIONS[:2]
+
+# 次の見出しが現れるまでに許容する文字数（超えた場合は形式から外れたとみなす）
+# 最後のセクションは次の見出しがないため制限しない
+SECTION_CHAR_LIMITS = {
+    "preamble": 500,  # 最初の見出しより前の前置き
+    "title": 500,
+    "summary": 2000,
+}
+
+
+class SectionFormatError(Exception):
+    """応答が見出しの形式から外れた"""
+
+
+class SectionParser:
+    def __init__(self, sections: Sequence[Tuple[str, str]] = ARTICLE_SECTIONS, strict: bool = True):
+        """
+        【翻訳タイトル】【要約】【翻訳】などの見出しで区切られた応答を逐次解析する
+
+        ストリーミングの応答をfeedで少しずつ渡すと、次の見出しが現れて終わりが確定したセクションから
+        順に返す。strictの場合は、見出しの順序が違う、次の見出しが現れないまま長くなりすぎる
+        などの形式から外れた応答をその時点でSectionFormatErrorとして検出する。
+
+        Args:
+            sections: (名前, 見出し)のタプルのリスト（応答に現れる順）
+            strict: Trueの場合は形式から外れた時点で例外を送出する
+        """
+        self.sections = list(sections)
+        self.strict = strict
+        self.index = -1  # 現在のセクションの位置（-1は最初の見出しより前）
+        self.buffer = ""
+        self.completed = {}
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """
+        応答の続きを渡す
+
+        Args:
+            text: 応答の続きの文字列
+
+        Returns:
+            終わりが確定したセクションの(名前, 本文)のリスト
+
+        Raises:
+            SectionFormatError: strictで応答が形式から外れた場合
+        """
+        self.buffer += text
+        finished = []
+        while self.index + 1 < len(self.sections):
+            marker = self.sections[self.index + 1][1]
+            position = self.buffer.find(marker)
+            if position < 0:
+                break
+            if self.index >= 0:
+                name = self.sections[self.index][0]
+                self.completed[name] = self.buffer[:position].strip()
+                finished.append((name, self.completed[name]))
+            self.buffer = self.buffer[position + len(marker):]
+            self.index += 1
+
+        if self.strict:
+            self._check_format()
+        return finished
+
+    def close(self) -> Tuple[str, ...]:
+        """
+        応答の終わりを通知し、全セクションの本文を返す
+
+        Returns:
+            sectionsの順の本文のタプル
+
+        Raises:
+            SectionFormatError: 見出しが揃っていない場合
+        """
+        if self.index < len(self.sections) - 1:
+            missing = self.sections[self.index + 1][1]
+            raise SectionFormatError(f"Missing section {missing}")
+        name = self.sections[self.index][0]
+        self.completed[name] = self.buffer.strip()
+        self.buffer = ""
+        return tuple(self.completed[name] for name, _ in self.sections)
+
+    def _check_format(self) -> None:
+        """次の見出しを待っているセクションが形式から外れていないか確認"""
+        if self.index + 1 >= len(self.sections):
+            return
+
+        # 次の見出しより後の見出しが先に現れた
+        for _, marker in self.sections[self.index + 2:]:
+            if marker in self.buffer:
+                raise SectionFormatError(f"Section {marker} appeared out of order")
+
+        name = self.sections[self.index][0] if self.index >= 0 else "preamble"
+        limit = SECTION_CHAR_LIMITS.get(name)
+        if limit is not None and len(self.buffer) > limit:
+            expected = self.sections[self.index + 1][1]
+            raise SectionFormatError(f"{expected} did not appear within {limit} chars")
+
+
+def parse_sections(text: str, sections: Sequence[Tuple[str, str]] = ARTICLE_SECTIONS) -> Optional[Tuple[str, ...]]:
+    """
+    応答全体からセクションの本文を取り出す
+
+    Args:
+        text: 応答のテキスト
+        sections: (名前, 見出し)のタプルのリスト
+
+    Returns:
+        sectionsの順の本文のタプル、見出しが揃っていない場合はNone
+    """
+    parser = SectionParser(sections, strict=False)
+    parser.feed(text)
+    try:
+        return parser.close()
+    except SectionFormatError:
+        return None
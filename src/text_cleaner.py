@@ -0,0 +1,126 @@
+import logging
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Any
+from bs4 import BeautifulSoup
+from src.token_counter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# lxmlがインストールされていれば高速なパーサーを使う（任意の依存）
+try:
+    import lxml  # noqa: F401
+    PARSER = 'lxml'
+except ImportError:
+    PARSER = 'html.parser'
+
+# 本文として不要な要素（中身ごと削除する）
+REMOVE_TAGS = ['script', 'style', 'noscript', 'iframe', 'svg', 'form', 'button', 'object', 'embed', 'template']
+
+# 段落の区切りとして扱うブロック要素
+BLOCK_TAGS = ['p', 'div', 'section', 'article', 'header', 'footer', 'aside', 'blockquote', 'pre',
+              'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'table', 'tr', 'figure', 'figcaption', 'hr']
+
+# フィードに付加される定型文（段落全体が一致した場合に削除）
+BOILERPLATE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r"^the post .+ appeared first on .+$",
+    r"^(continue reading|read more|read the full (article|story))\b.*$",
+    r"^(share|share this|like this|related|related posts|related articles)\s*:?$",
+    r"^(advertisement|sponsored)$",
+)]
+
+_TAG_PATTERN = re.compile(r"<[a-zA-Z/!][^>]*>")
+_SPACE_PATTERN = re.compile(r"[ \t\r\f\v\u00a0]+")
+
+
+def html_to_text(content: str) -> str:
+    """
+    フィードのHTMLを段落単位のプレーンテキストに変換
+
+    スクリプトやスタイルなどの要素、タグの属性（トラッキング用のリンクや画像を含む）を除去し、
+    ブロック要素ごとに空行で区切った段落にする。定型文の段落も削除する。
+    HTMLタグを含まないテキストは空白の整理のみ行う。
+
+    Args:
+        content: フィードの記事内容（HTMLまたはテキスト）
+
+    Returns:
+        空行で段落を区切ったテキスト
+    """
+    if not content:
+        return ""
+
+    if _TAG_PATTERN.search(content):
+        soup = BeautifulSoup(content, PARSER)
+        for tag in soup.find_all(REMOVE_TAGS):
+            tag.decompose()
+        for tag in soup.find_all('br'):
+            tag.replace_with("\n")
+        for tag in soup.find_all(BLOCK_TAGS):
+            tag.insert_before("\n\n")
+            tag.insert_after("\n\n")
+        text = soup.get_text()
+    else:
+        text = content
+
+    paragraphs = []
+    for block in re.split(r"\n\s*\n", text):
+        lines = [_SPACE_PATTERN.sub(" ", line).strip() for line in block.split("\n")]
+        paragraph = "\n".join(line for line in lines if line)
+        if not paragraph:
+            continue
+        if any(pattern.match(paragraph) for pattern in BOILERPLATE_PATTERNS):
+            continue
+        paragraphs.append(paragraph)
+
+    return "\n\n".join(paragraphs)
+
+
+class ContentCleaner:
+    def __init__(self):
+        """
+        翻訳前に記事内容をプレーンテキストに変換し、フィードごとの削減量を記録する
+        """
+        self._lock = threading.Lock()
+        self._stats = defaultdict(lambda: {"articles": 0, "chars_before": 0, "chars_after": 0,
+                                           "tokens_before": 0, "tokens_after": 0})
+
+    def clean_article(self, article: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        記事内容をプレーンテキストに変換
+
+        Args:
+            article: 記事情報（'content', 'blog_name'キーが必要）
+
+        Returns:
+            contentを変換した記事情報
+        """
+        before = article.get('content', '') or ''
+        after = html_to_text(before)
+
+        with self._lock:
+            stats = self._stats[article.get('blog_name', '')]
+            stats["articles"] += 1
+            stats["chars_before"] += len(before)
+            stats["chars_after"] += len(after)
+            stats["tokens_before"] += estimate_tokens(before)
+            stats["tokens_after"] += estimate_tokens(after)
+
+        article['content'] = after
+        return article
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        フィードごとの変換前後の文字数・推定トークン数を取得
+
+        Returns:
+            ブログ名 → articles, chars_before, chars_after, tokens_before, tokens_after, reduction の辞書
+        """
+        with self._lock:
+            result = {}
+            for blog_name, stats in self._stats.items():
+                result[blog_name] = dict(stats)
+                before = stats["tokens_before"]
+                result[blog_name]["reduction"] = 1 - stats["tokens_after"] / before if before else 0.0
+            return result
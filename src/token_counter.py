@@ -0,0 +1,23 @@
+import re
+
+# 日本語などのCJK文字（1文字あたりおよそ1トークン）
+_CJK_PATTERN = re.compile(r"[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    テキストのトークン数を概算する
+
+    プロバイダーごとのトークナイザーに依存しないよう、英語などは4文字で約1トークン、
+    CJK文字は1文字で約1トークンとして数える。
+
+    Args:
+        text: 対象のテキスト
+
+    Returns:
+        推定トークン数
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
@@ -0,0 +1,135 @@
+import hashlib
+import html
+import logging
+import re
+import threading
+import unicodedata
+from typing import List, Dict, Any, Optional
+import config
+from src.token_counter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+_TAG_PATTERN = re.compile(r"<[^>]+>")
+_SPACE_PATTERN = re.compile(r"\s+")
+_QUOTES = str.maketrans({"“": '"', "”": '"', "‘": "'", "’": "'", "–": "-", "—": "-"})
+
+
+def split_paragraphs(text: str) -> List[str]:
+    """本文を空行で区切られた段落に分割（空の段落は除く）"""
+    return [paragraph.strip() for paragraph in re.split(r"\n\s*\n", text) if paragraph.strip()]
+
+
+def normalize_paragraph(text: str) -> str:
+    """
+    段落を照合用に正規化
+
+    HTMLタグと実体参照、引用符の違い、空白の違い、大文字・小文字の違いを無視する。
+    """
+    text = html.unescape(_TAG_PATTERN.sub(" ", text))
+    text = unicodedata.normalize("NFKC", text).translate(_QUOTES)
+    return _SPACE_PATTERN.sub(" ", text).strip().casefold()
+
+
+class TranslationMemory:
+    def __init__(self, db, min_chars: int = config.TRANSLATION_MEMORY_MIN_CHARS,
+                 max_entries: int = config.TRANSLATION_MEMORY_MAX_ENTRIES):
+        """
+        段落単位の翻訳メモリ
+
+        過去の記事で翻訳した段落を正規化したテキストのハッシュで保存し、著者紹介や
+        資金提供の注記、出典のフッターなど、記事をまたいで繰り返される段落の翻訳を再利用する。
+
+        Args:
+            db: 翻訳メモリを保存するArticleDatabase
+            min_chars: 保存・照合の対象とする段落の最小文字数（正規化後）
+            max_entries: 保持する段落数の上限（超えた分は最終使用の古い順に削除）
+        """
+        self.db = db
+        self.min_chars = min_chars
+        self.max_entries = max_entries
+        self.paragraphs = 0
+        self.hits = 0
+        self.tokens_saved = 0
+        self._lock = threading.Lock()
+
+    def key_for(self, paragraph: str) -> Optional[str]:
+        """段落の照合キーを返す（短すぎる段落は対象外としてNone）"""
+        normalized = normalize_paragraph(paragraph)
+        if len(normalized) < self.min_chars:
+            return None
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def lookup(self, paragraphs: List[str]) -> Dict[int, str]:
+        """
+        段落の翻訳をまとめて検索
+
+        定型文の翻訳はモデルに依存しないため、どのプロバイダーで翻訳した段落も再利用する。
+
+        Args:
+            paragraphs: 原文の段落のリスト
+
+        Returns:
+            段落の位置 → 翻訳 の辞書（見つかった段落のみ）
+        """
+        keys = {i: self.key_for(paragraph) for i, paragraph in enumerate(paragraphs)}
+        found = self.db.get_memory_translations([key for key in keys.values() if key])
+
+        with self._lock:
+            self.paragraphs += len(paragraphs)
+        return {i: found[key] for i, key in keys.items() if key and key in found}
+
+    def record_reuse(self, paragraphs: List[str], reused: Dict[int, str], overhead_tokens: int = 0) -> None:
+        """
+        翻訳メモリの段落を実際に使用したことを記録
+
+        Args:
+            paragraphs: 原文の段落のリスト
+            reused: lookupの結果のうち使用した段落（位置 → 翻訳）
+            overhead_tokens: 翻訳メモリを使うために余分にかかった推定トークン数
+        """
+        # 入力（原文）と出力（翻訳）の両方のトークンが不要になる
+        saved = sum(estimate_tokens(paragraphs[i]) + estimate_tokens(translation) for i, translation in reused.items())
+        saved -= overhead_tokens
+        with self._lock:
+            self.hits += len(reused)
+            self.tokens_saved += saved
+
+    def store(self, paragraphs: List[str], translations: List[str], provider: str, model: str) -> None:
+        """
+        段落とその翻訳を保存
+
+        Args:
+            paragraphs: 原文の段落のリスト
+            translations: 同じ順序の翻訳のリスト
+            provider: 翻訳APIのプロバイダー名
+            model: モデル名
+        """
+        rows = []
+        for paragraph, translation in zip(paragraphs, translations):
+            key = self.key_for(paragraph)
+            if key and translation.strip():
+                rows.append((key, paragraph, translation.strip()))
+        if rows:
+            self.db.save_memory_translations(rows, provider, model)
+
+    def evict(self) -> int:
+        """上限を超えた古い段落を削除"""
+        removed = self.db.evict_translation_memory(self.max_entries)
+        if removed:
+            logger.info(f"Evicted {removed} paragraphs from translation memory")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        今回の実行での翻訳メモリの利用状況を取得
+
+        Returns:
+            paragraphs（照合した段落数）, hits（再利用した段落数）, tokens_saved（推定節約トークン数）を含む辞書
+        """
+        with self._lock:
+            return {
+                "paragraphs": self.paragraphs,
+                "hits": self.hits,
+                "tokens_saved": self.tokens_saved,
+            }
@@ -1,214 +1,1220 @@
+import hashlib
+import itertools
 import logging
-from typing import Dict, Any, Tuple
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Dict, Any, Tuple, Optional, Iterator
 import config
+from src.translation_memory import TranslationMemory, split_paragraphs
+from src.token_counter import estimate_tokens
+from src.section_parser import (SectionParser, SectionFormatError, parse_sections,
+                                ARTICLE_SECTIONS, HEADER_SECTIONS)
+from src.provider_health import (CircuitBreaker, ProviderStats, get_limiter, overload_info, record_usage,
+                                 record_tier_usage)
 from google import genai
-#import openai
-#from anthropic import Anthropic
+from google.genai import types
+from google.genai import errors as genai_errors
+
+# OpenAIとAnthropicのSDKは、そのプロバイダーを使う場合だけ必要（任意の依存）
+try:
+    import openai
+except ImportError:
+    openai = None
+try:
+    from anthropic import Anthropic
+except ImportError:
+    Anthropic = None
 
 logger = logging.getLogger(__name__)
 
+# プロンプトを変更した場合は更新する（翻訳キャッシュのキーに含まれる）
+PROMPT_VERSION = "3"
+
+# モデルの階層（config.TRANSLATION_MODEL_TIERS）
+TIER_MAIN = "main"
+TIER_FAST = "fast"
+
+# 翻訳に失敗した場合の要約（これらの結果はキャッシュしない）
+TRANSLATION_ERROR_SUMMARY = "翻訳エラーが発生しました。"
+FORMAT_ERROR_SUMMARY = "要約を取得できませんでした。"
+
+# 翻訳者としての指示（OpenAIとAnthropicのシステムプロンプト）
+SYSTEM_PROMPT = "あなたは翻訳者です。英語の記事を日本語に翻訳し、タイトルの翻訳と要約も提供します。"
+
+# プロンプトは記事によらない指示（*_INSTRUCTIONS）と記事ごとの入力（*_INPUT）に分け、
+# 指示を先頭に置いて各プロバイダーのプレフィックスキャッシュの対象にする
+
+# 記事全体を1回で翻訳するプロンプト
+ARTICLE_INSTRUCTIONS = """以下の英語記事を日本語に翻訳してください。記事タイトルの翻訳、2〜3行程度の要約、本文全体の翻訳が必要です。
+
+出力形式:
+【翻訳タイトル】
+[ここに記事タイトルの日本語翻訳を書いてください]
+
+【要約】
+[ここに2〜3行の要約を日本語で書いてください]
+
+【翻訳】
+[ここに全文の翻訳を日本語で書いてください]
+"""
+ARTICLE_INPUT = """タイトル: {title}
+
+元記事:
+{content}
+"""
+
+# チャンク分割時の1チャンクあたりの最大文字数（プロバイダーの設定がない場合）
+DEFAULT_CHUNK_CHARS = 8000
+
+# Geminiのキャッシュコンテキストは、TTLのこの割合が残っている時点で作り直す
+GEMINI_CACHE_RENEW_MARGIN = 0.1
+
+# 長い記事のタイトルと要約だけを生成するプロンプト
+TITLE_SUMMARY_INSTRUCTIONS = """以下の英語記事のタイトルを日本語に翻訳し、記事の内容を2〜3行程度の日本語で要約してください。
+
+出力形式:
+【翻訳タイトル】
+[ここに記事タイトルの日本語翻訳を書いてください]
+
+【要約】
+[ここに2〜3行の要約を日本語で書いてください]
+"""
+TITLE_SUMMARY_INPUT = ARTICLE_INPUT
+
+# 翻訳メモリにない段落だけを翻訳するプロンプト（段落ごとに番号付きの目印を付ける）
+MARKED_PARAGRAPHS_INSTRUCTIONS = """以下は英語記事の段落です。各段落を日本語に翻訳してください。
+各段落の前にある <<<P番号>>> の行はそのまま残し、その次の行から対応する段落の翻訳のみを書いてください。
+"""
+MARKED_PARAGRAPHS_INPUT = """記事: {title}
+
+{content}
+"""
+PARAGRAPH_MARKER_PATTERN = re.compile(r"<<<P(\d+)>>>")
+
+# 翻訳メモリに記憶済みの段落がない記事を1回で翻訳するプロンプト（本文の段落ごとに番号付きの目印を付ける）
+MARKED_ARTICLE_INSTRUCTIONS = ARTICLE_INSTRUCTIONS + """
+元記事の各段落の前にある <<<P番号>>> の行は【翻訳】の中にそのまま残し、その次の行から対応する段落の翻訳のみを書いてください。
+"""
+
+# 長い記事の本文の一部を翻訳するプロンプト
+CHUNK_INSTRUCTIONS = """以下は英語記事の本文の一部です。日本語に翻訳してください。
+段落と改行は元の構成を保ち、翻訳文のみを出力してください。
+"""
+CHUNK_INPUT = """記事: {title}（{index}/{total}）
+
+{content}
+"""
+
+
+def split_into_chunks(text: str, max_chars: int) -> List[str]:
+    """
+    本文を段落の境界で分割し、各チャンクがmax_chars以下になるようにまとめる
+
+    空行で区切られた段落を単位とし、段落が1つでmax_charsを超える場合は
+    </p>の直後、文末の順に区切り位置を探す。
+
+    Args:
+        text: 分割する本文
+        max_chars: 1チャンクあたりの最大文字数
+
+    Returns:
+        元の順序を保ったチャンクのリスト
+    """
+    paragraphs = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        if not paragraph.strip():
+            continue
+        if len(paragraph) <= max_chars:
+            paragraphs.append(paragraph)
+            continue
+        # 長すぎる段落はHTMLの段落、文の順に細かく分割する
+        for pattern in (r"(?<=</p>)", r"(?<=[.!?])\s+"):
+            pieces = [piece for piece in re.split(pattern, paragraph) if piece.strip()]
+            if len(pieces) > 1:
+                break
+        paragraphs.extend(_pack(pieces, max_chars, " "))
+
+    return _pack(paragraphs, max_chars, "\n\n")
+
+
+def needs_chunking(article: Dict[str, Any], provider: str) -> bool:
+    """記事本文が1回の呼び出しで翻訳できる長さを超えているかどうか（チャンク分割が無効ならFalse）"""
+    if not config.TRANSLATION_CHUNKING_ENABLED:
+        return False
+    return len(article['content']) > config.TRANSLATION_CHUNK_CHARS.get(provider, DEFAULT_CHUNK_CHARS)
+
+
+def parse_article_response(response_text: str) -> Optional[Tuple[str, str, str]]:
+    """
+    ARTICLE_INSTRUCTIONSの形式の応答から翻訳タイトル、要約、翻訳本文を取り出す
+    
+    Args:
+        response_text: 翻訳APIの応答テキスト
+        
+    Returns:
+        (翻訳タイトル, 要約, 翻訳本文)のタプル、形式通りでない場合はNone
+    """
+    return parse_sections(response_text, ARTICLE_SECTIONS)
+
+
+def _pack(pieces: List[str], max_chars: int, separator: str) -> List[str]:
+    """部分文字列をmax_charsを超えない範囲でまとめる（1つでmax_charsを超える部分はそのまま）"""
+    chunks = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current}{separator}{piece}" if current else piece
+        if current and len(candidate) > max_chars:
+            chunks.append(current)
+            current = piece
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
 class TranslatorFactory:
     @staticmethod
-    def get_translator():
-        """設定に基づいて適切な翻訳クラスのインスタンスを返す"""
-        api = config.TRANSLATION_API
+    def get_translator(cache: Optional["TranslationCache"] = None, memory: Optional[TranslationMemory] = None):
+        """
+        設定に基づいて適切な翻訳クラスのインスタンスを返す
+        
+        config.TRANSLATION_FALLBACK_APISに予備のプロバイダーが設定されている場合は、
+        TRANSLATION_APIを優先して失敗時・遅延時に予備に切り替えるFailoverTranslatorを返す。
+        
+        Args:
+            cache: 翻訳結果のキャッシュ（任意）
+            memory: 段落単位の翻訳メモリ（任意）
+            
+        Raises:
+            RuntimeError: 設定された予備のプロバイダーを初期化できない場合
+        """
+        primary = TranslatorFactory.create(config.TRANSLATION_API, cache, memory)
+        
+        fallbacks = []
+        for api in config.TRANSLATION_FALLBACK_APIS:
+            if api == config.TRANSLATION_API:
+                continue
+            try:
+                fallbacks.append(TranslatorFactory.create(api, cache, memory))
+            except Exception as e:
+                # 予備なしで動き続けると切り替えが効かないことに気付けないため、設定の誤りとして止める
+                raise RuntimeError(f"Could not initialize fallback translator {api.value}: {e}") from e
+        
+        if not fallbacks:
+            return primary
+        return FailoverTranslator([primary] + fallbacks)
+    
+    @staticmethod
+    def create(api: config.TranslationAPI, cache: Optional["TranslationCache"] = None,
+               memory: Optional[TranslationMemory] = None):
+        """
+        指定したプロバイダーの翻訳クラスのインスタンスを返す
         
+        Args:
+            api: 翻訳APIのプロバイダー
+            cache: 翻訳結果のキャッシュ（任意）
+            memory: 段落単位の翻訳メモリ（任意）
+        """
         if api == config.TranslationAPI.GEMINI:
-            return GeminiTranslator()
+            return GeminiTranslator(cache, memory)
         elif api == config.TranslationAPI.OPENAI:
-            return OpenAITranslator()
+            return OpenAITranslator(cache, memory)
         elif api == config.TranslationAPI.ANTHROPIC:
-            return AnthropicTranslator()
+            return AnthropicTranslator(cache, memory)
         else:
             raise ValueError(f"Unsupported translation API: {api}")
 
 
+class TranslationCache:
+    def __init__(self, db, max_entries: int = config.TRANSLATION_CACHE_MAX_ENTRIES,
+                 max_age_days: Optional[int] = config.TRANSLATION_CACHE_MAX_AGE_DAYS):
+        """
+        翻訳結果の永続キャッシュ
+        
+        キーは記事のタイトルと本文のハッシュ、プロバイダー、モデル、プロンプトのバージョンから作る。
+        結果はArticleDatabaseに保存され、投稿に失敗した記事を次回の実行で再翻訳せずに済む。
+        
+        Args:
+            db: 翻訳結果を保存するArticleDatabase
+            max_entries: 保持するエントリ数の上限（超えた分は最終アクセスの古い順に削除）
+            max_age_days: 最終アクセスからの保持日数
+        """
+        self.db = db
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(article: Dict[str, Any], provider: str, model: str, prompt_version: str = PROMPT_VERSION) -> str:
+        """記事内容・プロバイダー・モデル・プロンプトのバージョンからキャッシュキーを作成"""
+        digest = hashlib.sha256()
+        for part in (article['title'], article['content'], provider, model, prompt_version):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[Tuple[str, str, str]]:
+        """キャッシュされた翻訳結果を取得"""
+        result = self.db.get_cached_translation(key)
+        with self._lock:
+            if result:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return result
+    
+    def put(self, key: str, provider: str, model: str, result: Tuple[str, str, str]) -> None:
+        """翻訳結果を保存"""
+        self.db.save_cached_translation(key, provider, model, PROMPT_VERSION, result)
+    
+    def evict(self) -> int:
+        """保持期限と上限件数に従って古いエントリを削除"""
+        removed = self.db.evict_translation_cache(self.max_entries, self.max_age_days)
+        if removed:
+            logger.info(f"Evicted {removed} entries from translation cache")
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        キャッシュのヒット率を取得
+        
+        Returns:
+            hits, misses, hit_rate を含む辞書
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
 class BaseTranslator:
+    # 翻訳キャッシュのキーに使うプロバイダー名とモデル名（サブクラスで設定）
+    provider = None
+    model = None
+    
+    def __init__(self, cache: Optional[TranslationCache] = None, memory: Optional[TranslationMemory] = None):
+        self.cache = cache
+        self.memory = memory
+        # 階層 → モデル名（設定がない階層はself.modelを使う）
+        self.models = dict(config.TRANSLATION_MODEL_TIERS.get(self.provider, {}))
+    
     def translate_article(self, article: Dict[str, Any]) -> Tuple[str, str, str]:
         """
         記事を翻訳し、要約と翻訳本文を返す
         
+        同じ記事・モデル・プロンプトの翻訳結果がキャッシュにあればそれを返す。
+        翻訳メモリに一致する段落があれば、それ以外の段落だけを翻訳する。
+        タイトル・要約と本文はそれぞれ_routeで決めた階層のモデルで翻訳する。
+        
         Args:
             article: 翻訳する記事情報
             
         Returns:
             (翻訳タイトル, 要約, 翻訳本文)のタプル
         """
-        raise NotImplementedError("Subclasses must implement translate_article")
+        header_tier, body_tier = self._route(article)
+        header_model, body_model = self._model(header_tier), self._model(body_tier)
+        # 別々のモデルで翻訳した結果は両方のモデル名でキャッシュする
+        model = body_model if header_model == body_model else f"{body_model}+{header_model}"
+        
+        key = None
+        if self.cache:
+            key = TranslationCache.make_key(article, self.provider, model)
+            cached = self.cache.get(key)
+            # 振り分けを変更する前やバッチ処理でメインのモデルが翻訳した結果も使う
+            if not cached and model != self.model:
+                cached = self.cache.get(TranslationCache.make_key(article, self.provider, self.model))
+            if cached:
+                logger.info(f"Using cached translation for article: {article['title']}")
+                return cached
+        
+        result = None
+        if self.memory:
+            result = self._translate_with_memory(article, header_tier, body_tier)
+        
+        if result is None:
+            if not self._single_call(article, header_tier, body_tier):
+                result = self._translate_chunked(article, header_tier, body_tier)
+            else:
+                result = self._translate_article(article, body_tier)
+
+        
+        if key and result[1] not in (TRANSLATION_ERROR_SUMMARY, FORMAT_ERROR_SUMMARY):
+            self.cache.put(key, self.provider, model, result)
+        
+        return result
+    
+    def _route(self, article: Dict[str, Any]) -> Tuple[str, str]:
+        """
+        タイトル・要約と本文をそれぞれ翻訳するモデルの階層を決める
+        
+        config.TRANSLATION_FEED_TIERSに記事のフィードがある場合や、本文が
+        config.TRANSLATION_FAST_TIER_MAX_CHARS以下の場合は記事全体を1つの階層で翻訳し、
+        それ以外はconfig.TRANSLATION_TASK_TIERSの処理ごとの階層に振り分ける。
+        
+        Args:
+            article: 翻訳する記事情報
+        
+        Returns:
+            (タイトル・要約の階層, 本文の階層)のタプル
+        """
+        if not config.TRANSLATION_TIER_ROUTING_ENABLED:
+            return TIER_MAIN, TIER_MAIN
+        
+        tier = config.TRANSLATION_FEED_TIERS.get(article.get('blog_name'))
+        if tier is None and len(article['content']) <= config.TRANSLATION_FAST_TIER_MAX_CHARS:
+            tier = TIER_FAST
+        if tier:
+            return tier, tier
+        return config.TRANSLATION_TASK_TIERS["title_summary"], config.TRANSLATION_TASK_TIERS["body"]
+    
+    def _model(self, tier: str) -> str:
+        """階層に割り当てたモデル名（設定がない場合はself.model）"""
+        return self.models.get(tier) or self.model
+    
+    def _single_call(self, article: Dict[str, Any], header_tier: str, body_tier: str) -> bool:
+        """タイトル・要約と本文を1回の呼び出しで翻訳できるかどうか（同じモデルで、分割が不要な長さ）"""
+        return self._model(header_tier) == self._model(body_tier) and not self._should_chunk(article)
+    
+    def _translate_article(self, article: Dict[str, Any], tier: str = TIER_MAIN) -> Tuple[str, str, str]:
+        """
+        翻訳APIを呼び出して記事を翻訳
+        
+        応答をストリーミングで受け取りながら見出しごとに解析し、形式から外れた応答は
+        生成の途中で打ち切って再試行する。
+        
+        Args:
+            article: 翻訳する記事情報
+            tier: 使用するモデルの階層
+        
+        Returns:
+            (翻訳タイトル, 要約, 翻訳本文)のタプル
+        """
+        try:
+            logger.info(f"Sending translation request to {self.provider} API for article: {article['title']}")
+            result, response_text = self._complete_sections(
+                ARTICLE_INPUT.format(title=article['title'], content=article['content']),
+                ARTICLE_INSTRUCTIONS, ARTICLE_SECTIONS, self._log_section, tier)
+            
+            if result:
+                logger.info(f"Successfully translated with {self.provider} API")
+                return result
+            
+            # 形式通りでない場合の処理
+            logger.warning(f"Unexpected response format from {self.provider} API")
+            return article['title'], FORMAT_ERROR_SUMMARY, response_text
+        
+        except Exception as e:
+            logger.error(f"{self.provider} API translation error: {e}")
+            return article['title'], TRANSLATION_ERROR_SUMMARY, f"翻訳エラー: {e}"
+    
+    def _log_section(self, name: str, text: str) -> None:
+        """ストリーミングで確定したセクションを記録（タイトルは本文より先に届く）"""
+        if name == "title":
+            logger.info(f"Received translated title from {self.provider}: {text}")
+    
+    def _complete(self, prompt: str, instructions: Optional[str] = None, tier: str = TIER_MAIN) -> str:
+        """
+        プロンプトを翻訳APIに送信し、応答のテキストを返す
+        
+        Args:
+            prompt: 送信するプロンプト（記事ごとに変わる部分）
+            instructions: 記事によらない指示（プロバイダーのプレフィックスキャッシュの対象）
+            tier: 使用するモデルの階層
+        
+        Returns:
+            応答のテキスト
+        """
+        return self._call_with_limiter(lambda: self._generate(prompt, instructions, tier))
+    
+    def _complete_sections(self, prompt: str, instructions: Optional[str], sections,
+                           on_section=None, tier: str = TIER_MAIN) -> Tuple[Optional[Tuple[str, ...]], str]:
+        """
+        プロンプトを送信し、見出しで区切られた応答を逐次解析する
+        
+        config.TRANSLATION_STREAMING_ENABLEDの場合は応答をストリーミングで受け取り、
+        終わりが確定したセクションから順にon_sectionに渡す。応答が形式から外れた時点で
+        ストリームを閉じ、config.TRANSLATION_FORMAT_RETRIES回まで再試行する。
+        
+        Args:
+            prompt: 送信するプロンプト（記事ごとに変わる部分）
+            instructions: 記事によらない指示
+            sections: (名前, 見出し)のタプルのリスト
+            on_section: セクションが確定するたびに(名前, 本文)で呼び出す関数（任意）
+            tier: 使用するモデルの階層
+        
+        Returns:
+            (sectionsの順の本文のタプル, 応答のテキスト)のタプル。見出しが揃わないまま
+            応答が終わった場合、本文のタプルはNone
+        
+        Raises:
+            SectionFormatError: 再試行しても応答が形式から外れた場合
+        """
+        streaming = config.TRANSLATION_STREAMING_ENABLED
+        
+        def call() -> Tuple[Optional[Tuple[str, ...]], str]:
+            parser = SectionParser(sections, strict=streaming)
+            received = []
+            if streaming:
+                stream = self._generate_stream(prompt, instructions, tier)
+            else:
+                stream = iter([self._generate(prompt, instructions, tier)])
+            try:
+                for chunk in stream:
+                    received.append(chunk)
+                    for name, text in parser.feed(chunk):
+                        if on_section:
+                            on_section(name, text)
+            finally:
+                # 途中で打ち切った場合も接続を閉じる
+                if hasattr(stream, "close"):
+                    stream.close()
+            try:
+                return parser.close(), "".join(received)
+            except SectionFormatError:
+                return None, "".join(received)
+        
+        for attempt in range(config.TRANSLATION_FORMAT_RETRIES + 1):
+            try:
+                return self._call_with_limiter(call)
+            except SectionFormatError as e:
+                if attempt == config.TRANSLATION_FORMAT_RETRIES:
+                    raise
+                logger.warning(f"Response from {self.provider} drifted from the expected format, retrying: {e}")
+    
+    def _call_with_limiter(self, call):
+        """
+        プロバイダーのAdaptiveLimiterの枠内で翻訳APIを呼び出す
+        
+        429などの過負荷応答の場合は上限を減らし、Retry-After（ない場合は指数バックオフ）
+        だけ待ってから再試行する。
+        
+        Args:
+            call: 翻訳APIを1回呼び出す関数
+        
+        Returns:
+            callの戻り値
+        """
+        limiter = get_limiter(self.provider)
+        retries = config.TRANSLATION_OVERLOAD_RETRIES
+        for attempt in range(retries + 1):
+            epoch = limiter.acquire()
+            try:
+                text = call()
+            except SectionFormatError:
+                # 応答は返っているので過負荷ではない
+                limiter.release()
+                raise
+            except Exception as e:
+                overloaded, retry_after = overload_info(e)
+                if overloaded and retry_after is None:
+                    retry_after = config.TRANSLATION_OVERLOAD_BACKOFF * (2 ** attempt)
+                limiter.release(overloaded=overloaded, retry_after=retry_after if overloaded else None, epoch=epoch)
+                if not overloaded or attempt == retries:
+                    raise
+                logger.warning(f"{self.provider} is overloaded, retrying in {retry_after:.1f}s "
+                               f"(limit {limiter.limit:.1f}): {e}")
+                continue
+            limiter.release(success=True)
+            return text
+    
+    def _generate(self, prompt: str, instructions: Optional[str] = None, tier: str = TIER_MAIN) -> str:
+        """
+        プロンプトを翻訳APIに1回送信し、応答のテキストを返す（サブクラスで実装）
+        
+        instructionsは記事をまたいで同じ内容になるため、プロバイダーのキャッシュ機能
+        （Anthropicのcache_control、Geminiのキャッシュコンテキスト、OpenAIの自動プレフィックスキャッシュ）
+        が効くようにプロンプトの先頭に置き、トークン数と応答時間を_record_usageで記録する。
+        
+        Args:
+            prompt: 送信するプロンプト
+            instructions: 記事によらない指示
+            tier: 使用するモデルの階層（self.modelsのキー）
+        
+        Returns:
+            応答のテキスト
+        """
+        raise NotImplementedError("Subclasses must implement _generate")
+    
+    def _generate_stream(self, prompt: str, instructions: Optional[str] = None,
+                         tier: str = TIER_MAIN) -> Iterator[str]:
+        """
+        プロンプトを翻訳APIに1回送信し、応答のテキストを届いた順に返す（サブクラスで実装）
+        
+        最初のテキストを受け取るまでの時間とトークン数を_record_usageで記録する。
+        
+        Args:
+            prompt: 送信するプロンプト
+            instructions: 記事によらない指示
+            tier: 使用するモデルの階層（self.modelsのキー）
+        
+        Returns:
+            応答のテキストの断片のイテレータ
+        """
+        raise NotImplementedError("Subclasses must implement _generate_stream")
+    
+    def _record_usage(self, tier: str, input_tokens: int, cached_tokens: int, output_tokens: int,
+                      first_token: float, latency: float) -> None:
+        """
+        翻訳APIの呼び出し1回分のトークン数と応答時間をプロバイダーごと・階層ごとに記録
+        
+        Args:
+            tier: 呼び出したモデルの階層
+            input_tokens: 入力トークン数（キャッシュから読み込んだ分を含む）
+            cached_tokens: そのうちキャッシュから読み込んだトークン数
+            output_tokens: 出力トークン数
+            first_token: 呼び出しから最初のトークンを受け取るまでの秒数
+            latency: 呼び出しから応答の終わりまでの秒数
+        """
+        record_usage(self.provider, input_tokens, cached_tokens, first_token)
+        record_tier_usage(self.provider, tier, self._model(tier), latency, input_tokens, output_tokens)
+    
+    def _translate_with_memory(self, article: Dict[str, Any], header_tier: str = TIER_MAIN,
+                               body_tier: str = TIER_MAIN) -> Optional[Tuple[str, str, str]]:
+        """
+        翻訳メモリにない段落だけを翻訳し、記憶済みの段落の翻訳と組み合わせる
+        
+        新しい段落は番号付きの目印を付けて翻訳し、目印で対応が確認できた段落の翻訳だけを
+        翻訳メモリに保存する。記憶済みの段落がなく1回の呼び出しで翻訳できる記事は、
+        タイトル・要約と目印付きの本文を同じ呼び出しで翻訳する。それ以外はタイトルと要約を
+        短い出力の別の呼び出しで生成し、その入力の分を節約したトークン数から差し引く。
+        
+        Args:
+            article: 翻訳する記事情報
+            header_tier: タイトル・要約の生成に使うモデルの階層
+            body_tier: 段落の翻訳に使うモデルの階層
+        
+        Returns:
+            (翻訳タイトル, 要約, 翻訳本文)のタプル。本文がない場合や、応答から段落の
+            対応を取り出せない場合はNone（通常の翻訳を行う）
+        """
+        paragraphs = split_paragraphs(article['content'])
+        if not paragraphs:
+            return None
+        remembered = self.memory.lookup(paragraphs)
+        
+        new_indices = [i for i in range(len(paragraphs)) if i not in remembered]
+        logger.info(f"Translation memory matched {len(remembered)}/{len(paragraphs)} paragraphs: {article['title']}")
+        
+        single_call = self._single_call(article, header_tier, body_tier)
+        if not remembered and single_call:
+            return self._translate_marked_article(article, paragraphs, body_tier)
+        
+        # 新しい段落をチャンクの上限文字数ごとにまとめる
+        max_chars = config.TRANSLATION_CHUNK_CHARS.get(self.provider, DEFAULT_CHUNK_CHARS)
+        groups, current, size = [], [], 0
+        for i in new_indices:
+            if current and size + len(paragraphs[i]) > max_chars:
+                groups.append(current)
+                current, size = [], 0
+            current.append(i)
+            size += len(paragraphs[i])
+        if current:
+            groups.append(current)
+        
+        header_prompt = TITLE_SUMMARY_INPUT.format(title=article['title'],
+                                                   content=article['content'][:config.SUMMARY_INPUT_CHARS])
+        workers = max(1, config.TRANSLATION_CONCURRENCY.get(self.provider, 1))
+        translated = {}
+        try:
+            with ThreadPoolExecutor(max_workers=min(workers, len(groups) + 1)) as executor:
+                header_future = executor.submit(self._translate_header, header_prompt, header_tier)
+                group_futures = [
+                    executor.submit(self._translate_marked_paragraphs, article,
+                                    [(i, paragraphs[i]) for i in group], body_tier)
+                    for group in groups
+                ]
+                for future in group_futures:
+                    translated.update(future.result())
+                header = header_future.result()
+        except Exception as e:
+            logger.error(f"{self.provider} translation error: {e}")
+            return article['title'], TRANSLATION_ERROR_SUMMARY, f"翻訳エラー: {e}"
+        
+        if set(translated) != set(new_indices):
+            logger.warning("Could not map paragraph translations, falling back to full translation")
+            return None
+        
+        # 通常の翻訳なら1回で済む記事では、タイトル・要約の呼び出しの入力が余分にかかる
+        overhead = estimate_tokens(TITLE_SUMMARY_INSTRUCTIONS + header_prompt) if single_call else 0
+        self.memory.record_reuse(paragraphs, remembered, overhead)
+        self.memory.store([paragraphs[i] for i in new_indices], [translated[i] for i in new_indices],
+                          self.provider, self._model(body_tier))
+        translation = "\n\n".join(remembered.get(i) or translated[i] for i in range(len(paragraphs)))
+        
+        if header:
+            logger.info(f"Successfully translated with translation memory ({self.provider})")
+            return header[0], header[1], translation
+        
+        logger.warning(f"Unexpected title/summary format from {self.provider}")
+        return article['title'], FORMAT_ERROR_SUMMARY, translation
+    
+    def _translate_header(self, prompt: str, tier: str = TIER_MAIN) -> Optional[Tuple[str, str]]:
+        """
+        記事のタイトルと要約だけを生成
+        
+        記事全体の翻訳と同様に応答を逐次解析し、形式から外れた応答は生成の途中で打ち切って再試行する。
+        
+        Args:
+            prompt: タイトル・要約の生成に使う入力（TITLE_SUMMARY_INPUT）
+            tier: 使用するモデルの階層
+        
+        Returns:
+            (翻訳タイトル, 要約)のタプル、再試行しても形式通りの応答が得られない場合はNone
+        """
+        try:
+            header, _ = self._complete_sections(prompt, TITLE_SUMMARY_INSTRUCTIONS, HEADER_SECTIONS,
+                                                self._log_section, tier)
+        except SectionFormatError as e:
+            logger.warning(f"Title/summary from {self.provider} drifted from the expected format: {e}")
+            return None
+        return header
+    
+    def _translate_marked_article(self, article: Dict[str, Any], paragraphs: List[str],
+                                  tier: str = TIER_MAIN) -> Tuple[str, str, str]:
+        """
+        目印を付けた本文とタイトル・要約を1回の呼び出しで翻訳し、対応が確認できた段落を翻訳メモリに保存
+        
+        Args:
+            article: 翻訳する記事情報
+            paragraphs: 本文の段落のリスト
+            tier: 使用するモデルの階層
+        
+        Returns:
+            (翻訳タイトル, 要約, 翻訳本文)のタプル
+        """
+        content = "\n\n".join(f"<<<P{i}>>>\n{paragraph}" for i, paragraph in enumerate(paragraphs))
+        try:
+            logger.info(f"Sending translation request to {self.provider} API for article: {article['title']}")
+            result, response_text = self._complete_sections(
+                ARTICLE_INPUT.format(title=article['title'], content=content),
+                MARKED_ARTICLE_INSTRUCTIONS, ARTICLE_SECTIONS, self._log_section, tier)
+        except Exception as e:
+            logger.error(f"{self.provider} API translation error: {e}")
+            return article['title'], TRANSLATION_ERROR_SUMMARY, f"翻訳エラー: {e}"
+        
+        if not result:
+            logger.warning(f"Unexpected response format from {self.provider} API")
+            return article['title'], FORMAT_ERROR_SUMMARY, PARAGRAPH_MARKER_PATTERN.sub("", response_text).strip()
+        
+        translated_title, summary, marked_translation = result
+        translated = self._parse_marked(marked_translation, set(range(len(paragraphs))))
+        if len(translated) != len(paragraphs):
+            # 段落の対応が取れない場合も翻訳は使えるので、目印を除いて返す（翻訳メモリには保存しない）
+            logger.warning("Could not map paragraph translations, not storing them in translation memory")
+            translation = "\n\n".join(split_paragraphs(PARAGRAPH_MARKER_PATTERN.sub("", marked_translation)))
+        else:
+            self.memory.store(paragraphs, [translated[i] for i in range(len(paragraphs))],
+                              self.provider, self._model(tier))
+            translation = "\n\n".join(translated[i] for i in range(len(paragraphs)))
+        
+        logger.info(f"Successfully translated with {self.provider} API")
+        return translated_title, summary, translation
+    
+    def _translate_marked_paragraphs(self, article: Dict[str, Any], items: List[Tuple[int, str]],
+                                     tier: str = TIER_MAIN) -> Dict[int, str]:
+        """
+        番号付きの目印を付けた段落を翻訳し、段落の位置 → 翻訳 の辞書を返す
+        
+        Args:
+            article: 翻訳する記事情報
+            items: (段落の位置, 原文)のリスト
+            tier: 使用するモデルの階層
+        
+        Returns:
+            段落の位置 → 翻訳 の辞書（応答に含まれていた段落のみ）
+        """
+        content = "\n\n".join(f"<<<P{i}>>>\n{paragraph}" for i, paragraph in items)
+        response_text = self._complete(MARKED_PARAGRAPHS_INPUT.format(title=article['title'], content=content),
+                                       MARKED_PARAGRAPHS_INSTRUCTIONS, tier)
+        return self._parse_marked(response_text, {i for i, _ in items})
+    
+    @staticmethod
+    def _parse_marked(response_text: str, expected) -> Dict[int, str]:
+        """目印付きの応答から、段落の位置 → 翻訳 の辞書を取り出す（expectedにある位置のみ）"""
+        # ["前置き", "番号", "翻訳", "番号", "翻訳", ...] の形に分割される
+        pieces = PARAGRAPH_MARKER_PATTERN.split(response_text)
+        result = {}
+        for number, text in zip(pieces[1::2], pieces[2::2]):
+            index = int(number)
+            if index in expected and text.strip():
+                result[index] = text.strip()
+        return result
+    
+    def _should_chunk(self, article: Dict[str, Any]) -> bool:
+        """記事本文が1回の呼び出しで翻訳できる長さを超えているかどうか"""
+        return needs_chunking(article, self.provider)
+    
+    def _translate_chunked(self, article: Dict[str, Any], header_tier: str = TIER_MAIN,
+                           body_tier: str = TIER_MAIN) -> Tuple[str, str, str]:
+        """
+        長い記事を段落単位のチャンクに分割して並列に翻訳
+        
+        タイトルと要約は短い出力の別の呼び出しで生成し、本文は各チャンクの翻訳を
+        元の段落順に連結する。タイトル・要約と本文を別の階層のモデルで翻訳する場合にも使う。
+        
+        Args:
+            article: 翻訳する記事情報
+            header_tier: タイトル・要約の生成に使うモデルの階層
+            body_tier: 本文の翻訳に使うモデルの階層
+        
+        Returns:
+            (翻訳タイトル, 要約, 翻訳本文)のタプル
+        """
+        max_chars = config.TRANSLATION_CHUNK_CHARS.get(self.provider, DEFAULT_CHUNK_CHARS)
+        chunks = split_into_chunks(article['content'], max_chars)
+        logger.info(f"Translating article in {len(chunks)} chunks with {self.provider}: {article['title']}")
+        
+        workers = max(1, config.TRANSLATION_CONCURRENCY.get(self.provider, 1))
+        try:
+            with ThreadPoolExecutor(max_workers=min(workers, len(chunks) + 1)) as executor:
+                header_future = executor.submit(self._translate_header, TITLE_SUMMARY_INPUT.format(
+                    title=article['title'], content=article['content'][:config.SUMMARY_INPUT_CHARS]), header_tier)
+                chunk_futures = [
+                    executor.submit(self._complete, CHUNK_INPUT.format(
+                        title=article['title'], index=i + 1, total=len(chunks), content=chunk),
+                        CHUNK_INSTRUCTIONS, body_tier)
+                    for i, chunk in enumerate(chunks)
+                ]
+                
+                # 投入順に回収して段落の順序を保つ
+                translation = "\n\n".join(future.result().strip() for future in chunk_futures)
+                header = header_future.result()
+        except Exception as e:
+            logger.error(f"{self.provider} chunked translation error: {e}")
+            return article['title'], TRANSLATION_ERROR_SUMMARY, f"翻訳エラー: {e}"
+        
+        if header:
+            logger.info(f"Successfully translated in chunks with {self.provider}")
+            return header[0], header[1], translation
+        
+        logger.warning(f"Unexpected title/summary format from {self.provider}")
+        return article['title'], FORMAT_ERROR_SUMMARY, translation
 
 
 class GeminiTranslator(BaseTranslator):
-    def __init__(self):
+    provider = config.TranslationAPI.GEMINI.value
+    
+    def __init__(self, cache: Optional[TranslationCache] = None, memory: Optional[TranslationMemory] = None):
+        super().__init__(cache, memory)
         logger.info("Initializing Gemini translator")
         self.client = genai.Client(api_key=config.GEMINI_API_KEY)
         self.model = config.GEMINI_MODEL
+        # (モデル, 指示) → (キャッシュコンテキストの名前, 作り直す時刻)（作成できなかった指示は名前がNone）
+        self._cached_contents = {}
+        self._cache_lock = threading.Lock()
     
-    def translate_article(self, article: Dict[str, Any]) -> Tuple[str, str, str]:
-        prompt = f"""以下の英語記事を日本語に翻訳してください。記事タイトルの翻訳、2〜3行程度の要約、本文全体の翻訳が必要です。
-
-タイトル: {article['title']}
-
-元記事:
-{article['content']}
-
-出力形式:
-【翻訳タイトル】
-[ここに記事タイトルの日本語翻訳を書いてください]
-
-【要約】
-[ここに2〜3行の要約を日本語で書いてください]
-
-【翻訳】
-[ここに全文の翻訳を日本語で書いてください]
-"""
-        
+    def _generate(self, prompt: str, instructions: Optional[str] = None, tier: str = TIER_MAIN) -> str:
+        model = self._model(tier)
+        start = time.monotonic()
         try:
-            logger.info(f"Sending translation request to Gemini API for article: {article['title']}")
             response = self.client.models.generate_content(
-                model=self.model,
+                model=model,
                 contents=prompt,
+                config=self._generate_config(instructions, model),
             )
+        except genai_errors.ClientError as e:
+            if not self._drop_expired_cache(e, instructions, model):
+                raise
+            response = self.client.models.generate_content(
+                model=model,
+                contents=prompt,
+                config=self._generate_config(instructions, model),
+            )
+        latency = time.monotonic() - start
+        self._record_usage(tier, *self._usage_tokens(response.usage_metadata), latency, latency)
+        return response.text
+    
+    def _generate_stream(self, prompt: str, instructions: Optional[str] = None,
+                         tier: str = TIER_MAIN) -> Iterator[str]:
+        model = self._model(tier)
+        start = time.monotonic()
+        first_token = None
+        usage = None
+        try:
+            try:
+                stream = iter(self.client.models.generate_content_stream(
+                    model=model,
+                    contents=prompt,
+                    config=self._generate_config(instructions, model),
+                ))
+                first_chunk = next(stream, None)
+            except genai_errors.ClientError as e:
+                if not self._drop_expired_cache(e, instructions, model):
+                    raise
+                stream = iter(self.client.models.generate_content_stream(
+                    model=model,
+                    contents=prompt,
+                    config=self._generate_config(instructions, model),
+                ))
+                first_chunk = next(stream, None)
             
-            response_text = response.text
-            
-            # 翻訳タイトル、要約、翻訳部分を抽出
-            parts = response_text.split("【翻訳タイトル】")
-            if len(parts) > 1:
-                parts = parts[1].split("【要約】")
-                if len(parts) > 1:
-                    translated_title = parts[0].strip()
-                    parts = parts[1].split("【翻訳】")
-                    if len(parts) > 1:
-                        summary = parts[0].strip()
-                        translation = parts[1].strip()
-                        logger.info("Successfully translated with Gemini API")
-                        return translated_title, summary, translation
-            
-            # 形式通りでない場合の処理
-            logger.warning("Unexpected response format from Gemini API")
-            return article['title'], "要約を取得できませんでした。", response_text
-            
-        except Exception as e:
-            logger.error(f"Gemini API translation error: {e}")
-            return article['title'], "翻訳エラーが発生しました。", f"翻訳エラー: {e}"
+            for chunk in itertools.chain([first_chunk] if first_chunk is not None else [], stream):
+                # 使用量は最後のチャンクに全体の値が入る
+                usage = chunk.usage_metadata or usage
+                if chunk.text:
+                    if first_token is None:
+                        first_token = time.monotonic() - start
+                    yield chunk.text
+        finally:
+            latency = time.monotonic() - start
+            self._record_usage(tier, *self._usage_tokens(usage),
+                               first_token if first_token is not None else latency, latency)
+    
+    def _generate_config(self, instructions: Optional[str], model: str) -> Optional[types.GenerateContentConfig]:
+        """指示をキャッシュコンテキスト（作成できない場合はsystem_instruction）として渡す設定を作成"""
+        if not instructions:
+            return None
+        cached_content = self._cached_content(instructions, model)
+        if cached_content:
+            return types.GenerateContentConfig(cached_content=cached_content)
+        return types.GenerateContentConfig(system_instruction=instructions)
+    
+    @staticmethod
+    def _usage_tokens(usage) -> Tuple[int, int, int]:
+        """応答の使用量から(入力トークン数, キャッシュ済みの入力トークン数, 出力トークン数)を取り出す"""
+        return (getattr(usage, "prompt_token_count", None) or 0,
+                getattr(usage, "cached_content_token_count", None) or 0,
+                getattr(usage, "candidates_token_count", None) or 0)
+    
+    def _cached_content(self, instructions: str, model: str) -> Optional[str]:
+        """
+        指示をGeminiのキャッシュコンテキストとしてモデルごとに登録し、その名前を返す
+        
+        キャッシュコンテキストはconfig.PROMPT_CACHE_TTL_SECONDSで失効するため、失効する前に作り直す。
+        キャッシュできない場合（指示がモデルの最小トークン数に満たないなど）はNoneを返し、
+        以後はその指示をsystem_instructionとして毎回送る（Geminiの暗黙のキャッシュの対象になる）。
+        """
+        if not config.PROMPT_CACHE_ENABLED:
+            return None
+        with self._cache_lock:
+            key = (model, instructions)
+            name, renew_at = self._cached_contents.get(key, (None, 0.0))
+            if time.monotonic() >= renew_at:
+                try:
+                    cached = self.client.caches.create(
+                        model=model,
+                        config=types.CreateCachedContentConfig(
+                            system_instruction=instructions,
+                            display_name="blog-translator",
+                            ttl=f"{config.PROMPT_CACHE_TTL_SECONDS}s",
+                        ),
+                    )
+                    # 呼び出しの途中で失効しないよう、TTLの残りに余裕があるうちに作り直す
+                    ttl = config.PROMPT_CACHE_TTL_SECONDS
+                    self._cached_contents[key] = (cached.name, time.monotonic() + ttl * (1 - GEMINI_CACHE_RENEW_MARGIN))
+                    logger.info(f"Created Gemini context cache: {cached.name}")
+                except Exception as e:
+                    logger.info(f"Gemini context cache is not available, sending instructions inline: {e}")
+                    self._cached_contents[key] = (None, float("inf"))
+            return self._cached_contents[key][0]
+    
+    def _drop_expired_cache(self, error: Exception, instructions: Optional[str], model: str) -> bool:
+        """
+        キャッシュコンテキストが見つからないエラー（失効・削除済み）の場合に登録を破棄する
+        
+        Returns:
+            破棄した場合はTrue（作り直して再試行できる）
+        """
+        if not instructions or getattr(error, "code", None) not in (403, 404):
+            return False
+        with self._cache_lock:
+            key = (model, instructions)
+            name, _ = self._cached_contents.get(key, (None, 0.0))
+            if name is None:
+                return False
+            del self._cached_contents[key]
+        logger.info(f"Gemini context cache {name} is no longer available, recreating it: {error}")
+        return True
 
 
 class OpenAITranslator(BaseTranslator):
-    def __init__(self):
+    provider = config.TranslationAPI.OPENAI.value
+    
+    def __init__(self, cache: Optional[TranslationCache] = None, memory: Optional[TranslationMemory] = None):
+        super().__init__(cache, memory)
         logger.info("Initializing OpenAI translator")
+        if openai is None:
+            raise ImportError("The openai package is required to use the OpenAI translator")
         self.client = openai.OpenAI(api_key=config.OPENAI_API_KEY)
         self.model = config.OPENAI_MODEL
     
-    def translate_article(self, article: Dict[str, Any]) -> Tuple[str, str, str]:
-        prompt = f"""以下の英語記事を日本語に翻訳してください。記事タイトルの翻訳、2〜3行程度の要約、本文全体の翻訳が必要です。
-
-タイトル: {article['title']}
-
-元記事:
-{article['content']}
-
-出力形式:
-【翻訳タイトル】
-[ここに記事タイトルの日本語翻訳を書いてください]
-
-【要約】
-[ここに2〜3行の要約を日本語で書いてください]
-
-【翻訳】
-[ここに全文の翻訳を日本語で書いてください]
-"""
-        
+    def _generate(self, prompt: str, instructions: Optional[str] = None, tier: str = TIER_MAIN) -> str:
+        start = time.monotonic()
+        response = self.client.chat.completions.create(
+            model=self._model(tier),
+            messages=self._messages(prompt, instructions),
+            temperature=0.3,
+        )
+        latency = time.monotonic() - start
+        self._record_usage(tier, *self._usage_tokens(response.usage), latency, latency)
+        return response.choices[0].message.content
+    
+    def _generate_stream(self, prompt: str, instructions: Optional[str] = None,
+                         tier: str = TIER_MAIN) -> Iterator[str]:
+        start = time.monotonic()
+        first_token = None
+        usage = None
+        stream = self.client.chat.completions.create(
+            model=self._model(tier),
+            messages=self._messages(prompt, instructions),
+            temperature=0.3,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
         try:
-            logger.info(f"Sending translation request to OpenAI API for article: {article['title']}")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "あなたは翻訳者です。英語の記事を日本語に翻訳し、タイトルの翻訳と要約も提供します。"},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.3,
-            )
-            
-            response_text = response.choices[0].message.content
-            
-            # 翻訳タイトル、要約、翻訳部分を抽出
-            parts = response_text.split("【翻訳タイトル】")
-            if len(parts) > 1:
-                parts = parts[1].split("【要約】")
-                if len(parts) > 1:
-                    translated_title = parts[0].strip()
-                    parts = parts[1].split("【翻訳】")
-                    if len(parts) > 1:
-                        summary = parts[0].strip()
-                        translation = parts[1].strip()
-                        logger.info("Successfully translated with OpenAI API")
-                        return translated_title, summary, translation
-            
-            # 形式通りでない場合の処理
-            logger.warning("Unexpected response format from OpenAI API")
-            return article['title'], "要約を取得できませんでした。", response_text
-            
-        except Exception as e:
-            logger.error(f"OpenAI API translation error: {e}")
-            return article['title'], "翻訳エラーが発生しました。", f"翻訳エラー: {e}"
+            for chunk in stream:
+                # 使用量は選択肢を持たない最後のチャンクに入る
+                usage = chunk.usage or usage
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                if first_token is None:
+                    first_token = time.monotonic() - start
+                yield chunk.choices[0].delta.content
+        finally:
+            stream.close()
+            latency = time.monotonic() - start
+            self._record_usage(tier, *self._usage_tokens(usage),
+                               first_token if first_token is not None else latency, latency)
+    
+    @staticmethod
+    def _messages(prompt: str, instructions: Optional[str]) -> List[Dict[str, str]]:
+        # OpenAIは1024トークン以上の共通のプレフィックスを自動でキャッシュするため、
+        # 変わらない指示をシステムプロンプトに含めて先頭に置く
+        system = f"{SYSTEM_PROMPT}\n\n{instructions}" if instructions else SYSTEM_PROMPT
+        return [
+            {"role": "system", "content": system},
+            {"role": "user", "content": prompt}
+        ]
+    
+    @staticmethod
+    def _usage_tokens(usage) -> Tuple[int, int, int]:
+        """応答の使用量から(入力トークン数, キャッシュ済みの入力トークン数, 出力トークン数)を取り出す"""
+        details = getattr(usage, "prompt_tokens_details", None)
+        return (getattr(usage, "prompt_tokens", None) or 0,
+                getattr(details, "cached_tokens", None) or 0,
+                getattr(usage, "completion_tokens", None) or 0)
 
 
 class AnthropicTranslator(BaseTranslator):
-    def __init__(self):
+    provider = config.TranslationAPI.ANTHROPIC.value
+    
+    def __init__(self, cache: Optional[TranslationCache] = None, memory: Optional[TranslationMemory] = None):
+        super().__init__(cache, memory)
         logger.info("Initializing Anthropic translator")
+        if Anthropic is None:
+            raise ImportError("The anthropic package is required to use the Anthropic translator")
         self.client = Anthropic(api_key=config.ANTHROPIC_API_KEY)
         self.model = config.ANTHROPIC_MODEL
     
-    def translate_article(self, article: Dict[str, Any]) -> Tuple[str, str, str]:
-        prompt = f"""以下の英語記事を日本語に翻訳してください。記事タイトルの翻訳、2〜3行程度の要約、本文全体の翻訳が必要です。
-
-タイトル: {article['title']}
-
-元記事:
-{article['content']}
-
-出力形式:
-【翻訳タイトル】
-[ここに記事タイトルの日本語翻訳を書いてください]
+    def _generate(self, prompt: str, instructions: Optional[str] = None, tier: str = TIER_MAIN) -> str:
+        start = time.monotonic()
+        response = self.client.messages.create(
+            model=self._model(tier),
+            max_tokens=4000,
+            temperature=0.3,
+            system=self._system(instructions),
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        )
+        latency = time.monotonic() - start
+        self._record_usage(tier, *self._usage_tokens(response.usage), latency, latency)
+        return response.content[0].text
+    
+    def _generate_stream(self, prompt: str, instructions: Optional[str] = None,
+                         tier: str = TIER_MAIN) -> Iterator[str]:
+        start = time.monotonic()
+        first_token = None
+        with self.client.messages.stream(
+            model=self._model(tier),
+            max_tokens=4000,
+            temperature=0.3,
+            system=self._system(instructions),
+            messages=[
+                {"role": "user", "content": prompt}
+            ]
+        ) as stream:
+            try:
+                for text in stream.text_stream:
+                    if first_token is None:
+                        first_token = time.monotonic() - start
+                    yield text
+            finally:
+                # 途中で打ち切られた場合も、それまでに受け取った使用量を記録する
+                latency = time.monotonic() - start
+                self._record_usage(tier, *self._usage_tokens(self._stream_usage(stream)),
+                                   first_token if first_token is not None else latency, latency)
+    
+    @staticmethod
+    def _stream_usage(stream):
+        """ストリームでそれまでに受け取ったメッセージの使用量を返す（何も受け取っていない場合はNone）"""
+        try:
+            return stream.current_message_snapshot.usage
+        except Exception:
+            return None
+    
+    @staticmethod
+    def _system(instructions: Optional[str]) -> List[Dict[str, Any]]:
+        system = [{"type": "text", "text": SYSTEM_PROMPT}]
+        if instructions:
+            # システムプロンプトの末尾にキャッシュの区切りを置き、指示までをキャッシュさせる
+            block = {"type": "text", "text": instructions}
+            if config.PROMPT_CACHE_ENABLED:
+                block["cache_control"] = {"type": "ephemeral"}
+            system.append(block)
+        return system
+    
+    @staticmethod
+    def _usage_tokens(usage) -> Tuple[int, int, int]:
+        """応答の使用量から(入力トークン数, キャッシュ済みの入力トークン数, 出力トークン数)を取り出す"""
+        cached = getattr(usage, "cache_read_input_tokens", None) or 0
+        created = getattr(usage, "cache_creation_input_tokens", None) or 0
+        return ((getattr(usage, "input_tokens", None) or 0) + cached + created, cached,
+                getattr(usage, "output_tokens", None) or 0)
 
-【要約】
-[ここに2〜3行の要約を日本語で書いてください]
 
-【翻訳】
-[ここに全文の翻訳を日本語で書いてください]
-"""
+class FailoverTranslator(BaseTranslator):
+    def __init__(self, translators: List[BaseTranslator],
+                 hedge_enabled: bool = config.TRANSLATION_HEDGE_ENABLED,
+                 hedge_percentile: float = config.TRANSLATION_HEDGE_PERCENTILE,
+                 failure_threshold: int = config.CIRCUIT_BREAKER_FAILURES,
+                 cooldown: float = config.CIRCUIT_BREAKER_COOLDOWN):
+        """
+        優先順に並べた複数のプロバイダーで翻訳する
         
-        try:
-            logger.info(f"Sending translation request to Anthropic API for article: {article['title']}")
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=4000,
-                temperature=0.3,
-                system="あなたは翻訳者です。英語の記事を日本語に翻訳し、タイトルの翻訳と要約も提供します。",
-                messages=[
-                    {"role": "user", "content": prompt}
-                ]
-            )
+        先頭のプロバイダーが直近の応答時間のパーセンタイル（p95など）以内に応答しない場合は、
+        次のプロバイダーにも同じ記事を送り（ヘッジ）、先に成功した結果を採用する。翻訳に失敗した場合も
+        次のプロバイダーに切り替える。プロバイダーごとのサーキットブレーカーで、失敗が続く
+        プロバイダーへの呼び出しは一定時間止める。
+        
+        キャッシュと翻訳メモリは各プロバイダーの翻訳インスタンスが扱う。
+        
+        Args:
+            translators: 優先順の翻訳インスタンスのリスト
+            hedge_enabled: Falseの場合は失敗時の切り替えのみ行う
+            hedge_percentile: ヘッジするまでの待ち時間に使う応答時間のパーセンタイル
+            failure_threshold: サーキットブレーカーをオープンにする連続失敗回数
+            cooldown: サーキットブレーカーがオープンになってから試行を再開するまでの秒数
+        """
+        super().__init__()
+        self.translators = translators
+        self.provider = translators[0].provider
+        self.model = translators[0].model
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.breakers = {t.provider: CircuitBreaker(failure_threshold, cooldown) for t in translators}
+        self.provider_stats = {t.provider: ProviderStats() for t in translators}
+        # 遅れて応答した呼び出しもスレッドを占有するため、プロバイダー数に応じて余裕を持たせる
+        self._executor = ThreadPoolExecutor(max_workers=4 * len(translators), thread_name_prefix="translator")
+    
+    def translate_article(self, article: Dict[str, Any]) -> Tuple[str, str, str]:
+        """
+        記事を翻訳し、要約と翻訳本文を返す
+        
+        Args:
+            article: 翻訳する記事情報
             
-            response_text = response.content[0].text
+        Returns:
+            (翻訳タイトル, 要約, 翻訳本文)のタプル。全てのプロバイダーで失敗した場合は最後のエラー結果
+        """
+        queue = list(self.translators)
+        running = {}
+        
+        def start_next(hedge: bool) -> bool:
+            while queue:
+                translator = queue.pop(0)
+                if not self.breakers[translator.provider].allow():
+                    logger.info(f"Skipping {translator.provider}: circuit breaker is open")
+                    continue
+                if hedge:
+                    self.provider_stats[translator.provider].record_hedge()
+                running[self._executor.submit(self._call, translator, article)] = translator
+                return True
+            return False
+        
+        if not start_next(hedge=False):
+            # 全てのプロバイダーが止まっている場合も記事を諦めず、先頭のプロバイダーで試す
+            logger.warning("All translation providers are unavailable, trying the primary provider")
+            return self._call(self.translators[0], article)[0]
+        
+        last_result = None
+        latest = next(iter(running.values()))  # 最後に送ったプロバイダー（ヘッジの待ち時間の基準）
+        while running:
+            timeout = self._hedge_delay(latest) if queue else None
+            done, _ = wait(list(running), timeout=timeout, return_when=FIRST_COMPLETED)
             
-            # 翻訳タイトル、要約、翻訳部分を抽出
-            parts = response_text.split("【翻訳タイトル】")
-            if len(parts) > 1:
-                parts = parts[1].split("【要約】")
-                if len(parts) > 1:
-                    translated_title = parts[0].strip()
-                    parts = parts[1].split("【翻訳】")
-                    if len(parts) > 1:
-                        summary = parts[0].strip()
-                        translation = parts[1].strip()
-                        logger.info("Successfully translated with Anthropic API")
-                        return translated_title, summary, translation
+            if not done:
+                # 応答が遅いので次のプロバイダーにも送る
+                logger.info(f"{latest.provider} is slow (>{timeout:.1f}s), hedging: {article['title']}")
+                if start_next(hedge=True):
+                    latest = list(running.values())[-1]
+                continue
             
-            # 形式通りでない場合の処理
-            logger.warning("Unexpected response format from Anthropic API")
-            return article['title'], "要約を取得できませんでした。", response_text
+            for future in done:
+                translator = running.pop(future)
+                result, success = future.result()
+                if success:
+                    # 遅れているプロバイダーの呼び出しは、開始前なら取り消し、実行中なら結果を捨てる
+                    for other in running:
+                        other.cancel()
+                    self.provider_stats[translator.provider].record_win()
+                    return result
+                last_result = result
             
+            if not running and queue:
+                logger.warning(f"Translation failed with {translator.provider}, trying next provider")
+                if start_next(hedge=False):
+                    latest = list(running.values())[-1]
+        
+        return last_result
+    
+    def _call(self, translator: BaseTranslator, article: Dict[str, Any]) -> Tuple[Tuple[str, str, str], bool]:
+        """1つのプロバイダーで翻訳し、応答時間と成否を記録"""
+        start = time.monotonic()
+        try:
+            result = translator.translate_article(article)
+            # 形式が崩れた応答も失敗として次のプロバイダーで試す
+            success = result[1] not in (TRANSLATION_ERROR_SUMMARY, FORMAT_ERROR_SUMMARY)
         except Exception as e:
-            logger.error(f"Anthropic API translation error: {e}")
-            return article['title'], "翻訳エラーが発生しました。", f"翻訳エラー: {e}"
\ No newline at end of file
+            logger.error(f"{translator.provider} translation error: {e}")
+            result = article['title'], TRANSLATION_ERROR_SUMMARY, f"翻訳エラー: {e}"
+            success = False
+        
+        self.provider_stats[translator.provider].record(time.monotonic() - start, success)
+        if success:
+            self.breakers[translator.provider].record_success()
+        else:
+            self.breakers[translator.provider].record_failure()
+        return result, success
+    
+    def _hedge_delay(self, translator: BaseTranslator) -> Optional[float]:
+        """ヘッジするまでの待ち時間（記録が少ないうちは設定の既定値）"""
+        if not self.hedge_enabled:
+            return None
+        latency = self.provider_stats[translator.provider].percentile(
+            self.hedge_percentile, config.TRANSLATION_HEDGE_MIN_SAMPLES)
+        if latency is None:
+            return config.TRANSLATION_HEDGE_DEFAULT_DELAY
+        return max(config.TRANSLATION_HEDGE_MIN_DELAY, latency)
+    
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        プロバイダーごとの応答時間・エラー率・サーキットブレーカーの状態を取得
+        
+        Returns:
+            プロバイダー名 → requests, errors, error_rate, hedges, wins, p50, p95, circuit の辞書
+        """
+        result = {}
+        for translator in self.translators:
+            result[translator.provider] = self.provider_stats[translator.provider].snapshot()
+            result[translator.provider]["circuit"] = self.breakers[translator.provider].state
+        return result
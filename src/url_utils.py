@@ -0,0 +1,45 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# 記事の同一性に影響しないトラッキング用クエリパラメータ
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid",
+    "_ga", "_gl", "igshid", "ref", "ref_src", "spm",
+}
+TRACKING_PREFIXES = ("utm_",)
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    URLを正規化し、同じページを指すURLが同じ文字列になるようにする
+
+    - スキームとホスト名を小文字にし、既定のポート番号を除去
+    - フラグメント（#以降）を除去
+    - トラッキング用のクエリパラメータ（utm_*など）を除去し、残りをキー順に並べる
+
+    Args:
+        url: 正規化するURL
+
+    Returns:
+        正規化したURL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+
+    netloc = host
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parts.port}"
+    if parts.username:
+        userinfo = parts.username + (f":{parts.password}" if parts.password else "")
+        netloc = f"{userinfo}@{netloc}"
+
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query.sort()
+
+    return urlunsplit((scheme, netloc, parts.path or "/", urlencode(query), ""))
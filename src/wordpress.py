@@ -1,6 +1,6 @@
 import requests
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Union
 import logging
 import config
 import webbrowser
@@ -10,9 +10,13 @@ import urllib.parse
 import threading
 import time
 import os
+from src.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
+# RESTのバッチエンドポイントが1回に受け付けるリクエスト数の上限（WordPressの既定値）
+WP_BATCH_MAX_REQUESTS = 25
+
 class OAuth2Handler(http.server.SimpleHTTPRequestHandler):
     """OAuth2リダイレクトを処理するハンドラ"""
     auth_code = None
@@ -50,6 +54,13 @@ class WordPressPoster:
         self.api_base_url = "https://public-api.wordpress.com/wp/v2/sites"
         self.auth_url = "https://public-api.wordpress.com/oauth2/authorize"
         self.token_url = "https://public-api.wordpress.com/oauth2/token"
+        # RESTのバッチエンドポイント（複数の記事の作成を1リクエストにまとめる）
+        self.batch_url = f"https://public-api.wordpress.com/batch/v1/sites/{self.site_url}"
+        # バッチエンドポイントが使えないと分かった場合はFalse（以後は1件ずつ投稿する）
+        self.batch_supported = config.WP_BATCH_ENABLED
+        self.http_client = get_http_client()
+        # 下書きを並列に作成する場合に、トークンの再取得を1回にまとめる
+        self._token_lock = threading.Lock()
         
         # 保存されたトークンを読み込むか、新規取得
         self.access_token = self._load_access_token() or self._get_new_access_token()
@@ -120,7 +131,7 @@ class WordPressPoster:
                 "grant_type": "authorization_code"
             }
             
-            response = requests.post(self.token_url, data=token_params)
+            response = self.http_client.post(self.token_url, data=token_params)
             response.raise_for_status()
             
             token_data = response.json()
@@ -159,17 +170,47 @@ class WordPressPoster:
             'status': status,
         }
         
+        logger.info(f"Posting article to WordPress: {title} ({status})")
+        response = self._send_json(endpoint, data)
+        logger.info(f"Successfully posted article: {title}, ID: {response.get('id')}")
+        return response
+    
+    def publish_post(self, post_id: int) -> Dict[str, Any]:
+        """
+        下書きの記事を公開（公開日時は公開した時刻になる）
+        
+        Args:
+            post_id: WordPress記事ID
+            
+        Returns:
+            APIレスポンス（辞書形式）
+        """
+        endpoint = f"{self.api_base_url}/{self.site_url}/posts/{post_id}"
+        response = self._send_json(endpoint, {'status': 'publish'})
+        logger.info(f"Published WordPress post: ID={post_id}")
+        return response
+    
+    def _send_json(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        JSONをPOSTし、応答をJSONとして返す（トークンが無効な場合は再取得して再送する）
+        
+        Args:
+            endpoint: APIのURL
+            data: 送信するデータ
+            
+        Returns:
+            APIレスポンス（辞書形式）
+        """
+        access_token = self.access_token
         headers = {
-            'Authorization': f'Bearer {self.access_token}',
+            'Authorization': f'Bearer {access_token}',
             'Content-Type': 'application/json'
         }
         
-        logger.info(f"Posting article to WordPress: {title}")
-        response = requests.post(endpoint, json=data, headers=headers)
+        response = self.http_client.post(endpoint, json=data, headers=headers)
         
         try:
             response.raise_for_status()
-            logger.info(f"Successfully posted article: {title}, ID: {response.json().get('id')}")
             return response.json()
         except requests.exceptions.HTTPError as e:
             logger.error(f"Error posting to WordPress: {e}")
@@ -177,13 +218,17 @@ class WordPressPoster:
             
             # トークンが無効な場合は再取得を試みる
             if response.status_code == 401:
-                logger.info("Access token might be expired, trying to get a new one...")
-                self.access_token = self._get_new_access_token()
-                return self.post_article(title, content, status)
+                with self._token_lock:
+                    # 他のスレッドが再取得済みの場合はそのトークンで再送する
+                    if self.access_token == access_token:
+                        logger.info("Access token might be expired, trying to get a new one...")
+                        self.access_token = self._get_new_access_token()
+                return self._send_json(endpoint, data)
             
             raise
     
-    def post_translated_article(self, article: Dict[str, Any], translated_title: str, summary: str, translation: str) -> Dict[str, Any]:
+    def post_translated_article(self, article: Dict[str, Any], translated_title: str, summary: str, translation: str,
+                                status: str = 'publish') -> Dict[str, Any]:
         """
         翻訳記事をWordPressに投稿
         
@@ -192,13 +237,113 @@ class WordPressPoster:
             translated_title: 翻訳したタイトル
             summary: 翻訳した要約
             translation: 翻訳した本文
+            status: 公開ステータス（'draft'で下書きとして作成し、後でpublish_postで公開する）
             
         Returns:
             投稿したWordPress記事の情報（辞書形式）
         """
-        # タイトルを作成：「翻訳後のタイトル + 翻訳前のブログの名前」
-        title = f"{translated_title} ({article['blog_name']})"
+        title = self._translated_post_title(article, translated_title)
+        content = self._translated_post_content(article, summary, translation)
+        return self.post_article(title, content, status)
+    
+    def post_translated_articles(self, items: List[Tuple[Dict[str, Any], str, str, str]],
+                                 status: str = 'publish') -> List[Union[Dict[str, Any], Exception]]:
+        """
+        複数の翻訳記事をRESTのバッチエンドポイントでまとめて投稿
+        
+        バッチ内のリクエストは順番に処理されるため、記事は渡した順に公開される。
+        バッチエンドポイントが使えない場合は1件ずつ投稿する。
+        
+        Args:
+            items: (元記事の情報, 翻訳したタイトル, 翻訳した要約, 翻訳した本文)のタプルのリスト
+            status: 公開ステータス
+            
+        Returns:
+            記事ごとの投稿したWordPress記事の情報（辞書形式）。投稿に失敗した記事はその例外
+        """
+        posts = [
+            {
+                'title': self._translated_post_title(article, translated_title),
+                'content': self._translated_post_content(article, summary, translation),
+                'status': status,
+            }
+            for article, translated_title, summary, translation in items
+        ]
+        
+        results = []
+        batch_size = max(1, min(config.WP_BATCH_SIZE, WP_BATCH_MAX_REQUESTS))
+        for i in range(0, len(posts), batch_size):
+            chunk = posts[i:i + batch_size]
+            chunk_results = None
+            if self.batch_supported and len(chunk) > 1:
+                try:
+                    chunk_results = self._post_batch(chunk)
+                except Exception as e:
+                    # バッチが実行されたか分からないため再送せず、このバッチの記事を失敗とする
+                    logger.error(f"Error posting batch to WordPress: {e}")
+                    chunk_results = [e] * len(chunk)
+            if chunk_results is None:
+                chunk_results = [self._post_single(post) for post in chunk]
+            results.extend(chunk_results)
+        return results
+    
+    def _post_batch(self, posts: List[Dict[str, Any]]) -> Optional[List[Union[Dict[str, Any], Exception]]]:
+        """
+        記事の作成をバッチエンドポイントに送信
         
+        Returns:
+            記事ごとの応答または例外のリスト、1件ずつ投稿し直す必要がある場合はNone
+        """
+        data = {
+            'validation': 'normal',
+            'requests': [{'method': 'POST', 'path': '/wp/v2/posts', 'body': post} for post in posts],
+        }
+        
+        logger.info(f"Posting {len(posts)} articles to WordPress in one batch request")
+        try:
+            response = self._send_json(self.batch_url, data)
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code in (404, 405, 501):
+                logger.warning("WordPress batch endpoint is not available, posting articles one by one")
+                self.batch_supported = False
+                return None
+            if e.response is not None and e.response.status_code == 400:
+                # バッチの形式が受け付けられない場合は、このバッチの記事だけ1件ずつ投稿する
+                return None
+            raise
+        
+        responses = response.get('responses', [])
+        if response.get('failed') == 'validation':
+            # 1件でも検証に失敗するとバッチ全体が実行されないため、1件ずつ投稿して失敗を記事ごとに分ける
+            logger.warning("WordPress batch request was rejected, posting articles one by one")
+            return None
+        if len(responses) != len(posts):
+            # どの記事が作成されたか分からないため再送せず、全記事を失敗とする
+            # （記事は投稿中の状態で残り、次回の実行で投稿済みかどうかを確認する）
+            logger.error(f"WordPress batch returned {len(responses)} responses for {len(posts)} requests")
+            return [requests.exceptions.HTTPError("Unexpected WordPress batch response") for _ in posts]
+        
+        results = []
+        for post, item in zip(posts, responses):
+            body = item.get('body') or {}
+            if item.get('status') in (200, 201) and body.get('id'):
+                logger.info(f"Successfully posted article: {post['title']}, ID: {body.get('id')}")
+                results.append(body)
+            else:
+                message = body.get('message') if isinstance(body, dict) else body
+                logger.error(f"Error posting to WordPress in batch: {post['title']}: {item.get('status')} {message}")
+                results.append(requests.exceptions.HTTPError(f"{item.get('status')} {message}"))
+        return results
+    
+    def _post_single(self, post: Dict[str, Any]) -> Union[Dict[str, Any], Exception]:
+        """記事を1件投稿し、失敗した場合は例外を返す"""
+        try:
+            return self.post_article(post['title'], post['content'], post['status'])
+        except Exception as e:
+            return e
+    
+    def _translated_post_content(self, article: Dict[str, Any], summary: str, translation: str) -> str:
+        """翻訳記事の本文を作成（Gutenbergブロックフォーマット）"""
         # 改行をHTMLの段落に変換
         translation_html = ""
         for paragraph in translation.split('\n\n'):
@@ -226,8 +371,45 @@ class WordPressPoster:
 
 {translation_html}
 """
+        return content
+    
+    def find_translated_article(self, article: Dict[str, Any], translated_title: str) -> Optional[Dict[str, Any]]:
+        """
+        post_translated_articleで投稿した記事を探す（中断した投稿が完了していたかの確認用）
+        
+        Args:
+            article: 元記事の情報
+            translated_title: 翻訳したタイトル
+            
+        Returns:
+            見つかったWordPress記事の情報（辞書形式）、ない場合はNone
+            
+        Raises:
+            requests.exceptions.HTTPError: 検索に失敗した場合（投稿済みかどうか判断できない）
+        """
+        title = self._translated_post_title(article, translated_title)
+        endpoint = f"{self.api_base_url}/{self.site_url}/posts"
+        params = {
+            'search': title,
+            'status': 'publish,future,draft,pending,private',
+            'per_page': 20,
+            # 表示用のtitle.renderedは引用符や「--」「...」が変換されるため、保存したままのtitle.rawと比較する
+            'context': 'edit',
+        }
+        headers = {'Authorization': f'Bearer {self.access_token}'}
         
-        return self.post_article(title, content)
+        response = self.http_client.get(endpoint, params=params, headers=headers)
+        response.raise_for_status()
+        for post in response.json():
+            if post.get('title', {}).get('raw') == title:
+                logger.info(f"Found existing WordPress post: {title}, ID: {post.get('id')}")
+                return post
+        return None
+    
+    @staticmethod
+    def _translated_post_title(article: Dict[str, Any], translated_title: str) -> str:
+        """タイトルを作成：「翻訳後のタイトル + 翻訳前のブログの名前」"""
+        return f"{translated_title} ({article['blog_name']})"
     
     def post_summary_article(self, translated_articles: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
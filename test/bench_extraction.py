@@ -0,0 +1,86 @@
+import sys
+import os
+import glob
+import json
+import time
+import zlib
+
+# 親ディレクトリをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.article_scraper import ArticleScraper, FAST_PARSER
+import config
+
+
+def load_pages(paths):
+    """
+    保存済みのページを読み込む
+
+    .html ファイルと、ページキャッシュのエントリ（.json.z）に対応する。
+    ディレクトリを指定した場合はその中のファイルを対象とする。
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "*.html"))))
+            files.extend(sorted(glob.glob(os.path.join(path, "*.json.z"))))
+        elif os.path.exists(path):
+            files.append(path)
+
+    pages = []
+    for file in files:
+        if file.endswith(".json.z"):
+            with open(file, "rb") as f:
+                entry = json.loads(zlib.decompress(f.read()).decode("utf-8"))
+            pages.append((entry["url"], entry["html"]))
+        else:
+            with open(file, "r", encoding="utf-8", errors="replace") as f:
+                pages.append((file, f.read()))
+    return pages
+
+
+def synthetic_page(paragraphs=300):
+    """保存済みページがない場合に使う、ヘッダー・スクリプト・ナビゲーションの多いページ"""
+    head = "".join(f"<script>var x{i} = {list(range(50))};</script><style>.c{i} {{ color: red; }}</style>" for i in range(200))
+    nav = "".join(f'<li><a href="/p/{i}">Link {i}</a></li>' for i in range(500))
+    body = "".join(f"<p>Paragraph {i} with <a href='#'>a link</a> and <em>emphasis</em>.</p>" for i in range(paragraphs))
+    aside = "".join(f'<div class="widget"><p>Sidebar {i}</p></div>' for i in range(100))
+    return ("https://example.com/article",
+            f"<html><head>{head}</head><body><nav><ul>{nav}</ul></nav>"
+            f'<div class="post"><article><h1>Title</h1>{body}</article></div><aside>{aside}</aside></body></html>')
+
+
+def bench_extraction(pages, repeat=5):
+    """高速抽出と従来方式の処理時間を比較"""
+    scraper = ArticleScraper(page_cache=False)
+    print(f"=== 本文抽出ベンチマーク（{len(pages)}ページ × {repeat}回, 高速パーサー: {FAST_PARSER}） ===")
+
+    totals = {"legacy": 0.0, "fast": 0.0}
+    mismatches = 0
+    for url, html in pages:
+        domain = url.split("/")[2] if "://" in url else ""
+        results = {}
+        for mode, extract in (("legacy", scraper._extract_content_legacy), ("fast", scraper._extract_content_fast)):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                results[mode] = extract(html, domain)[0]
+            totals[mode] += (time.perf_counter() - start) / repeat
+
+        if (results["legacy"] or None) != (results["fast"] or None):
+            mismatches += 1
+            print(f"Mismatch: {url}")
+
+    print(f"legacy: {totals['legacy'] * 1000:.1f} ms")
+    print(f"fast:   {totals['fast'] * 1000:.1f} ms")
+    if totals["fast"] > 0:
+        print(f"speedup: {totals['legacy'] / totals['fast']:.2f}x")
+    print(f"mismatches: {mismatches}")
+    return mismatches == 0
+
+
+if __name__ == "__main__":
+    pages = load_pages(sys.argv[1:] or [config.PAGE_CACHE_DIR])
+    if not pages:
+        print("保存済みのページがないため、合成ページで計測します。")
+        pages = [synthetic_page()]
+    bench_extraction(pages)
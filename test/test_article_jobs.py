@@ -0,0 +1,246 @@
+import sys
+import os
+import logging
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# 親ディレクトリをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from src.db import ArticleDatabase, ARTICLE_POSTED, ARTICLE_FAILED
+from src.pipeline import ArticlePipeline
+from src.translator import TRANSLATION_ERROR_SUMMARY
+
+# ロギングの設定
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+
+class _Scraper:
+    def __init__(self):
+        self.calls = 0
+
+    def get_full_content(self, article):
+        self.calls += 1
+        return dict(article, content=article["content"] + " (full)")
+
+
+class _Translator:
+    def __init__(self):
+        self.calls = 0
+
+    def translate_article(self, article):
+        self.calls += 1
+        return f"{article['title']}（訳）", "要約", "本文"
+
+
+class _Poster:
+    """投稿を記録するWordPressPosterの代わり（failの値に応じて投稿の前後で失敗させる）"""
+
+    batch_supported = False
+
+    def __init__(self, fail=None, delays=None):
+        self.fail = fail
+        self.delays = delays or {}
+        self.posts = {}
+        self.published = []
+        self._lock = threading.Lock()
+
+    def find_translated_article(self, article, translated_title):
+        return self.posts.get(article["link"])
+
+    def post_translated_article(self, article, translated_title, summary, translation, status="publish"):
+        if self.fail == "before":
+            raise RuntimeError("WordPress is unavailable")
+        time.sleep(self.delays.get(article["link"], 0))
+        with self._lock:
+            post = {"id": len(self.posts) + 1, "status": status, "link": article["link"]}
+            self.posts[article["link"]] = post
+        if self.fail == "after":
+            # 投稿は完了したが、応答を受け取る前に中断した
+            raise RuntimeError("Connection reset")
+        return post
+
+    def publish_post(self, post_id):
+        post = next(post for post in self.posts.values() if post["id"] == post_id)
+        post["status"] = "publish"
+        self.published.append(post["link"])
+        return post
+
+
+class _BatchPoster(_Poster):
+    """バッチでの投稿を記録するWordPressPosterの代わり（rejectedの記事はバッチ内で失敗させる）"""
+
+    batch_supported = True
+
+    def __init__(self, rejected=()):
+        super().__init__()
+        self.rejected = set(rejected)
+        self.batches = []
+
+    def post_translated_articles(self, items, status="publish"):
+        self.batches.append([article["link"] for article, *_ in items])
+        results = []
+        for article, translated_title, summary, translation in items:
+            if article["link"] in self.rejected:
+                results.append(RuntimeError("rest_invalid_param"))
+                continue
+            post = self.post_translated_article(article, translated_title, summary, translation, status)
+            self.published.append(article["link"])
+            results.append(post)
+        return results
+
+
+def _articles():
+    return [
+        {"title": f"Article {i}", "link": f"https://example.com/{i}", "blog_name": "Example",
+         "published": datetime(2024, 1, 1, i), "content": f"Short body {i}."}
+        for i in range(3)
+    ]
+
+
+def test_resume_after_interrupted_post():
+    """投稿に失敗した記事を、スクレイピングと翻訳をやり直さずに再開するテスト"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ArticleDatabase(os.path.join(tmp, "test.db"))
+        scraper, translator = _Scraper(), _Translator()
+        articles = _articles()
+
+        # 1回目: 投稿の直前で失敗（翻訳済みの状態が残る）
+        poster = _Poster(fail="before")
+        assert ArticlePipeline(db, scraper, translator, poster, cleaner=False).run(articles) == []
+        assert scraper.calls == 3 and translator.calls == 3
+        assert [article["link"] for article in db.get_unfinished_articles()] == [a["link"] for a in articles]
+        assert db.get_unfinished_articles()[0]["published"] == articles[0]["published"]
+
+        # 2回目: 投稿は完了したが処理済みのマークの前に中断
+        poster.fail = "after"
+        assert ArticlePipeline(db, scraper, translator, poster, cleaner=False).run(articles) == []
+        assert len(poster.posts) == 3
+
+        # 3回目: 投稿済みの記事は再投稿せず、処理済みとしてマークする
+        poster.fail = None
+        posted = ArticlePipeline(db, scraper, translator, poster, cleaner=False).run(articles)
+        assert [post["wp_id"] for post in posted] == [poster.posts[a["link"]]["id"] for a in articles]
+        assert poster.published == [article["link"] for article in articles]
+        assert len(poster.posts) == 3
+        assert scraper.calls == 3 and translator.calls == 3
+        assert db.filter_unprocessed([article["link"] for article in articles]) == []
+        jobs = db.get_article_jobs([article["link"] for article in articles])
+        assert all(job["state"] == ARTICLE_POSTED and job["result"] is None for job in jobs.values())
+        assert db.get_unfinished_articles() == []
+        db.close()
+
+
+def test_publish_in_order():
+    """下書きの作成が終わった順序に関わらず、公開日時の順に公開するテスト"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ArticleDatabase(os.path.join(tmp, "test.db"))
+        articles = _articles()
+        # 先に公開された記事ほど下書きの作成に時間がかかる
+        poster = _Poster(delays={article["link"]: 0.2 * (len(articles) - i) for i, article in enumerate(articles)})
+        posted = ArticlePipeline(db, _Scraper(), _Translator(), poster, post_workers=3, cleaner=False).run(articles)
+        assert poster.published == [article["link"] for article in articles]
+        assert [post["wp_id"] for post in posted] == [poster.posts[a["link"]]["id"] for a in articles]
+        db.close()
+
+
+def test_publish_while_translating():
+    """先頭の記事の下書きができたら、次の記事の翻訳を待たずに公開するテスト"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ArticleDatabase(os.path.join(tmp, "test.db"))
+        articles = _articles()
+        poster = _Poster()
+        published_during_translation = []
+
+        class _SlowTranslator(_Translator):
+            def translate_article(self, article):
+                if article["link"] != articles[0]["link"]:
+                    # 後の記事の翻訳中に公開された記事を記録する
+                    time.sleep(0.5)
+                    published_during_translation.append(list(poster.published))
+                return super().translate_article(article)
+
+        posted = ArticlePipeline(db, _Scraper(), _SlowTranslator(), poster, translate_workers=1,
+                                 cleaner=False).run(articles)
+        assert published_during_translation[0] == [articles[0]["link"]]
+        assert poster.published == [article["link"] for article in articles]
+        assert len(posted) == 3
+        db.close()
+
+
+def test_batch_post_with_partial_failure():
+    """バッチで投稿し、バッチ内で失敗した記事だけを次回の実行で個別に投稿するテスト"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ArticleDatabase(os.path.join(tmp, "test.db"))
+        articles = _articles()
+        poster = _BatchPoster(rejected=[articles[1]["link"]])
+        posted = ArticlePipeline(db, _Scraper(), _Translator(), poster, cleaner=False).run(articles)
+        assert poster.batches == [[article["link"] for article in articles]]
+        assert [post["wp_id"] for post in posted] == [poster.posts[articles[0]["link"]]["id"],
+                                                      poster.posts[articles[2]["link"]]["id"]]
+        assert db.filter_unprocessed([article["link"] for article in articles]) == [articles[1]["link"]]
+
+        # 前回バッチで失敗した記事は、投稿済みでないか確認してから個別に投稿する
+        poster.rejected.clear()
+        posted = ArticlePipeline(db, _Scraper(), _Translator(), poster, cleaner=False).run(articles)
+        assert len(poster.batches) == 1 and len(posted) == 1
+        assert poster.published == [articles[0]["link"], articles[2]["link"], articles[1]["link"]]
+        assert db.filter_unprocessed([article["link"] for article in articles]) == []
+        db.close()
+
+
+def test_retry_failed_translation():
+    """翻訳エラーの結果は投稿せず、次回の実行で翻訳からやり直すテスト"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ArticleDatabase(os.path.join(tmp, "test.db"))
+        articles = _articles()
+        poster = _Poster()
+
+        class _FailingTranslator(_Translator):
+            def translate_article(self, article):
+                if article["link"] == articles[1]["link"]:
+                    return article["title"], TRANSLATION_ERROR_SUMMARY, "翻訳エラー: overloaded"
+                return super().translate_article(article)
+
+        posted = ArticlePipeline(db, _Scraper(), _FailingTranslator(), poster, cleaner=False).run(articles)
+        assert len(posted) == 2 and articles[1]["link"] not in poster.posts
+        assert [article["link"] for article in db.get_unfinished_articles()] == [articles[1]["link"]]
+
+        translator = _Translator()
+        posted = ArticlePipeline(db, _Scraper(), translator, poster, cleaner=False).run(articles)
+        assert len(posted) == 1 and translator.calls == 1
+        assert poster.published[-1] == articles[1]["link"]
+        db.close()
+
+
+def test_give_up_after_repeated_failures():
+    """失敗が続いた記事は再開しないテスト"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ArticleDatabase(os.path.join(tmp, "test.db"))
+        articles = _articles()[:1]
+        poster = _Poster(fail="before")
+        for _ in range(config.ARTICLE_JOB_MAX_ATTEMPTS):
+            ArticlePipeline(db, _Scraper(), _Translator(), poster, cleaner=False).run(articles)
+        assert db.get_article_jobs([articles[0]["link"]])[articles[0]["link"]]["state"] == ARTICLE_FAILED
+        assert db.get_unfinished_articles() == []
+        db.close()
+
+
+if __name__ == "__main__":
+    print("=== 記事の処理状態の再開テスト ===")
+    test_resume_after_interrupted_post()
+    test_publish_in_order()
+    test_publish_while_translating()
+    test_batch_post_with_partial_failure()
+    test_retry_failed_translation()
+    test_give_up_after_repeated_failures()
+    print("\n記事の処理状態の再開テスト成功！")
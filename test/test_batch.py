@@ -0,0 +1,257 @@
+import sys
+import os
+import json
+import logging
+import tempfile
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 親ディレクトリをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db import ArticleDatabase, BULK_QUERY_CHUNK
+from src.translator import TranslationCache
+from src.batch_translator import (BatchTranslator, OpenAIBatchClient, AnthropicBatchClient,
+                                  GeminiBatchClient, JOB_SUBMITTED)
+
+# ロギングの設定
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+
+def _fake_translation(prompt):
+    """プロンプトのタイトルから応答を作る（タイトルに「FAIL」を含む記事は失敗させる）"""
+    title = prompt.split("タイトル: ", 1)[1].split("\n", 1)[0]
+    if "FAIL" in title:
+        return None
+    return f"【翻訳タイトル】\n{title}（訳）\n\n【要約】\n{title}の要約\n\n【翻訳】\n{title}の本文"
+
+
+class _StandInAPI(BaseHTTPRequestHandler):
+    """OpenAI・Anthropic・GeminiのバッチAPIの最小限の代替サーバー"""
+
+    jobs = {}
+    files = {}
+    # ジョブの状態を確認された回数がこの値に達するまで処理中として応答する
+    polls_until_done = 2
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body, status=200, content_type="application/json"):
+        data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _poll(self, job_id):
+        job = self.jobs[job_id]
+        job["polls"] += 1
+        return job["polls"] >= self.polls_until_done
+
+    def do_POST(self):
+        body = self._body()
+        if self.path == "/openai/files":
+            # multipartの中身からJSONLの行だけを取り出す
+            lines = [line for line in body.decode("utf-8").splitlines() if line.startswith('{"custom_id"')]
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = [json.loads(line) for line in lines]
+            self._send({"id": file_id})
+        elif self.path == "/openai/batches":
+            request = json.loads(body)
+            job_id = f"batch_{len(self.jobs)}"
+            self.jobs[job_id] = {"polls": 0, "requests": [
+                (item["custom_id"], item["body"]["messages"][-1]["content"]) for item in self.files[request["input_file_id"]]
+            ]}
+            self._send({"id": job_id, "status": "validating"})
+        elif self.path == "/anthropic/messages/batches":
+            request = json.loads(body)
+            job_id = f"msgbatch_{len(self.jobs)}"
+            self.jobs[job_id] = {"polls": 0, "requests": [
+                (item["custom_id"], item["params"]["messages"][0]["content"]) for item in request["requests"]
+            ]}
+            self._send({"id": job_id, "processing_status": "in_progress"})
+        elif self.path.startswith("/gemini/models/") and self.path.endswith(":batchGenerateContent"):
+            request = json.loads(body)
+            job_id = f"batches/{len(self.jobs)}"
+            self.jobs[job_id] = {"polls": 0, "requests": [
+                (item["metadata"]["key"], item["request"]["contents"][0]["parts"][0]["text"])
+                for item in request["batch"]["input_config"]["requests"]["requests"]
+            ]}
+            self._send({"name": job_id, "metadata": {"state": "BATCH_STATE_PENDING"}})
+        else:
+            self._send({"error": "not found"}, status=404)
+
+    def do_GET(self):
+        path = self.path
+        if path.startswith("/openai/batches/"):
+            job_id = path.rsplit("/", 1)[1]
+            if not self._poll(job_id):
+                self._send({"id": job_id, "status": "in_progress"})
+            else:
+                self._send({"id": job_id, "status": "completed", "output_file_id": f"out-{job_id}"})
+        elif path.startswith("/openai/files/out-"):
+            job_id = path[len("/openai/files/out-"):].rsplit("/", 1)[0]
+            lines = []
+            for custom_id, prompt in self.jobs[job_id]["requests"]:
+                text = _fake_translation(prompt)
+                if text is None:
+                    lines.append({"custom_id": custom_id, "response": {"status_code": 500, "body": {}}})
+                else:
+                    lines.append({"custom_id": custom_id, "response": {"status_code": 200, "body": {
+                        "choices": [{"message": {"role": "assistant", "content": text}}]}}})
+            self._send("\n".join(json.dumps(line) for line in lines).encode("utf-8"), content_type="application/jsonl")
+        elif path.startswith("/anthropic/messages/batches/") and path.endswith("/results"):
+            job_id = path.split("/")[-2]
+            lines = []
+            for custom_id, prompt in self.jobs[job_id]["requests"]:
+                text = _fake_translation(prompt)
+                if text is None:
+                    lines.append({"custom_id": custom_id, "result": {"type": "errored"}})
+                else:
+                    lines.append({"custom_id": custom_id, "result": {"type": "succeeded", "message": {
+                        "content": [{"type": "text", "text": text}]}}})
+            self._send("\n".join(json.dumps(line) for line in lines).encode("utf-8"), content_type="application/jsonl")
+        elif path.startswith("/anthropic/messages/batches/"):
+            job_id = path.rsplit("/", 1)[1]
+            if not self._poll(job_id):
+                self._send({"id": job_id, "processing_status": "in_progress"})
+            else:
+                host, port = self.server.server_address
+                self._send({"id": job_id, "processing_status": "ended",
+                            "results_url": f"http://{host}:{port}/anthropic/messages/batches/{job_id}/results"})
+        elif path.startswith("/gemini/batches/"):
+            job_id = path[len("/gemini/"):]
+            if not self._poll(job_id):
+                self._send({"name": job_id, "metadata": {"state": "BATCH_STATE_RUNNING"}})
+            else:
+                responses = []
+                for key, prompt in self.jobs[job_id]["requests"]:
+                    text = _fake_translation(prompt)
+                    if text is None:
+                        responses.append({"error": {"code": 500}, "metadata": {"key": key}})
+                    else:
+                        responses.append({"response": {"candidates": [{"content": {"parts": [{"text": text}]}}]},
+                                          "metadata": {"key": key}})
+                self._send({"name": job_id, "done": True,
+                            "metadata": {"state": "BATCH_STATE_SUCCEEDED"},
+                            "response": {"inlinedResponses": {"inlinedResponses": responses}}})
+        else:
+            self._send({"error": "not found"}, status=404)
+
+
+def _start_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _articles():
+    return [
+        {"title": f"Article {i}", "link": f"https://example.com/{i}", "blog_name": "Example",
+         "published": datetime(2024, 1, 1, i), "content": f"Body of article {i}."}
+        for i in range(3)
+    ] + [{"title": "FAIL article", "link": "https://example.com/fail", "blog_name": "Example",
+          "published": datetime(2024, 1, 1, 5), "content": "This one errors."}]
+
+
+def _run_batch(provider, client_class, path):
+    """記事を送信し、次回の実行に相当するcollectで結果を回収する"""
+    server = _start_server()
+    host, port = server.server_address
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = ArticleDatabase(os.path.join(tmp, "test.db"))
+            cache = TranslationCache(db)
+            client = client_class("test-model", "test-key", f"http://{host}:{port}/{path}")
+            batch = BatchTranslator(db, cache, provider, "test-model", client=client)
+            articles = _articles()
+
+            # 全記事が1つのジョブとして送信され、ジョブIDが保存される
+            assert batch.submit(articles) == []
+            jobs = db.get_batch_jobs(provider, [JOB_SUBMITTED])
+            assert len(jobs) == 1
+            # 送信済みの記事は再送信しない
+            assert batch.submit(articles) == []
+            assert len(db.get_batch_jobs(provider, [JOB_SUBMITTED])) == 1
+
+            # 処理中のジョブからは記事を返さない
+            assert batch.collect() == []
+
+            # 完了したジョブの記事を返し、結果を翻訳キャッシュに保存する
+            ready = batch.collect()
+            assert [article["link"] for article in ready] == [article["link"] for article in articles]
+            assert ready[0]["published"] == articles[0]["published"]
+            for article in articles[:3]:
+                key = TranslationCache.make_key(article, provider, "test-model")
+                assert cache.get(key) == (f"{article['title']}（訳）", f"{article['title']}の要約",
+                                          f"{article['title']}の本文")
+            # 失敗したリクエストの記事はキャッシュされず、通常の翻訳で処理される
+            assert cache.get(TranslationCache.make_key(articles[3], provider, "test-model")) is None
+
+            # 投稿済みの記事は返さず、全記事の処理が終わったジョブは削除する
+            for article in articles:
+                db.mark_article_processed(article["link"], article["blog_name"], 1)
+            assert batch.collect() == []
+            assert db.get_batch_keys() == set()
+            db.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_bulk_processed_lookup():
+    """処理済みの記事をまとめて記録・照会するテスト（照会の分割上限を超える件数と重複したURLを含む）"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ArticleDatabase(os.path.join(tmp, "test.db"))
+        urls = [f"https://example.com/bulk/{i}" for i in range(BULK_QUERY_CHUNK * 2 + 10)]
+
+        # 重複した行はまとめて1件として記録する
+        processed = urls[::3]
+        db.mark_many_processed([(url, "Example", i) for i, url in enumerate(processed)]
+                               + [(processed[0], "Example", 0)])
+        db.mark_many_processed([])
+        assert all(db.is_article_processed(url) for url in processed)
+        assert not db.is_article_processed(urls[1])
+
+        # 分割した照会の結果を合わせ、入力の順序と重複をそのまま保って未処理のURLを返す
+        query = urls + [urls[1], urls[0], urls[-1]]
+        expected = [url for url in query if url not in set(processed)]
+        assert db.filter_unprocessed(query) == expected
+        assert db.filter_unprocessed([]) == []
+        db.close()
+
+
+def test_openai_batch():
+    """OpenAIのBatch APIのテスト"""
+    _run_batch("openai", OpenAIBatchClient, "openai")
+
+
+def test_anthropic_batch():
+    """AnthropicのMessage Batches APIのテスト"""
+    _run_batch("anthropic", AnthropicBatchClient, "anthropic")
+
+
+def test_gemini_batch():
+    """GeminiのBatch Modeのテスト"""
+    _run_batch("gemini", GeminiBatchClient, "gemini")
+
+
+if __name__ == "__main__":
+    print("=== バッチ翻訳テスト（ローカルの代替サーバー） ===")
+    test_bulk_processed_lookup()
+    test_openai_batch()
+    test_anthropic_batch()
+    test_gemini_batch()
+    print("\nバッチ翻訳テスト成功！")
@@ -0,0 +1,107 @@
+import sys
+import os
+import logging
+import tempfile
+from datetime import datetime
+
+# 親ディレクトリをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.db import ArticleDatabase, ARTICLE_DISCOVERED
+from src.dedup import DuplicateDetector, canonicalize_url, simhash, hamming_distance
+
+# ロギングの設定
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+PRESS_RELEASE = (
+    "Researchers at the University of Example found that people who sleep less than six hours a night "
+    "are more likely to report symptoms of anxiety and low mood during the following day. The study "
+    "followed more than two thousand adults over a period of three years and measured sleep with "
+    "wearable devices rather than questionnaires. The authors say the findings highlight the importance "
+    "of sleep for mental health and call for further research into interventions that improve sleep "
+    "quality in the general population."
+)
+
+
+def _article(link, content, blog_name="Example"):
+    return {"title": "Sleep and mood", "link": link, "blog_name": blog_name,
+            "published": datetime(2024, 1, 1), "content": content}
+
+
+def test_canonicalize_url():
+    """トラッキング用のパラメータやホストの表記の違いを同じURLに正規化するテスト"""
+    canonical = canonicalize_url("https://example.com/2024/sleep-study")
+    assert canonicalize_url("http://www.Example.com/2024/sleep-study/?utm_source=rss&utm_medium=feed") == canonical
+    assert canonicalize_url("https://example.com:443/2024/sleep-study/amp/#comments") == canonical
+    assert canonicalize_url("https://example.com/?p=2&fbclid=x&a=1") == "https://example.com/?a=1&p=2"
+    assert canonicalize_url("https://example.com/?p=2") != canonicalize_url("https://example.com/?p=3")
+
+
+def test_near_duplicate_articles():
+    """URLが違っても同じプレスリリースの転載を重複として除外するテスト"""
+    # 転載先で書き出しと一部の語句を変えた記事
+    rewritten = "Scientists" + PRESS_RELEASE[len("Researchers"):].replace("quality", "quality and duration")
+    assert hamming_distance(simhash(PRESS_RELEASE), simhash(rewritten)) <= 3
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ArticleDatabase(os.path.join(tmp, "test.db"))
+        detector = DuplicateDetector(db)
+        articles = [
+            _article("https://example.com/sleep-study", PRESS_RELEASE),
+            _article("https://www.example.com/sleep-study/?utm_source=rss", PRESS_RELEASE),
+            _article("https://other.example.org/news/sleep", rewritten, blog_name="Other"),
+            _article("https://example.com/unrelated", "A short note."),
+        ]
+        unique = detector.filter(articles)
+        assert [article["link"] for article in unique] == [articles[0]["link"], articles[3]["link"]]
+        assert detector.stats() == {"checked": 4, "url_duplicates": 1, "near_duplicates": 1}
+
+        # 次回の実行でも重複の判定は変わらない
+        assert DuplicateDetector(db).filter(articles) == unique
+        db.close()
+
+
+def test_duplicate_resumed_when_original_fails():
+    """元の記事が失敗を繰り返した場合に、重複として除外した記事を代わりに処理するテスト"""
+    with tempfile.TemporaryDirectory() as tmp:
+        db = ArticleDatabase(os.path.join(tmp, "test.db"))
+        original = _article("https://example.com/sleep-study", PRESS_RELEASE)
+        copies = [_article(f"https://other{i}.example.org/sleep", PRESS_RELEASE, blog_name="Other") for i in range(2)]
+        assert DuplicateDetector(db).filter([original] + copies) == [original]
+        assert db.get_unfinished_articles() == []
+
+        db.add_article_jobs([original])
+        assert not db.record_article_job_failure(original["link"], 2)
+        assert db.record_article_job_failure(original["link"], 2)
+
+        # 最初の重複が元の記事になり、残りの重複と元の記事はその重複として扱う
+        assert [article["link"] for article in db.get_unfinished_articles()] == [copies[0]["link"]]
+        assert db.get_article_jobs([copies[0]["link"]])[copies[0]["link"]]["state"] == ARTICLE_DISCOVERED
+        detector = DuplicateDetector(db)
+        assert detector.filter([original] + copies) == [copies[0]]
+        assert detector.check(_article("https://www.example.com/sleep-study/?utm_source=x", PRESS_RELEASE)) == copies[0]["link"]
+        db.close()
+
+
+def test_reject_unsupported_distance():
+    """帯の索引で検出できない距離の設定を拒否するテスト"""
+    try:
+        DuplicateDetector(None, max_distance=4)
+    except ValueError:
+        return
+    raise AssertionError("max_distance=4 should be rejected")
+
+
+if __name__ == "__main__":
+    print("=== 重複記事の検出テスト ===")
+    test_canonicalize_url()
+    test_near_duplicate_articles()
+    test_duplicate_resumed_when_original_fails()
+    test_reject_unsupported_distance()
+    print("\n重複記事の検出テスト成功！")
@@ -0,0 +1,113 @@
+import sys
+import os
+import logging
+import threading
+import time
+
+# 親ディレクトリをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from src.translator import FailoverTranslator, TRANSLATION_ERROR_SUMMARY
+from src.provider_health import CircuitBreaker, CIRCUIT_OPEN, CIRCUIT_HALF_OPEN, CIRCUIT_CLOSED
+
+# ロギングの設定
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+ARTICLE = {"title": "Sleep and mood", "link": "https://example.com/1", "blog_name": "Example",
+           "content": "Short body."}
+
+
+class _Translator:
+    """指定した時間だけ待ってから結果を返す翻訳インスタンスの代わり"""
+
+    def __init__(self, provider, delay=0.0, fail=False):
+        self.provider = provider
+        self.model = f"{provider}-model"
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def translate_article(self, article):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            return article["title"], TRANSLATION_ERROR_SUMMARY, "翻訳エラー: overloaded"
+        return f"{self.provider}の訳", "要約", "本文"
+
+
+def test_hedge_slow_primary():
+    """先頭のプロバイダーの応答が遅い場合に次のプロバイダーにも送り、先に返った結果を使うテスト"""
+    default_delay, min_delay = config.TRANSLATION_HEDGE_DEFAULT_DELAY, config.TRANSLATION_HEDGE_MIN_DELAY
+    config.TRANSLATION_HEDGE_DEFAULT_DELAY, config.TRANSLATION_HEDGE_MIN_DELAY = 0.1, 0.1
+    try:
+        primary, secondary = _Translator("gemini", delay=1.0), _Translator("openai")
+        translator = FailoverTranslator([primary, secondary])
+        start = time.monotonic()
+        assert translator.translate_article(ARTICLE)[0] == "openaiの訳"
+        assert time.monotonic() - start < 1.0
+        stats = translator.stats()
+        assert stats["openai"]["hedges"] == 1 and stats["openai"]["wins"] == 1
+        assert stats["gemini"]["wins"] == 0
+    finally:
+        config.TRANSLATION_HEDGE_DEFAULT_DELAY, config.TRANSLATION_HEDGE_MIN_DELAY = default_delay, min_delay
+
+
+def test_failover_on_error_result():
+    """エラーの結果を返したプロバイダーから次のプロバイダーに切り替えるテスト"""
+    primary, secondary = _Translator("gemini", fail=True), _Translator("openai")
+    translator = FailoverTranslator([primary, secondary], hedge_enabled=False)
+    assert translator.translate_article(ARTICLE)[0] == "openaiの訳"
+    assert primary.calls == 1 and secondary.calls == 1
+    assert translator.stats()["gemini"]["errors"] == 1
+
+    # 全てのプロバイダーで失敗した場合は最後のエラー結果を返す
+    secondary.fail = True
+    assert translator.translate_article(ARTICLE)[1] == TRANSLATION_ERROR_SUMMARY
+
+
+def test_circuit_breaker():
+    """連続して失敗したプロバイダーを止め、待機時間の後に1回だけ試行するテスト"""
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.2)
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_CLOSED and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN and not breaker.allow()
+
+    # 待機時間の後は試行中の呼び出しが終わるまで1回だけ許可する
+    time.sleep(0.25)
+    assert breaker.allow() and breaker.state == CIRCUIT_HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN and not breaker.allow()
+    time.sleep(0.25)
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED and breaker.allow() and breaker.allow()
+
+    # FailoverTranslatorはオープンになったプロバイダーを飛ばす
+    primary, secondary = _Translator("gemini", fail=True), _Translator("openai")
+    translator = FailoverTranslator([primary, secondary], hedge_enabled=False, failure_threshold=2, cooldown=0.2)
+    for _ in range(3):
+        assert translator.translate_article(ARTICLE)[0] == "openaiの訳"
+    assert primary.calls == 2 and translator.stats()["gemini"]["circuit"] == CIRCUIT_OPEN
+    time.sleep(0.25)
+    primary.fail = False
+    assert translator.translate_article(ARTICLE)[0] == "geminiの訳"
+    assert primary.calls == 3 and translator.stats()["gemini"]["circuit"] == CIRCUIT_CLOSED
+
+
+if __name__ == "__main__":
+    print("=== 翻訳プロバイダーの切り替えテスト ===")
+    test_hedge_slow_primary()
+    test_failover_on_error_result()
+    test_circuit_breaker()
+    print("\n翻訳プロバイダーの切り替えテスト成功！")
@@ -0,0 +1,79 @@
+import sys
+import os
+import logging
+
+# 親ディレクトリをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.section_parser import (SectionParser, SectionFormatError, parse_sections,
+                                HEADER_SECTIONS, SECTION_CHAR_LIMITS)
+
+# ロギングの設定
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+RESPONSE = "【翻訳タイトル】\n睡眠と気分\n\n【要約】\n睡眠不足は翌日の気分を下げる。\n\n【翻訳】\n本文の段落1\n\n本文の段落2"
+
+
+def _raises(func, *args):
+    try:
+        func(*args)
+    except SectionFormatError:
+        return True
+    return False
+
+
+def test_header_split_across_chunks():
+    """見出しがチャンクの境界で分かれても、確定したセクションから順に返すテスト"""
+    parser = SectionParser()
+    finished = []
+    for i in range(0, len(RESPONSE), 3):
+        finished.extend(parser.feed(RESPONSE[i:i + 3]))
+    assert finished == [("title", "睡眠と気分"), ("summary", "睡眠不足は翌日の気分を下げる。")]
+    assert parser.close() == ("睡眠と気分", "睡眠不足は翌日の気分を下げる。", "本文の段落1\n\n本文の段落2")
+
+
+def test_sections_out_of_order():
+    """後の見出しが先に現れた応答を検出するテスト"""
+    parser = SectionParser()
+    parser.feed("【翻訳タイトル】\n睡眠と気分\n")
+    assert _raises(parser.feed, "【翻訳】\n本文")
+    # 逐次解析しない場合は見出しが揃っていないとみなす
+    assert parse_sections("【翻訳タイトル】\nタイトル\n【翻訳】\n本文\n【要約】\n要約") is None
+
+
+def test_section_too_long():
+    """次の見出しが現れないまま長くなりすぎた応答を検出するテスト"""
+    parser = SectionParser()
+    parser.feed("【翻訳タイトル】\n")
+    assert _raises(parser.feed, "あ" * (SECTION_CHAR_LIMITS["title"] + 1))
+    # 最初の見出しより前の前置きも制限する
+    assert _raises(SectionParser().feed, "x" * (SECTION_CHAR_LIMITS["preamble"] + 1))
+    # 最後のセクションは制限しない
+    parser = SectionParser()
+    parser.feed(RESPONSE)
+    parser.feed("あ" * 10000)
+    assert len(parser.close()[2]) > 10000
+
+
+def test_missing_final_section():
+    """最後の見出しがないまま応答が終わった場合を検出するテスト"""
+    parser = SectionParser()
+    parser.feed("【翻訳タイトル】\n睡眠と気分\n\n【要約】\n要約")
+    assert _raises(parser.close)
+    assert parse_sections("【翻訳タイトル】\n睡眠と気分\n\n【要約】\n要約") is None
+    assert parse_sections("前置き\n【翻訳タイトル】\n睡眠と気分\n【要約】\n要約", HEADER_SECTIONS) == ("睡眠と気分", "要約")
+
+
+if __name__ == "__main__":
+    print("=== 応答の見出しの逐次解析テスト ===")
+    test_header_split_across_chunks()
+    test_sections_out_of_order()
+    test_section_too_long()
+    test_missing_final_section()
+    print("\n応答の見出しの逐次解析テスト成功！")
@@ -0,0 +1,152 @@
+import sys
+import os
+import json
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 親ディレクトリをパスに追加
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.wordpress import WordPressPoster
+
+# ロギングの設定
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+
+class _StandInWordPress(BaseHTTPRequestHandler):
+    """WordPressの投稿APIとRESTのバッチエンドポイントの最小限の代替サーバー"""
+
+    # バッチエンドポイントの応答（"multi_status", "validation", "not_found", "short"）
+    batch_mode = "multi_status"
+    batch_requests = 0
+    posts = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, body, status=200):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _create(self, post):
+        """タイトルに「INVALID」を含む記事は作成に失敗させる"""
+        if "INVALID" in post["title"]:
+            return 400, {"code": "rest_invalid_param", "message": "Invalid parameter(s): title"}
+        _StandInWordPress.posts.append(post["title"])
+        return 201, {"id": len(_StandInWordPress.posts), "status": post["status"], "title": {"raw": post["title"]}}
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if self.path == "/batch/v1":
+            _StandInWordPress.batch_requests += 1
+            if self.batch_mode == "not_found":
+                self._send({"code": "rest_no_route", "message": "No route was found"}, status=404)
+            elif self.batch_mode == "validation":
+                # 検証に失敗した場合はどのリクエストも実行しない
+                self._send({"failed": "validation", "responses": [
+                    {"body": {"code": "rest_invalid_param"}, "status": 400} if "INVALID" in item["body"]["title"]
+                    else None for item in body["requests"]]}, status=207)
+            else:
+                responses = []
+                for item in body["requests"]:
+                    status, result = self._create(item["body"])
+                    responses.append({"body": result, "status": status, "headers": {}})
+                if self.batch_mode == "short":
+                    responses = responses[:-1]
+                self._send({"responses": responses}, status=207)
+        elif self.path == "/wp/v2/sites/test/posts":
+            status, result = self._create(body)
+            self._send(result, status=status)
+        else:
+            self._send({"code": "rest_no_route"}, status=404)
+
+
+class _LocalPoster(WordPressPoster):
+    """代替サーバーに投稿するWordPressPoster（OAuth2認証を行わない）"""
+
+    def _load_access_token(self):
+        return "test-token"
+
+
+def _poster(server):
+    host, port = server.server_address
+    poster = _LocalPoster()
+    poster.site_url = "test"
+    poster.api_base_url = f"http://{host}:{port}/wp/v2/sites"
+    poster.batch_url = f"http://{host}:{port}/batch/v1"
+    poster.batch_supported = True
+    return poster
+
+
+def _items(*titles):
+    return [({"link": f"https://example.com/{i}", "blog_name": "Example"}, title, "要約", "本文")
+            for i, title in enumerate(titles)]
+
+
+def _run(mode, items):
+    _StandInWordPress.batch_mode = mode
+    _StandInWordPress.batch_requests = 0
+    _StandInWordPress.posts = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StandInWordPress)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        poster = _poster(server)
+        return poster, poster.post_translated_articles(items)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_batch_partial_failure():
+    """バッチ内で一部の記事だけが失敗した場合に、結果を記事ごとに返すテスト"""
+    poster, results = _run("multi_status", _items("記事A", "記事INVALID", "記事C"))
+    assert _StandInWordPress.batch_requests == 1
+    assert _StandInWordPress.posts == ["記事A (Example)", "記事C (Example)"]
+    assert results[0]["id"] == 1 and results[2]["id"] == 2
+    assert isinstance(results[1], Exception)
+    assert poster.batch_supported
+
+
+def test_batch_validation_failure():
+    """検証に失敗したバッチは実行されないため、1件ずつ投稿し直すテスト"""
+    poster, results = _run("validation", _items("記事A", "記事INVALID", "記事C"))
+    assert _StandInWordPress.batch_requests == 1
+    assert _StandInWordPress.posts == ["記事A (Example)", "記事C (Example)"]
+    assert results[0]["id"] == 1 and results[2]["id"] == 2
+    assert isinstance(results[1], Exception)
+    assert poster.batch_supported
+
+
+def test_batch_endpoint_not_found():
+    """バッチエンドポイントがない場合に1件ずつ投稿し、以後はバッチを使わないテスト"""
+    poster, results = _run("not_found", _items("記事A", "記事B"))
+    assert _StandInWordPress.posts == ["記事A (Example)", "記事B (Example)"]
+    assert [result["id"] for result in results] == [1, 2]
+    assert not poster.batch_supported
+
+
+def test_batch_unexpected_response():
+    """応答の数が合わないバッチは再送せず、全記事を失敗とするテスト"""
+    poster, results = _run("short", _items("記事A", "記事B"))
+    assert _StandInWordPress.posts == ["記事A (Example)", "記事B (Example)"]
+    assert all(isinstance(result, Exception) for result in results)
+
+
+if __name__ == "__main__":
+    print("=== WordPressのバッチ投稿テスト（ローカルの代替サーバー） ===")
+    test_batch_partial_failure()
+    test_batch_validation_failure()
+    test_batch_endpoint_not_found()
+    test_batch_unexpected_response()
+    print("\nWordPressのバッチ投稿テスト成功！")